@@ -12,53 +12,57 @@ from models.city import City
 from models.amenity import Amenity
 
 # Import data
-from data import FileStorage
+from data import amenity_repository, place_amenity_links, amenity_by_created_at
 from data import (
     country_data, place_data, amenity_data,
     place_to_amenity_data, review_data, user_data, city_data
 )
 
 # Import utility function
-from utils import pretty_json
+from utils import pretty_json, page_args, paged_json, field_args, projection
 
 
 amenity_api = Blueprint('amenity_api', __name__)
 
 
+def amenity_attribs(amenity_value, fields=None):
+    """Returns the attributes of an amenity as they are shown, only those
+    in fields if it isn't None"""
+    return projection(fields, {
+        "id": lambda: amenity_value["id"],
+        "name": lambda: amenity_value["name"],
+        "created_at": lambda: datetime.fromtimestamp(amenity_value["created_at"]).isoformat(),
+        "updated_at": lambda: datetime.fromtimestamp(amenity_value["updated_at"]).isoformat()
+    })
+
+
 @amenity_api.route('/amenities', methods=["GET"])
 def amenities_get():
     """return all amenities"""
     amenities_info = []
 
-    for amenity_value in amenity_data.values():
-        amenity_id = amenity_value["id"]
-        amenities_info.append({
-            "id": amenity_id,
-            "name": amenity_value['name'],
-            "created_at": datetime.fromtimestamp(amenity_value['created_at']).isoformat(),
-            "updated_at": datetime.fromtimestamp(amenity_value['updated_at']).isoformat()
-        })
+    amenity_values, next_position = amenity_repository.all(), None
+    page = page_args()
+    if page:
+        amenity_ids, next_position = amenity_by_created_at.page(*page)
+        amenity_values = amenity_repository.get_many(amenity_ids)
+
+    fields = field_args()
+    for amenity_value in amenity_values:
+        amenities_info.append(amenity_attribs(amenity_value, fields))
 
-    return pretty_json(amenities_info), 200
+    return paged_json(amenities_info, next_position), 200
 
 
 @amenity_api.route('/amenities/<amenity_id>', methods=["GET"])
 def amenity_specific_get(amenity_id):
     """returns specified amenity"""
 
-    for amenity_value in amenity_data.values():
-        if amenity_value["id"] == amenity_id:
-            data = amenity_value
-            break
-    else:
+    data = amenity_repository.get(amenity_id)
+    if data is None:
         abort(404, f"Amenity: {amenity_id} not found")
 
-    amenity_info = {
-        "id": amenity_id,
-        "name": data['name'],
-        "created_at": datetime.fromtimestamp(amenity_value['created_at']).isoformat(),
-        "updated_at": datetime.fromtimestamp(amenity_value['updated_at']).isoformat()
-    }
+    amenity_info = amenity_attribs(data, field_args())
 
     return pretty_json(amenity_info), 200
 
@@ -82,15 +86,13 @@ def create_new_amenity():
     except ValueError as exc:
         abort(400, repr(exc))
 
-    amenity_data[new_amenity.id] = {
-        "id": new_amenity.id,
-        "name": new_amenity.name,
-        "created_at": new_amenity.created_at,
-        "updated_at": new_amenity.updated_at
-    }
-
     try:
-        FileStorage.save_model_data("amenity_data.json", amenity_data)
+        amenity_repository.put({
+            "id": new_amenity.id,
+            "name": new_amenity.name,
+            "created_at": new_amenity.created_at,
+            "updated_at": new_amenity.updated_at
+        })
     except Exception as e:
         abort(500, f"Failed to save date: {str(e)}")
 
@@ -112,18 +114,15 @@ def update_amenity(amenity_id):
 
     update_data = request.get_json()
 
-    for amenity_value in amenity_data.values():
-        if amenity_value["id"] == amenity_id:
-            found_amenity_data = amenity_value
-            break
-    else:
+    found_amenity_data = amenity_repository.get(amenity_id)
+    if found_amenity_data is None:
         abort(404, f"Amenity ID not found: {amenity_id}")
 
     if "name" in update_data:
         found_amenity_data["name"] = update_data["name"]
 
     try:
-        FileStorage.save_model_data("amenity_data.json", amenity_data)
+        amenity_repository.put(found_amenity_data)
     except Exception as e:
         abort(500, f"Failed to save date: {str(e)}")
 
@@ -141,20 +140,12 @@ def update_amenity(amenity_id):
 def delete_amenity(amenity_id):
     """Deletes an existing amenity by amenity_id"""
 
-    keys_to_delete = []
-
-    for amenity_key, amenity_value in list(amenity_data.items()):
-        if amenity_value["id"] == amenity_id:
-            keys_to_delete.append(amenity_key)
-
-    if not keys_to_delete:
+    if not amenity_repository.exists(amenity_id):
         abort(404, f"Amenity not found with ID: {amenity_id}")
 
-    for amenity_key in keys_to_delete:
-        del amenity_data[amenity_key]
-
     try:
-        FileStorage.save_model_data("amenity_data.json", amenity_data)
+        amenity_repository.delete(amenity_id)
+        place_amenity_links.detach_amenity(amenity_id)
     except Exception as e:
         abort(500, f"Failed to save date: {str(e)}")
 
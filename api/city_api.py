@@ -12,53 +12,57 @@ from models.city import City
 from models.amenity import Amenity
 
 # Import data
-from data import FileStorage
+from data import city_repository, city_by_created_at
 from data import (
     country_data, place_data, amenity_data,
     place_to_amenity_data, review_data, user_data, city_data
 )
 
 # Import utility function
-from utils import pretty_json
+from utils import pretty_json, page_args, paged_json, field_args, projection
 
 city_api = Blueprint('city_api', __name__, url_prefix="/api/v1")
 
 
+def city_attribs(city_value, fields=None):
+    """Returns the attributes of a city as they are shown, only those in
+    fields if it isn't None"""
+    return projection(fields, {
+        "id": lambda: city_value["id"],
+        "country_id": lambda: city_value["country_id"],
+        "name": lambda: city_value["name"],
+        "created_at": lambda: datetime.fromtimestamp(city_value["created_at"]).isoformat(),
+        "updated_at": lambda: datetime.fromtimestamp(city_value["updated_at"]).isoformat()
+    })
+
+
 @city_api.route('/cities', methods=["GET"])
 def get_cities():
-    """return all cities """
+    """return all cities"""
     cities_info = []
 
-    for city_value in city_data.values():
-        cities_info.append({
-            "id": city_value["id"],
-            "country_id": city_value["country_id"],
-            "name": city_value["name"],
-            "created_at": datetime.fromtimestamp(city_value["created_at"]).isoformat(),
-            "updated_at": datetime.fromtimestamp(city_value["updated_at"]).isoformat()
-        })
+    city_values, next_position = city_repository.all(), None
+    page = page_args()
+    if page:
+        city_ids, next_position = city_by_created_at.page(*page)
+        city_values = city_repository.get_many(city_ids)
+
+    fields = field_args()
+    for city_value in city_values:
+        cities_info.append(city_attribs(city_value, fields))
 
-    return pretty_json(cities_info)
+    return paged_json(cities_info, next_position)
 
 
 @city_api.route('/cities/<city_id>', methods=["GET"])
 def get_specific_city(city_id):
     """get specific city"""
 
-    for city_value in city_data.values():
-        if city_value["id"] == city_id:
-            data = city_value
-            break
-    else:
+    data = city_repository.get(city_id)
+    if data is None:
         abort(404, f"User: {city_id} not found")
 
-    city_info = {
-        "id": data["id"],
-        "country_id": data["country_id"],
-        "name": data["name"],
-        "created_at": datetime.fromtimestamp(data["created_at"]).isoformat(),
-        "updated_at": datetime.fromtimestamp(data["updated_at"]).isoformat()
-    }
+    city_info = city_attribs(data, field_args())
 
     return pretty_json(city_info), 200
 
@@ -85,16 +89,14 @@ def create_new_city():
     except ValueError as exc:
         abort(400, repr(exc))
 
-    city_data[new_city.id] = {
-        "id": new_city.id,
-        "country_id": new_city.country_id,
-        "name": new_city.name,
-        "created_at": new_city.created_at,
-        "updated_at": new_city.updated_at
-    }
-
     try:
-        FileStorage.save_model_data("city_data.json", city_data)
+        city_repository.put({
+            "id": new_city.id,
+            "country_id": new_city.country_id,
+            "name": new_city.name,
+            "created_at": new_city.created_at,
+            "updated_at": new_city.updated_at
+        })
     except Exception as e:
         abort(500, f"Failed to save data: {str(e)}")
 
@@ -117,18 +119,15 @@ def update_city_data(city_id):
 
     new_data = request.get_json()
 
-    for city_value in city_data.values():
-        if city_value["id"] == city_id:
-            found_city_data = city_value
-            break
-    else:
+    found_city_data = city_repository.get(city_id)
+    if found_city_data is None:
         abort(404, "City ID not found: {city_id}")
 
     if "name" in new_data:
         found_city_data["name"] = new_data["name"]
 
     try:
-        FileStorage.save_model_data("city_data.json", city_data)
+        city_repository.put(found_city_data)
     except Exception as e:
         abort(500, f"Failed to save data: {str(e)}")
 
@@ -147,21 +146,11 @@ def update_city_data(city_id):
 def delete_a_city(city_id):
     """delete a specific city"""
 
-    keys_to_delete = []
-
-    for city_key, city_value in list(city_data.items()):
-        if city_value["id"] == city_id:
-            keys_to_delete.append(city_key)
-
-    if not keys_to_delete:
+    if not city_repository.exists(city_id):
         abort(404, f"Place not found with ID: {city_id}")
 
-    # Remove the place(s) from the dictionary
-    for city_key in keys_to_delete:
-        del city_data[city_key]
-
     try:
-        FileStorage.save_model_data("city_data.json", city_data)
+        city_repository.delete(city_id)
     except Exception as e:
         abort(500, f"Failed to save data: {str(e)}")
     # Return a confirmation message
@@ -12,13 +12,15 @@ from models.city import City
 from models.amenity import Amenity
 
 # Import data
-from data import FileStorage
+from data import country_repository, city_repository, country_by_code, city_by_country
+from data import country_by_created_at
 from data import (
     country_data, place_data, amenity_data,
     place_to_amenity_data, review_data, user_data, city_data
 )
 
-from utils import pretty_json
+from utils import pretty_json, page_args, paged_json, field_args, projection
+from api.city_api import city_attribs
 
 country_api = Blueprint('country_api', __name__)
 
@@ -27,7 +29,19 @@ country_api = Blueprint('country_api', __name__)
 @country_api.route('/example/country_data')
 def example_country_data():
     """ Example to show that we can view data loaded in the data module's init """
-    return jsonify(country_data)
+    return jsonify(dict(country_data))
+
+
+def country_attribs(country_value, fields=None):
+    """ Returns the attributes of a country as they are shown, only those
+        in fields if it isn't None """
+    return projection(fields, {
+        "id": lambda: country_value["id"],
+        "name": lambda: country_value["name"],
+        "code": lambda: country_value["code"],
+        "created_at": lambda: datetime.fromtimestamp(country_value["created_at"]).isoformat(),
+        "updated_at": lambda: datetime.fromtimestamp(country_value["updated_at"]).isoformat()
+    })
 
 
 @country_api.route('/countries', methods=["GET"])
@@ -35,33 +49,29 @@ def countries_get():
     """ returns all countires data """
 
     countries_info = []
-    for country_value in country_data.values():
-        countries_info.append({
-            "id": country_value["id"],
-            "name": country_value["name"],
-            "code": country_value["code"],
-            "created_at": datetime.fromtimestamp(country_value["created_at"]).isoformat(),
-            "updated_at": datetime.fromtimestamp(country_value["updated_at"]).isoformat()
-        })
+    country_values, next_position = country_repository.all(), None
+    page = page_args()
+    if page:
+        country_ids, next_position = country_by_created_at.page(*page)
+        country_values = country_repository.get_many(country_ids)
+
+    fields = field_args()
+    for country_value in country_values:
+        countries_info.append(country_attribs(country_value, fields))
 
-    return pretty_json(countries_info), 200
+    return paged_json(countries_info, next_position), 200
 
 
 @country_api.route('/countries/<country_code>', methods=["GET"])
 def countries_specific_get(country_code):
     """ returns specific country data """
 
-    for country_value in country_data.values():
-        if country_value['code'] == country_code:
-            data = country_value
+    country_id = country_by_code.lookup_one(country_code)
+    if country_id is None:
+        abort(404, f"Country: {country_code} is not found")
+    data = country_repository.get(country_id)
 
-    country_info = {
-        "id": data['id'],
-        "name": data['name'],
-        "code": data['code'],
-        "created_at": datetime.fromtimestamp(data['created_at']).isoformat(),
-        "updated_at": datetime.fromtimestamp(data['updated_at']).isoformat()
-    }
+    country_info = country_attribs(data, field_args())
 
     return pretty_json(country_info), 200
 
@@ -71,25 +81,14 @@ def countries_specific_cities_get(country_code):
     """ returns all cities data of a specified country """
 
     cities_data = []
-    found_country_id = None
-
-    for country_value in country_data.values():
-        if country_value["code"] == country_code:
-            found_country_id = country_value["id"]
-            break
 
+    found_country_id = country_by_code.lookup_one(country_code)
     if not found_country_id:
         abort(404, f"Country: {country_code} is not found")
 
-    for city_value in city_data.values():
-        if city_value["country_id"] == found_country_id:
-            cities_data.append({
-                "id": city_value["id"],
-                "country_id": city_value["country_id"],
-                "name": city_value["name"],
-                "created_at": datetime.fromtimestamp(city_value["created_at"]).isoformat(),
-                "updated_at": datetime.fromtimestamp(city_value["updated_at"]).isoformat()
-            })
+    fields = field_args()
+    for city_value in city_repository.get_many(city_by_country.lookup(found_country_id)):
+        cities_data.append(city_attribs(city_value, fields))
 
     return pretty_json(cities_data), 200
 
@@ -118,16 +117,14 @@ def create_new_country():
     except ValueError as exc:
         abort(400, repr(exc))
 
-    country_data[new_country.id] = {
-        "id": new_country.id,
-        "name": new_country.name,
-        "code": new_country.code,
-        "created_at": new_country.created_at,
-        "updated_at": new_country.updated_at
-    }
-
     try:
-        FileStorage.save_model_data("country_data.json", country_data)
+        country_repository.put({
+            "id": new_country.id,
+            "name": new_country.name,
+            "code": new_country.code,
+            "created_at": new_country.created_at,
+            "updated_at": new_country.updated_at
+        })
     except Exception as e:
         abort(500, f"Failed to save data: {str(e)}")
 
@@ -155,12 +152,10 @@ def update_country(country_code):
     new_data = request.get_json()
 
     # Search for the country with the specified country_code
-    for country_value in country_data.values():
-        if country_value["code"] == country_code:
-            found_country_data = country_value
-            break
-    else:
+    found_country_id = country_by_code.lookup_one(country_code)
+    if found_country_id is None:
         abort(404, f"Country not found: {country_code}")
+    found_country_data = country_repository.get(found_country_id)
 
     # Update country attributes if new data is provided
     if "name" in new_data:
@@ -169,7 +164,7 @@ def update_country(country_code):
         found_country_data["code"] = new_data["code"]
 
     try:
-        FileStorage.save_model_data("country_data.json", country_data)
+        country_repository.put(found_country_data)
     except Exception as e:
         abort(500, f"Failed to save data: {str(e)}")
 
@@ -189,21 +184,14 @@ def update_country(country_code):
 def delete_country(country_code):
     """Deletes an existing user by user_id"""
 
-    keys_to_delete = []
-
-    for country_key, country_value in list(country_data.items()):
-        if country_value["code"] == country_code:
-            keys_to_delete.append(country_key)
+    keys_to_delete = country_by_code.lookup(country_code)
 
     if not keys_to_delete:
         abort(404, f"Place not found with ID: {country_code}")
 
-    # Remove the place(s) from the dictionary
-    for country_key in keys_to_delete:
-        del country_data[country_key]
-
     try:
-        FileStorage.save_model_data("country_data.json", country_data)
+        for country_key in keys_to_delete:
+            country_repository.delete(country_key)
     except Exception as e:
         abort(500, f"Failed to save data: {str(e)}")
 
@@ -12,14 +12,22 @@ from models.city import City
 from models.amenity import Amenity
 
 # Import data
-from data import FileStorage
+from data import place_repository, amenity_repository, place_amenity_links
+from data import amenity_by_name, amenity_bitmaps
+from data import country_by_code, city_by_country, place_by_city
+from data import place_by_price, place_by_max_guests, place_by_rooms, place_by_bathrooms
+from data import place_by_location, place_tiles
+from data import review_aggregates, place_rankings, place_by_created_at, place_by_rating
+from data.sorted_index import SortedIndex
 from data import (
     country_data, place_data, amenity_data,
     place_to_amenity_data, review_data, user_data, city_data
 )
 
 # Import utility function
-from utils import pretty_json
+from utils import pretty_json, page_args, paged_json, keyset_slice, float_arg, int_arg
+from utils import field_args, projection, selected
+from api.amenity_api import amenity_attribs
 
 
 place_api = Blueprint('place_api', __name__)
@@ -28,7 +36,8 @@ place_api = Blueprint('place_api', __name__)
 @place_api.route('/example/places_amenties_raw')
 def example_places_amenities_raw():
     """ Prints out the raw data for relationships between places and their amenities """
-    return jsonify(place_to_amenity_data)
+    return jsonify({place_id: place_amenity_links.amenities(place_id)
+                    for place_id in place_amenity_links.place_ids()})
 
 
 @place_api.route('/places_amenties', methods=["GET"])
@@ -37,76 +46,409 @@ def places_amenties():
 
     output = {}
 
-    for place_key in place_to_amenity_data:
-        place_name = place_data[place_key]['name']
-        if place_name not in output:
-            output[place_name] = []
+    for place_key in place_amenity_links.place_ids():
+        place = place_repository.get(place_key)
+        if place is None:
+            continue
+        if place["name"] not in output:
+            output[place["name"]] = []
 
-        amenities_ids = place_to_amenity_data[place_key]
-        for amenity_key in amenities_ids:
-            amenity_name = amenity_data[amenity_key]['name']
-            output[place_name].append(amenity_name)
+        amenities_ids = place_amenity_links.amenities(place_key)
+        for amenity_value in amenity_repository.get_many(amenities_ids):
+            output[place["name"]].append(amenity_value["name"])
 
     return pretty_json(output)
 
 
+@place_api.route('/places/<place_id>/amenities', methods=["GET"])
+def place_amenities_get(place_id):
+    """ returns the amenities of a place """
+
+    if not place_repository.exists(place_id):
+        abort(404, f"Place: {place_id} not found")
+
+    amenities_info = []
+    fields = field_args()
+    for amenity_value in amenity_repository.get_many(place_amenity_links.amenities(place_id)):
+        amenities_info.append(amenity_attribs(amenity_value, fields))
+
+    return pretty_json(amenities_info), 200
+
+
+@place_api.route('/places/<place_id>/amenities/<amenity_id>', methods=["POST"])
+def attach_place_amenity(place_id, amenity_id):
+    """ adds an amenity to a place """
+
+    if not place_repository.exists(place_id):
+        abort(404, f"Place: {place_id} not found")
+    if not amenity_repository.exists(amenity_id):
+        abort(404, f"Amenity: {amenity_id} not found")
+
+    try:
+        attached = place_amenity_links.attach(place_id, amenity_id)
+    except Exception as e:
+        abort(500, f"Failed to save data: {str(e)}")
+
+    # 200 if the place had the amenity already
+    return pretty_json({"place_id": place_id, "amenity_id": amenity_id}), 201 if attached else 200
+
+
+@place_api.route('/places/<place_id>/amenities/<amenity_id>', methods=["DELETE"])
+def detach_place_amenity(place_id, amenity_id):
+    """ removes an amenity from a place """
+
+    if not place_amenity_links.has(place_id, amenity_id):
+        abort(404, f"Place: {place_id} does not have amenity: {amenity_id}")
+
+    try:
+        place_amenity_links.detach(place_id, amenity_id)
+    except Exception as e:
+        abort(500, f"Failed to save data: {str(e)}")
+
+    return pretty_json({"message": f"Amenity {amenity_id} removed from place {place_id}."}), 204
+
+
+def amenity_clauses(amenities):
+    """ Parse the amenities query parameter into the clauses of
+        AmenityBitmaps.search(). Clauses are separated by commas and must all
+        match. A clause matches the places that have any of its amenities,
+        separated by |, or none of them if it starts with !.
+        Amenities are given by id or by name """
+
+    clauses = []
+    for clause in amenities.split(","):
+        negated = clause.startswith("!")
+        amenity_ids = []
+        for term in clause.lstrip("!").split("|"):
+            term = term.strip()
+            if amenity_repository.exists(term):
+                amenity_ids.append(term)
+            elif amenity_by_name.lookup(term):
+                amenity_ids.extend(amenity_by_name.lookup(term))
+            else:
+                abort(400, f"Unknown amenity: {term}")
+        clauses.append((negated, amenity_ids))
+    return clauses
+
+
+# query parameter => (sorted index, True for a lower bound, False for an upper one)
+place_range_filters = {
+    "min_price": (place_by_price, True),
+    "max_price": (place_by_price, False),
+    "min_guests": (place_by_max_guests, True),
+    "min_rooms": (place_by_rooms, True),
+    "min_bathrooms": (place_by_bathrooms, True),
+}
+
+
+def range_filter(index, low, high):
+    """ Returns the filter of the places where the field of index is in
+        [low, high], see filtered_places() """
+
+    def matches(place_value):
+        value = place_value.get(index.field)
+        return SortedIndex.is_number(value) and \
+            (low is None or value >= low) and (high is None or value <= high)
+
+    return index.count(low, high), lambda: index.lookup(low, high), matches
+
+
+def place_id_filter(place_ids, matches):
+    """ Returns the filter of the places in place_ids, see filtered_places() """
+    return len(place_ids), lambda: place_ids, matches
+
+
+def filtered_places():
+    """ Returns the places matching the filters in the query string, or None
+        if there are no filters.
+        Every filter knows how many places it matches from its index. The
+        one that matches the fewest gives the places to look at and only
+        those are checked against the other filters """
+
+    # (number of places, function returning their ids, function checking a place)
+    filters = []
+
+    ranges = {}
+    for param, (index, is_low) in place_range_filters.items():
+        if param not in request.args:
+            continue
+        value = float_arg(param)
+        bounds = ranges.setdefault(index, [None, None])
+        bounds[0 if is_low else 1] = value
+    for index, (low, high) in ranges.items():
+        filters.append(range_filter(index, low, high))
+
+    city_id = request.args.get("city_id")
+    if city_id:
+        filters.append(place_id_filter(
+            place_by_city.lookup(city_id),
+            lambda place_value: place_value["city_id"] == city_id))
+
+    country_code = request.args.get("country")
+    if country_code:
+        country_id = country_by_code.lookup_one(country_code)
+        if country_id is None:
+            abort(400, f"Unknown country: {country_code}")
+        city_ids = set(city_by_country.lookup(country_id))
+        place_ids = []
+        for country_city_id in city_ids:
+            place_ids.extend(place_by_city.lookup(country_city_id))
+        filters.append(place_id_filter(
+            place_ids, lambda place_value: place_value["city_id"] in city_ids))
+
+    if not filters:
+        return None
+
+    filters.sort(key=lambda place_filter: place_filter[0])
+    place_ids = filters[0][1]()
+    return [place_value for place_value in place_repository.get_many(place_ids)
+            if all(matches(place_value) for count, ids, matches in filters[1:])]
+
+
+# the orders /places can be sorted in, with ?sort=<field> or ?sort=-<field>
+# for the highest value first
+place_sort_indexes = {
+    "price_per_night": place_by_price,
+    "max_guests": place_by_max_guests,
+    "created_at": place_by_created_at,
+    "rating": place_by_rating
+}
+
+
+def place_sort():
+    """ Returns the index of the order asked for by ?sort= (created_at by
+        default) and whether it goes from the highest value down """
+
+    sort = request.args.get("sort", "created_at")
+    reverse = sort.startswith("-")
+    index = place_sort_indexes.get(sort.lstrip("-"))
+    if index is None:
+        abort(400, f"Invalid sort: {sort}")
+    return index, reverse
+
+
+# the attributes of a place that come from the totals of its reviews
+rating_fields = ("review_count", "average_rating")
+
+
+def wants_rating(fields):
+    """ Returns True if fields has any of the rating_fields """
+    return fields is None or not fields.isdisjoint(rating_fields)
+
+
+def place_attribs(place_value, rating=None, fields=None):
+    """ Returns the attributes of a place as they are shown, only those in
+        fields if it isn't None. rating is the summary of its reviews if it
+        was looked up along with other places """
+    if rating is None and wants_rating(fields):
+        rating = review_aggregates.place(place_value["id"])
+    return projection(fields, {
+        "id": lambda: place_value["id"],
+        "host_user_id": lambda: place_value["host_user_id"],
+        "city_id": lambda: place_value["city_id"],
+        "name": lambda: place_value["name"],
+        "description": lambda: place_value["description"],
+        "address": lambda: place_value["address"],
+        "latitude": lambda: place_value["latitude"],
+        "longitude": lambda: place_value["longitude"],
+        "number_of_rooms": lambda: place_value["number_of_rooms"],
+        "bathrooms": lambda: place_value["bathrooms"],
+        "price_per_night": lambda: place_value["price_per_night"],
+        "max_guests": lambda: place_value["max_guests"],
+        "review_count": lambda: rating["count"],
+        "average_rating": lambda: rating["average"],
+        "created_at": lambda: datetime.fromtimestamp(place_value["created_at"]).isoformat(),
+        "updated_at": lambda: datetime.fromtimestamp(place_value["updated_at"]).isoformat()
+    })
+
+
+def places_attribs(place_values, fields=None):
+    """ Returns the attributes of a list of places as they are shown, only
+        those in fields if it isn't None, looking up their ratings at once """
+
+    # place_values is gone through twice, it may be a generator
+    place_values = list(place_values)
+    ratings = {}
+    if wants_rating(fields):
+        ratings = review_aggregates.places([place_value["id"] for place_value in place_values])
+
+    places_info = []
+    for place_value in place_values:
+        places_info.append(place_attribs(place_value, ratings.get(place_value["id"]), fields))
+    return places_info
+
+
 @place_api.route('/places', methods=["GET"])
 def place_amenties():
     """get all places data"""
 
-    places_info = []
+    place_values = filtered_places()
+
+    amenities = request.args.get("amenities")
+    if amenities:
+        within = None
+        if place_values is not None:
+            within = [place_value["id"] for place_value in place_values]
+        place_ids, facets = amenity_bitmaps.search(amenity_clauses(amenities), within)
+        place_values = place_repository.get_many(place_ids)
+
+    sort_index, reverse = place_sort()
+    sorted_places = page_args()
+    if sorted_places is None and "sort" in request.args:
+        sorted_places = (place_repository.count() or 1, None)
+
+    next_position = None
+    if place_values is not None:
+        count = len(place_values)
+        if sorted_places:
+            # only sort the places that matched, using the values kept by
+            # the index
+            place_ids, next_position = keyset_slice(
+                sort_index.positions([place_value["id"] for place_value in place_values]),
+                *sorted_places, reverse)
+            place_values = place_repository.get_many(place_ids)
+    elif sorted_places:
+        place_ids, next_position = sort_index.page(*sorted_places, reverse)
+        place_values = place_repository.get_many(place_ids)
+    else:
+        place_values = place_repository.all()
 
-    for place_value in place_data.values():
-        places_info.append({
-            "id": place_value["id"],
-            "host_user_id": place_value["host_user_id"],
-            "city_id": place_value["city_id"],
-            "name": place_value["name"],
-            "description": place_value["description"],
-            "address": place_value["address"],
-            "latitude": place_value["latitude"],
-            "longitude": place_value["longitude"],
-            "number_of_rooms": place_value["number_of_rooms"],
-            "bathrooms": place_value["bathrooms"],
-            "price_per_night": place_value["price_per_night"],
-            "max_guests": place_value["max_guests"],
-            "created_at": datetime.fromtimestamp(place_value["created_at"]).isoformat(),
-            "updated_at": datetime.fromtimestamp(place_value["updated_at"]).isoformat()
-        })
+    places_info = places_attribs(place_values, field_args())
+
+    if amenities:
+        amenity_counts = []
+        for amenity_value in amenity_repository.all():
+            amenity_counts.append({
+                "id": amenity_value["id"],
+                "name": amenity_value["name"],
+                "count": facets.get(amenity_value["id"], 0)
+            })
+        return paged_json({
+            "count": count,
+            "amenities": amenity_counts,
+            "places": places_info
+        }, next_position), 200
+
+    return paged_json(places_info, next_position), 200
+
+
+def places_by_distance(results):
+    """ Returns the places of (place id, distance in km) results, nearest
+        first, with their distance """
+
+    fields = field_args()
+    distances = dict(results)
+    place_values = place_repository.get_many([place_id for place_id, distance in results])
+    places_info = places_attribs(place_values, fields)
+    if fields is None or "distance_km" in fields:
+        for place_value, attribs in zip(place_values, places_info):
+            attribs["distance_km"] = round(distances[place_value["id"]], 3)
+    return places_info
+
+
+@place_api.route('/places/near', methods=["GET"])
+def places_near():
+    """ returns the places at most radius_km away from lat, lon, nearest first """
+
+    lat = float_arg("lat")
+    lon = float_arg("lon")
+    radius_km = float_arg("radius_km")
+    if not -90 <= lat <= 90 or not -180 <= lon <= 180 or radius_km < 0:
+        abort(400, "Invalid lat, lon or radius_km")
+
+    return pretty_json(places_by_distance(place_by_location.near(lat, lon, radius_km))), 200
 
-    return pretty_json(places_info), 200
+
+@place_api.route('/places/within', methods=["GET"])
+def places_within():
+    """ returns the places in ?bbox=west,south,east,north, nearest to its center first """
+
+    try:
+        west, south, east, north = [float(value) for value in request.args["bbox"].split(",")]
+    except KeyError:
+        abort(400, "Missing parameter: bbox")
+    except ValueError:
+        abort(400, "bbox has to be west,south,east,north")
+    if not (-90 <= south <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180):
+        abort(400, "bbox has to be west,south,east,north in degrees")
+
+    return pretty_json(places_by_distance(
+        place_by_location.within(south, west, north, east))), 200
+
+
+@place_api.route('/places/top', methods=["GET"])
+def top_places():
+    """ returns the best rated or cheapest places of a city or country """
+
+    by = request.args.get("by", "rating")
+    if by not in ("rating", "price"):
+        abort(400, f"Invalid by: {by}")
+    limit = int_arg("limit", 10, 1, 100)
+    min_reviews = int_arg("min_reviews", 1, 1, 1000000)
+
+    city_id = request.args.get("city_id")
+    country_code = request.args.get("country")
+    if city_id:
+        city_ids = [city_id]
+    elif country_code:
+        country_id = country_by_code.lookup_one(country_code)
+        if country_id is None:
+            abort(400, f"Unknown country: {country_code}")
+        city_ids = city_by_country.lookup(country_id)
+    else:
+        abort(400, "Missing parameter: city_id or country")
+
+    place_values = place_repository.get_many(
+        place_rankings.top(city_ids, by, limit, min_reviews))
+
+    return pretty_json(places_attribs(place_values, field_args())), 200
+
+
+@place_api.route('/places/clusters/<int:zoom>/<int:x>/<int:y>', methods=["GET"])
+def place_clusters(zoom, x, y):
+    """ returns the clusters of places of a web map tile """
+
+    if zoom > place_tiles.max_zoom:
+        abort(400, f"Zoom can't be more than {place_tiles.max_zoom}")
+    if x >= 2 ** zoom or y >= 2 ** zoom:
+        abort(400, f"Tile {x}, {y} does not exist at zoom {zoom}")
+
+    clusters = []
+    fields = field_args()
+    for count, latitude, longitude in place_tiles.clusters(zoom, x, y):
+        clusters.append(selected(fields, {
+            "count": count,
+            "latitude": latitude,
+            "longitude": longitude
+        }))
+
+    return pretty_json({"zoom": zoom, "x": x, "y": y, "clusters": clusters}), 200
 
 
 @place_api.route('/places/<place_id>', methods=["GET"])
 def place_info(place_id):
     """get sepecific info of a place"""
-    for place_value in place_data.values():
-        if place_value["id"] == place_id:
-            found_place = place_value
-            break
-    else:
+    found_place = place_repository.get(place_id)
+    if found_place is None:
         abort(404, f"Place: {place_id} not found")
 
-    place_info = {
-        "id": found_place["id"],
-        "host_user_id": found_place["host_user_id"],
-        "city_id": found_place["city_id"],
-        "name": found_place["name"],
-        "description": found_place["description"],
-        "address": found_place["address"],
-        "latitude": found_place["latitude"],
-        "longitude": found_place["longitude"],
-        "number_of_rooms": found_place["number_of_rooms"],
-        "bathrooms": found_place["bathrooms"],
-        "price_per_night": found_place["price_per_night"],
-        "max_guests": found_place["max_guests"],
-        "created_at": datetime.fromtimestamp(found_place["created_at"]).isoformat(),
-        "updated_at": datetime.fromtimestamp(found_place["updated_at"]).isoformat()
-    }
+    place_info = place_attribs(found_place, fields=field_args())
 
     return pretty_json(place_info), 200
 
 
+@place_api.route('/places/<place_id>/rating', methods=["GET"])
+def place_rating(place_id):
+    """ returns the review totals of a place """
+    if not place_repository.exists(place_id):
+        abort(404, f"Place: {place_id} not found")
+
+    rating = review_aggregates.place(place_id)
+    rating["place_id"] = place_id
+
+    return pretty_json(selected(field_args(), rating)), 200
+
+
 @place_api.route('/places', methods=["POST"])
 def create_place_info():
     """create a new place"""
@@ -138,25 +480,23 @@ def create_place_info():
     except ValueError as exc:
         abort(400, repr(exc))
 
-    place_data[new_place.id] = {
-        "id": new_place.id,
-        "host_user_id": new_place.host_user_id,
-        "city_id": new_place.city_id,
-        "name": new_place.name,
-        "description": new_place.description,
-        "address": new_place.address,
-        "latitude": new_place.latitude,
-        "longitude": new_place.longitude,
-        "number_of_rooms": new_place.number_of_rooms,
-        "bathrooms": new_place.bathrooms,
-        "price_per_night": new_place.price_per_night,
-        "max_guests": new_place.max_guests,
-        "created_at": new_place.created_at,
-        "updated_at": new_place.updated_at
-    }
-
     try:
-        FileStorage.save_model_data("place_data.json", place_data)
+        place_repository.put({
+            "id": new_place.id,
+            "host_user_id": new_place.host_user_id,
+            "city_id": new_place.city_id,
+            "name": new_place.name,
+            "description": new_place.description,
+            "address": new_place.address,
+            "latitude": new_place.latitude,
+            "longitude": new_place.longitude,
+            "number_of_rooms": new_place.number_of_rooms,
+            "bathrooms": new_place.bathrooms,
+            "price_per_night": new_place.price_per_night,
+            "max_guests": new_place.max_guests,
+            "created_at": new_place.created_at,
+            "updated_at": new_place.updated_at
+        })
     except Exception as e:
         abort(500, f"Failed to save data: {str(e)}")
 
@@ -188,11 +528,8 @@ def update_place_info(place_id):
 
     new_data = request.get_json()
 
-    for place_value in place_data.values():
-        if place_value["id"] == place_id:
-            found_place_data = place_value
-            break
-    else:
+    found_place_data = place_repository.get(place_id)
+    if found_place_data is None:
         abort(404, f"Place ID not found: {place_id}")
 
     # List of fields that can be updated
@@ -205,7 +542,7 @@ def update_place_info(place_id):
             found_place_data[field] = new_data[field]
 
     try:
-        FileStorage.save_model_data("place_data.json", place_data)
+        place_repository.put(found_place_data)
     except Exception as e:
         abort(500, f"Failed to save data: {str(e)}")
 
@@ -233,22 +570,12 @@ def update_place_info(place_id):
 def delete_place_info(place_id):
     """delete a place"""
 
-    # Create a list of keys in place_data
-    keys_to_delete = []
-
-    for place_key, place_value in list(place_data.items()):
-        if place_value["id"] == place_id:
-            keys_to_delete.append(place_key)
-
-    if not keys_to_delete:
+    if not place_repository.exists(place_id):
         abort(404, f"Place not found with ID: {place_id}")
 
-    # Remove the place(s) from the dictionary
-    for place_key in keys_to_delete:
-        del place_data[place_key]
-
     try:
-        FileStorage.save_model_data("place_data.json", place_data)
+        place_repository.delete(place_id)
+        place_amenity_links.detach_place(place_id)
     except Exception as e:
         abort(500, f"Failed to save data: {str(e)}")
 
@@ -12,45 +12,76 @@ from models.city import City
 from models.amenity import Amenity
 
 # Import data
-from data import FileStorage
+from data import review_repository, place_repository, user_repository, review_by_place, review_by_user
+from data import review_by_created_at
 from data import (
     country_data, place_data, amenity_data,
     place_to_amenity_data, review_data, user_data, city_data
 )
 
 # Import utility function
-from utils import pretty_json
+from utils import pretty_json, page_args, paged_json, field_args, projection
 
 review_api = Blueprint('review_api', __name__)
 
 
+def review_attribs(review_value, fields=None):
+    """Returns the attributes of a review as they are shown, only those in
+    fields if it isn't None"""
+    return projection(fields, {
+        "id": lambda: review_value["id"],
+        "commentor_user_id": lambda: review_value["commentor_user_id"],
+        "place_id": lambda: review_value["place_id"],
+        "feedback": lambda: review_value["feedback"],
+        "rating": lambda: review_value["rating"],
+        "created_at": lambda: datetime.fromtimestamp(review_value["created_at"]).isoformat(),
+        "updated_at": lambda: datetime.fromtimestamp(review_value["updated_at"]).isoformat()
+    })
+
+
+def reviewer_name(user_id):
+    """Returns the full name of the user who wrote a review"""
+    commentor = user_repository.get(user_id)
+    return f"{commentor['first_name']} {commentor['last_name']}"
+
+
+def review_entry(review_value, fields=None):
+    """Returns a review as it is shown in the lists of reviews grouped by
+    place, only the attributes in fields if it isn't None"""
+    return projection(fields, {
+        "review": lambda: review_value["feedback"],
+        "rating": lambda: f"{review_value['rating']} / 5",
+        "reviewer": lambda: reviewer_name(review_value["commentor_user_id"]),
+        "created_at": lambda: datetime.fromtimestamp(review_value["created_at"]).isoformat(),
+        "updated_at": lambda: datetime.fromtimestamp(review_value["updated_at"]).isoformat()
+    })
+
+
 @review_api.route('/reviews', methods=["GET"])
 def reviews_get():
     """return all reviews"""
     reviewer_data = {}
 
-    for review_value in review_data.values():
+    review_values, next_position = review_repository.all(), None
+    page = page_args()
+    if page:
+        review_ids, next_position = review_by_created_at.page(*page)
+        review_values = review_repository.get_many(review_ids)
+
+    fields = field_args()
+    for review_value in review_values:
         review_place_id = review_value["place_id"]
-        place_name = place_data[review_place_id]["name"]
-        commentor_id = review_value["commentor_user_id"]
-        reviewer_first_name = user_data[commentor_id]["first_name"]
-        reviewer_last_name = user_data[commentor_id]["last_name"]
+        place_name = place_repository.get(review_place_id)["name"]
 
         if place_name not in reviewer_data:
             reviewer_data[place_name] = []
 
-        reviewer_data[place_name].append({
-            "review": review_value["feedback"],
-            "rating": f"{review_value['rating']} / 5",
-            "reviewer": f"{reviewer_first_name} {reviewer_last_name}",
-            "created_at": datetime.fromtimestamp(review_value['created_at']).isoformat(),
-            "updated_at": datetime.fromtimestamp(review_value['updated_at']).isoformat()
-        })
+        reviewer_data[place_name].append(review_entry(review_value, fields))
 
-    if not review_data:
+    if not review_repository.count():
         abort(404, "No Reviews available")
 
-    return pretty_json(reviewer_data), 200
+    return paged_json(reviewer_data, next_position), 200
 
 
 @review_api.route('/places/<place_id>/reviews', methods=['GET'])
@@ -59,25 +90,16 @@ def reviews_specific_get(place_id):
 
     reviewer_data = {}
 
-    # Iterate through review_data to find reviews matching place_id
-    for review_value in review_data.values():
-        if review_value["place_id"] == place_id:
-            review_place_id = review_value["place_id"]
-            place_name = place_data[review_place_id]["name"]
-            commentor_id = review_value["commentor_user_id"]
-            reviewer_first_name = user_data[commentor_id]["first_name"]
-            reviewer_last_name = user_data[commentor_id]["last_name"]
-
-            if place_name not in reviewer_data:
-                reviewer_data[place_name] = []
-
-            reviewer_data[place_name].append({
-                "review": review_value["feedback"],
-                "rating": f"{review_value['rating']} / 5",
-                "reviewer": f"{reviewer_first_name} {reviewer_last_name}",
-                "created_at": datetime.fromtimestamp(review_value['created_at']).isoformat(),
-                "updated_at": datetime.fromtimestamp(review_value['updated_at']).isoformat()
-            })
+    # Only the reviews of place_id, found through the index
+    fields = field_args()
+    for review_value in review_repository.get_many(review_by_place.lookup(place_id)):
+        review_place_id = review_value["place_id"]
+        place_name = place_repository.get(review_place_id)["name"]
+
+        if place_name not in reviewer_data:
+            reviewer_data[place_name] = []
+
+        reviewer_data[place_name].append(review_entry(review_value, fields))
 
     if not reviewer_data:
         abort(404, f"No reviews found for place with ID: {place_id}")
@@ -91,33 +113,27 @@ def get_specific_review_from_user(user_id):
 
     reviewer_data = {}
 
-    for review_value in review_data.values():
-        if review_value["commentor_user_id"] != user_id:
-            continue
-
-        try:
-            place_id = review_value["place_id"]
-            place_name = place_data[place_id]["name"]
-            reviewer_first_name = user_data[user_id]["first_name"]
-            reviewer_last_name = user_data[user_id]["last_name"]
-
-        except KeyError:
+    fields = field_args()
+    for review_value in review_repository.get_many(review_by_user.lookup(user_id)):
+        place_id = review_value["place_id"]
+        place = place_repository.get(place_id)
+        user = user_repository.get(user_id)
+        if place is None or user is None:
             # Skip this review if any required data is missing
             continue
 
+        place_name = place["name"]
+
         if place_name not in reviewer_data:
             reviewer_data[place_name] = []
 
-        reviewer_data[place_name].append({
-            "review_id": review_value["id"],
-            "place_id": place_id,
-            "place_name": place_name,
-            "review": review_value["feedback"],
-            "rating": f"{review_value['rating']} / 5",
-            "reviewer": f"{reviewer_first_name} {reviewer_last_name}",
-            "created_at": datetime.fromtimestamp(review_value['created_at']).isoformat(),
-            "updated_at": datetime.fromtimestamp(review_value['updated_at']).isoformat()
+        entry = projection(fields, {
+            "review_id": lambda: review_value["id"],
+            "place_id": lambda: place_id,
+            "place_name": lambda: place_name
         })
+        entry.update(review_entry(review_value, fields))
+        reviewer_data[place_name].append(entry)
 
     if not reviewer_data:
         abort(404, f"No reviews found for user with ID: {user_id}")
@@ -131,22 +147,11 @@ def get_specific_review(review_id):
 
     review_info = []
 
-    for review_value in review_data.values():
-        if review_value["id"] == review_id:
-            data = review_value
-
-    if data["id"] != review_id:
+    data = review_repository.get(review_id)
+    if data is None:
         abort(400, f"Review: {review_id} not found")
 
-    review_infos = {
-        "id": data["id"],
-        "commentor_user_id": data["commentor_user_id"],
-        "place_id": data["place_id"],
-        "feedback": data["feedback"],
-        "rating": data["rating"],
-        "created_at": datetime.fromtimestamp(data['created_at']).isoformat(),
-        "updated_at": datetime.fromtimestamp(data['updated_at']).isoformat()
-    }
+    review_infos = review_attribs(data, field_args())
     review_info.append(review_infos)
 
     return pretty_json(review_info), 200
@@ -179,18 +184,16 @@ def create_new_review(place_id):
     except ValueError as exc:
         abort(400, repr(exc))
 
-    review_data[new_review.id] = {
-        "id": new_review.id,
-        "commentor_user_id": new_review.commentor_user_id,
-        "place_id": new_review.place_id,
-        "feedback": new_review.feedback,
-        "rating": new_review.rating,
-        "created_at": new_review.created_at,
-        "updated_at": new_review.updated_at
-    }
-
     try:
-        FileStorage.save_model_data("review_data.json", review_data)
+        review_repository.put({
+            "id": new_review.id,
+            "commentor_user_id": new_review.commentor_user_id,
+            "place_id": new_review.place_id,
+            "feedback": new_review.feedback,
+            "rating": new_review.rating,
+            "created_at": new_review.created_at,
+            "updated_at": new_review.updated_at
+        })
     except Exception as e:
         abort(500, f"Failed to save data: {str(e)}")
 
@@ -216,12 +219,10 @@ def update_review(place_id):
 
     new_data = request.get_json()
 
-    for review_value in review_data.values():
-        if review_value["place_id"] == place_id:
-            found_review_data = review_value
-            break
-    else:
+    found_review_id = review_by_place.lookup_one(place_id)
+    if found_review_id is None:
         abort(404, f"Review for the place: {place_id} is not found")
+    found_review_data = review_repository.get(found_review_id)
 
     # only feedback and rating are allowed to be modified
     if "feedback" in new_data:
@@ -230,7 +231,7 @@ def update_review(place_id):
         found_review_data["rating"] = new_data["rating"]
 
     try:
-        FileStorage.save_model_data("review_data.json", review_data)
+        review_repository.put(found_review_data)
     except Exception as e:
         abort(500, f"Failed to save data: {str(e)}")
 
@@ -251,21 +252,11 @@ def update_review(place_id):
 def delete_review(review_id):
     """delete a review of a place"""
 
-    keys_to_delete = []
-
-    for review_key, review_value in list(review_data.items()):
-        if review_value["id"] == review_id:
-            keys_to_delete.append(review_key)
-
-    if not keys_to_delete:
+    if not review_repository.exists(review_id):
         abort(404, f"Place not found with ID: {review_id}")
 
-    # Remove the place(s) from the dictionary
-    for review_key in keys_to_delete:
-        del review_data[review_key]
-
     try:
-        FileStorage.save_model_data("review_data.json", review_data)
+        review_repository.delete(review_id)
     except Exception as e:
         abort(500, f"Failed to save data: {str(e)}")
 
@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+
+from flask import Blueprint, request, abort
+
+# Import data
+from data import place_repository, review_repository, place_text, review_text
+from data import city_repository, country_repository, city_names, country_names
+
+# Import utility function
+from utils import pretty_json, int_arg
+from api.place_api import place_attribs
+from api.review_api import review_attribs
+
+search_api = Blueprint('search_api', __name__)
+
+
+def search_page(text_index, repository, attribs, query, page, per_page):
+    """ Returns one page of the rows matching query, best match first """
+
+    results = text_index.search(query)
+    start = (page - 1) * per_page
+
+    rows_info = []
+    for row_id, score in results[start:start + per_page]:
+        row = repository.get(row_id)
+        if row is None:
+            continue
+        row_info = attribs(row)
+        row_info["score"] = round(score, 4)
+        rows_info.append(row_info)
+
+    return {"total": len(results), "results": rows_info}
+
+
+@search_api.route('/search', methods=["GET"])
+def search():
+    """ returns the places and reviews matching ?q=, best match first """
+
+    query = request.args.get("q", "").strip()
+    if not query:
+        abort(400, "Missing parameter: q")
+
+    search_type = request.args.get("type")
+    if search_type not in (None, "places", "reviews"):
+        abort(400, f"Invalid type: {search_type}")
+
+    page = int_arg("page", 1, 1, 1000000)
+    per_page = int_arg("per_page", 10, 1, 100)
+
+    output = {"query": query, "page": page, "per_page": per_page}
+    if search_type in (None, "places"):
+        output["places"] = search_page(
+            place_text, place_repository, place_attribs, query, page, per_page)
+    if search_type in (None, "reviews"):
+        output["reviews"] = search_page(
+            review_text, review_repository, review_attribs, query, page, per_page)
+
+    return pretty_json(output), 200
+
+
+@search_api.route('/autocomplete', methods=["GET"])
+def autocomplete():
+    """ returns the cities and countries whose name starts with ?q= """
+
+    prefix = request.args.get("q", "").strip()
+    if not prefix:
+        abort(400, "Missing parameter: q")
+    limit = int_arg("limit", 10, 1, 100)
+
+    matches = []
+    for city_value in city_repository.get_many(city_names.complete(prefix, limit)):
+        country_value = country_repository.get(city_value["country_id"])
+        matches.append({
+            "type": "city",
+            "id": city_value["id"],
+            "name": city_value["name"],
+            "country_code": country_value["code"] if country_value else None
+        })
+    for country_value in country_repository.get_many(country_names.complete(prefix, limit)):
+        matches.append({
+            "type": "country",
+            "id": country_value["id"],
+            "name": country_value["name"],
+            "country_code": country_value["code"]
+        })
+
+    matches.sort(key=lambda match: match["name"].lower())
+    return pretty_json(matches[:limit]), 200
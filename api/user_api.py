@@ -12,62 +12,77 @@ from models.city import City
 from models.amenity import Amenity
 
 # Import data
-from data import FileStorage
+from data import user_repository, user_by_email, review_aggregates, user_by_created_at
 from data import (
     country_data, place_data, amenity_data,
     place_to_amenity_data, review_data, user_data, city_data
 )
 
 # Import utility function
-from utils import pretty_json
+from utils import pretty_json, page_args, paged_json, field_args, projection, selected
 
 # Define the blueprint for user_api
 user_api = Blueprint('user_api', __name__)
 
 
+def user_attribs(user_value, fields=None):
+    """Returns the attributes of a user as they are shown, only those in
+    fields if it isn't None"""
+    return projection(fields, {
+        "id": lambda: user_value["id"],
+        "first_name": lambda: user_value["first_name"],
+        "last_name": lambda: user_value["last_name"],
+        "email": lambda: user_value["email"],
+        "password": lambda: user_value["password"],
+        "created_at": lambda: datetime.fromtimestamp(user_value["created_at"]).isoformat(),
+        "updated_at": lambda: datetime.fromtimestamp(user_value["updated_at"]).isoformat()
+    })
+
+
 @user_api.route('/users', methods=["GET"])
 def users_get():
     """return all Users"""
     users_info = []
 
-    for user_value in user_data.values():
-        users_info.append({
-            "id": user_value["id"],
-            "first_name": user_value['first_name'],
-            "last_name": user_value['last_name'],
-            "email": user_value['email'],
-            "password": user_value['password'],
-            "created_at": datetime.fromtimestamp(user_value['created_at']).isoformat(),
-            "updated_at": datetime.fromtimestamp(user_value['updated_at']).isoformat()
-        })
+    user_values, next_position = user_repository.all(), None
+    page = page_args()
+    if page:
+        user_ids, next_position = user_by_created_at.page(*page)
+        user_values = user_repository.get_many(user_ids)
 
-    return pretty_json(users_info), 200
+    fields = field_args()
+    for user_value in user_values:
+        users_info.append(user_attribs(user_value, fields))
+
+    return paged_json(users_info, next_position), 200
 
 
 @user_api.route('/users/<user_id>', methods=["GET"])
 def users_specific_get(user_id):
     """returns specified user"""
 
-    for user_value in user_data.values():
-        if user_value["id"] == user_id:
-            data = user_value
-            break
-    else:
+    data = user_repository.get(user_id)
+    if data is None:
         abort(404, f"User: {user_id} not found")
 
-    user_info = {
-        "id": data["id"],
-        "first_name": data["first_name"],
-        "last_name": data["last_name"],
-        "email": data["email"],
-        "password": data["password"],
-        "created_at": datetime.fromtimestamp(data["created_at"]).isoformat(),
-        "updated_at": datetime.fromtimestamp(data["updated_at"]).isoformat()
-    }
+    user_info = user_attribs(data, field_args())
 
     return pretty_json(user_info), 200
 
 
+@user_api.route('/users/<user_id>/rating', methods=["GET"])
+def user_host_rating(user_id):
+    """ returns the review totals of all the places of a host """
+
+    if not user_repository.exists(user_id):
+        abort(404, f"User: {user_id} not found")
+
+    rating = review_aggregates.host(user_id)
+    rating["user_id"] = user_id
+
+    return pretty_json(selected(field_args(), rating)), 200
+
+
 @user_api.route('/users', methods=["POST"])
 def create_new_user():
     """create a new user"""
@@ -94,18 +109,19 @@ def create_new_user():
     except ValueError as exc:
         abort(400, repr(exc))
 
-    user_data[new_user.id] = {
-        "id": new_user.id,
-        "first_name": new_user.first_name,
-        "last_name": new_user.last_name,
-        "email": new_user.email,
-        "password": new_user.password,
-        "created_at": new_user.created_at,
-        "updated_at": new_user.updated_at
-    }
+    if user_by_email.lookup(new_user.email):
+        abort(409, f"User with email {new_user.email} already exists")
 
     try:
-        FileStorage.save_model_data("user_data.json", user_data)
+        user_repository.put({
+            "id": new_user.id,
+            "first_name": new_user.first_name,
+            "last_name": new_user.last_name,
+            "email": new_user.email,
+            "password": new_user.password,
+            "created_at": new_user.created_at,
+            "updated_at": new_user.updated_at
+        })
     except Exception as e:
         abort(500, f"Failed to save data: {str(e)}")
 
@@ -133,12 +149,8 @@ def update_user(user_id):
     # Get JSON data from request
     new_data = request.get_json()
 
-    for user_value in user_data.values():
-        # for user_value in user_data.get("User", []):
-        if user_value["id"] == user_id:
-            found_user_data = user_value
-            break
-    else:
+    found_user_data = user_repository.get(user_id)
+    if found_user_data is None:
         abort(404, f"User ID not found: {user_id}")
 
     # Update user's first_name and last_name if provided in JSON data
@@ -148,7 +160,7 @@ def update_user(user_id):
         found_user_data["last_name"] = new_data["last_name"]
 
     try:
-        FileStorage.save_model_data("user_data.json", user_data)
+        user_repository.put(found_user_data)
     except Exception as e:
         abort(500, f"Failed to save data: {str(e)}")
 
@@ -169,20 +181,11 @@ def update_user(user_id):
 def delete_user(user_id):
     """Deletes an existing user by user_id"""
 
-    keys_to_delete = []
-
-    for user_key, user_value in list(user_data.items()):
-        if user_value["id"] == user_id:
-            keys_to_delete.append(user_key)
-
-    if not keys_to_delete:
+    if not user_repository.exists(user_id):
         abort(404, f"User not found with ID: {user_id}")
 
-    for user_key in keys_to_delete:
-        del user_data[user_key]
-
     try:
-        FileStorage.save_model_data("user_data.json", user_data)
+        user_repository.delete(user_id)
     except Exception as e:
         abort(500, f"Failed to save data: {str(e)}")
 
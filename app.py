@@ -18,8 +18,10 @@ from api.city_api import city_api
 from api.amenity_api import amenity_api
 from api.place_api import place_api
 from api.review_api import review_api
+from api.search_api import search_api
 
 # Import data
+from data import storage
 from data import (
     country_data, place_data, amenity_data,
     place_to_amenity_data, review_data, user_data, city_data
@@ -36,6 +38,13 @@ app.register_blueprint(city_api, url_prefix='/api/v1')
 app.register_blueprint(amenity_api, url_prefix='/api/v1')
 app.register_blueprint(place_api, url_prefix='/api/v1')
 app.register_blueprint(review_api, url_prefix='/api/v1')
+app.register_blueprint(search_api, url_prefix='/api/v1')
+
+
+@app.before_request
+def sync_storage():
+    """ Pick up the changes saved by the other gunicorn workers """
+    storage.sync()
 
 
 @app.route('/')
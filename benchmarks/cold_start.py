@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+""" Benchmark of the time and memory it takes to load a large place data
+    file, with and without the binary snapshot cache """
+
+# command to use: python3 -m benchmarks.cold_start [number of places]
+
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+import uuid
+from data.file_storage import FileStorage
+
+
+def make_places(filename, count):
+    """ Write a synthetic place data file with count places """
+
+    places = []
+    for i in range(count):
+        places.append({
+            "id": str(uuid.uuid4()),
+            "host_user_id": str(uuid.uuid4()),
+            "city_id": str(uuid.uuid4()),
+            "name": "Place number {}".format(i),
+            "description": "A decent place to stay",
+            "address": "{} Some Street".format(i),
+            "latitude": -37.814666 + i / count,
+            "longitude": 145.230620 - i / count,
+            "number_of_rooms": i % 7 + 1,
+            "bathrooms": i % 3 + 1,
+            "price_per_night": float(i % 500),
+            "max_guests": i % 9 + 1,
+            "created_at": 1715566897.190475 + i,
+            "updated_at": 1715566897.190475 + i
+        })
+
+    with open(filename, 'w') as f:
+        json.dump({"Place": places}, f)
+
+
+def load(filename, cache, results):
+    """ Load filename, with FileStorage unless cache is None, and put the
+        seconds it took and the peak RSS in MB in results """
+
+    start = time.perf_counter()
+    if cache is None:
+        with open(filename, 'r') as f:
+            json.load(f)
+    else:
+        FileStorage(cache=cache).load_model_data(filename)
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in KB on Linux
+    results.put((seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def measure_load(filename, cache=True):
+    """ Returns the seconds and the peak RSS in MB taken by a new process
+        to load filename, with json.load() if cache is None """
+
+    # a new process each time, since the peak RSS of a process only goes up
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=load, args=(filename, cache, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "place.json")
+        make_places(filename, count)
+        print("{} places, {:.1f} MB of JSON".format(
+            count, os.path.getsize(filename) / 1024 / 1024))
+
+        for label, cache in (("json.load():            ", None),
+                             ("JSON parse, no cache:    ", False),
+                             # the first load parses the JSON and writes the cache
+                             ("JSON parse, cache write: ", True),
+                             ("cache load:              ", True)):
+            print("{}{:.3f}s, peak RSS {:.0f} MB".format(label, *measure_load(filename, cache)))
@@ -2,20 +2,167 @@
 """ initialize the storage used by models """
 
 import os
+from data.amenity_bitmaps import AmenityBitmaps
 from data.file_storage import FileStorage
+from data.file_watcher import FileWatcher
+from data.geo_index import GeoIndex
+from data.lazy_model_data import LazyModelData
+from data.link_store import LinkStore
+from data.model_index import ModelIndex
+from data.place_rankings import PlaceRankings
+from data.prefix_index import PrefixIndex
+from data.rating_index import RatingIndex
+from data.repository import Repository
+from data.review_aggregates import ReviewAggregates
+from data.sorted_index import SortedIndex
+from data.text_index import TextIndex
+from data.tile_grid import TileGrid
+from data.remote_storage import RemoteStorage
+from data.sqlite_storage import SQLiteStorage
 
-storage = FileStorage()
+# check for STORAGE_MODE=journal from command line to append changes to
+# a log next to each data file instead of rewriting the whole file, or
+# STORAGE_MODE=writebehind to rewrite changed files in the background, or
+# STORAGE_MODE=durable to journal changes and fsync them before replying, or
+# STORAGE_MODE=shared to journal changes when running several gunicorn workers
+#
+# check for STORAGE_BACKEND=sqlite to keep the data in the SQLite database
+# at DATABASE (data/hbnb.db by default) instead. The JSON files are imported
+# into the database the first time they are loaded.
+#
+# check for STORAGE_BACKEND=server to use the data held by the data server
+# listening on DATA_SERVER_SOCKET (data/hbnb.sock by default) instead of
+# loading a copy of it in every gunicorn worker. See data/data_server.py
+if os.environ.get('STORAGE_BACKEND') == 'sqlite':
+    storage = SQLiteStorage(os.environ.get('DATABASE', 'data/hbnb.db'))
+elif os.environ.get('STORAGE_BACKEND') == 'server':
+    storage = RemoteStorage(os.environ.get('DATA_SERVER_SOCKET', 'data/hbnb.sock'))
+else:
+    storage = FileStorage(mode=os.environ.get('STORAGE_MODE', 'file'))
 
 # check for TESTING=1 from command line
 # command to use: TESTING=1 python3 -m unittest discover
 is_testing = "TESTING" in os.environ and os.environ['TESTING'] == "1"
 
-country_data = storage.load_model_data('data/country_testing.json') if is_testing \
-    else storage.load_model_data('data/country.json')
+country_file = 'data/country_testing.json' if is_testing else 'data/country.json'
+city_file = 'data/city.json'
+amenity_file = 'data/amenity.json'
+place_file = 'data/place.json'
+user_file = 'data/user.json'
+review_file = 'data/review.json'
+place_to_amenity_file = 'data/place_to_amenity.json'
 
-city_data = storage.load_model_data('data/city.json')
-amenity_data = storage.load_model_data('data/amenity.json')
-place_data = storage.load_model_data('data/place.json')
-user_data = storage.load_model_data('data/user.json')
-review_data = storage.load_model_data('data/review.json')
-place_to_amenity_data = storage.load_many_to_many_data('data/place_to_amenity.json')
+# The data of each model is only loaded the first time it is used, so a
+# process that never touches reviews never pays for loading them
+country_data = LazyModelData(lambda: storage.load_model_data(country_file))
+city_data = LazyModelData(lambda: storage.load_model_data(city_file))
+amenity_data = LazyModelData(lambda: storage.load_model_data(amenity_file))
+place_data = LazyModelData(lambda: storage.load_model_data(place_file))
+user_data = LazyModelData(lambda: storage.load_model_data(user_file))
+review_data = LazyModelData(lambda: storage.load_model_data(review_file))
+place_to_amenity_data = LazyModelData(
+    lambda: storage.load_many_to_many_data(place_to_amenity_file))
+
+# The blueprints get and save rows by id through these
+country_repository = Repository(storage, country_file, country_data)
+city_repository = Repository(storage, city_file, city_data)
+amenity_repository = Repository(storage, amenity_file, amenity_data)
+place_repository = Repository(storage, place_file, place_data)
+user_repository = Repository(storage, user_file, user_data)
+review_repository = Repository(storage, review_file, review_data)
+
+# Indexes of the rows by the fields they are looked up by. They are built
+# the first time they are used and kept up to date on every change.
+# The SQLite database and the data server are also changed by the other
+# workers, so there the indexes can't be kept in this process. Lookups by
+# value (ModelIndex and LinkStore), pages and ranges of rows sorted by a
+# field (SortedIndex), rows by id (Repository.get_many), map searches
+# (GeoIndex, TileGrid), text searches (TextIndex) and autocompletion
+# (PrefixIndex) are then asked of the storage instead, which answers them
+# with a database index or one kept by the data server. So are the review
+# totals of the places shown (ReviewAggregates), counted for those places
+# only. Everything else below is built again from every row on each use,
+# so it costs O(number of rows) per request with those backends: sorting by
+# rating (RatingIndex), top places (PlaceRankings) and amenity searches
+# (AmenityBitmaps).
+cache_indexes = storage.mode not in ("sqlite", "remote")
+country_by_code = ModelIndex(country_data, "code", cache_indexes)
+city_by_country = ModelIndex(city_data, "country_id", cache_indexes)
+place_by_city = ModelIndex(place_data, "city_id", cache_indexes)
+place_by_host = ModelIndex(place_data, "host_user_id", cache_indexes)
+review_by_place = ModelIndex(review_data, "place_id", cache_indexes)
+review_by_user = ModelIndex(review_data, "commentor_user_id", cache_indexes)
+user_by_email = ModelIndex(user_data, "email", cache_indexes)
+amenity_by_name = ModelIndex(amenity_data, "name", cache_indexes)
+
+# The rows of every model in the order they were created, for paging
+country_by_created_at = SortedIndex(country_data, "created_at", cache_indexes)
+city_by_created_at = SortedIndex(city_data, "created_at", cache_indexes)
+amenity_by_created_at = SortedIndex(amenity_data, "created_at", cache_indexes)
+place_by_created_at = SortedIndex(place_data, "created_at", cache_indexes)
+user_by_created_at = SortedIndex(user_data, "created_at", cache_indexes)
+review_by_created_at = SortedIndex(review_data, "created_at", cache_indexes)
+
+# The places sorted by each number they can be searched by
+place_by_price = SortedIndex(place_data, "price_per_night", cache_indexes)
+place_by_max_guests = SortedIndex(place_data, "max_guests", cache_indexes)
+place_by_rooms = SortedIndex(place_data, "number_of_rooms", cache_indexes)
+place_by_bathrooms = SortedIndex(place_data, "bathrooms", cache_indexes)
+
+# The places by where they are, for map searches
+place_by_location = GeoIndex(place_data, cached=cache_indexes)
+place_tiles = TileGrid(place_data, cached=cache_indexes)
+
+# The words of the places and reviews, for text searches
+place_text = TextIndex(place_data, ["name", "description", "address"], cache_indexes)
+review_text = TextIndex(review_data, ["feedback"], cache_indexes)
+
+# The cities and countries by name, for autocompletion
+city_names = PrefixIndex(city_data, "name", cache_indexes)
+country_names = PrefixIndex(country_data, "name", cache_indexes)
+
+# The number of reviews and ratings of each place and host
+review_aggregates = ReviewAggregates(review_data, place_data, cache_indexes)
+# The places of each city by price and by rating, for the top places
+place_rankings = PlaceRankings(place_data, review_aggregates, cache_indexes)
+# The places by rating, for sorting them
+place_by_rating = RatingIndex(place_data, review_aggregates, cache_indexes)
+
+# The amenities of each place and the places of each amenity
+place_amenity_links = LinkStore(
+    storage, place_to_amenity_file, place_to_amenity_data, cache_indexes)
+# Bitmaps of the places that have each amenity, for amenity searches
+amenity_bitmaps = AmenityBitmaps(place_data, place_to_amenity_data, cache_indexes)
+
+# apply the changes saved by the other workers before every request
+if storage.mode == "shared":
+    storage.share(country_file, country_data)
+    storage.share(city_file, city_data)
+    storage.share(amenity_file, amenity_data)
+    storage.share(place_file, place_data)
+    storage.share(user_file, user_data)
+    storage.share(review_file, review_data)
+    storage.share(place_to_amenity_file, place_to_amenity_data)
+
+# fold the journals into their data files in the background so that they
+# don't grow forever. Use COMPACTION_INTERVAL=<seconds> to change how often.
+if storage.mode in ("journal", "durable", "shared"):
+    storage.start_compaction(interval=float(os.environ.get('COMPACTION_INTERVAL', 60)))
+
+# write the changed data files in the background at most once every
+# FLUSH_INTERVAL seconds, and once more on shutdown
+if storage.mode == "writebehind":
+    storage.start_write_behind(interval=float(os.environ.get('FLUSH_INTERVAL', 1)))
+
+# check for RELOAD_INTERVAL=<seconds> to pick up data files that were changed
+# on disk without restarting the server
+if 'RELOAD_INTERVAL' in os.environ and storage.mode not in ("sqlite", "remote"):
+    watcher = FileWatcher(storage)
+    watcher.watch(country_file, country_data)
+    watcher.watch(city_file, city_data)
+    watcher.watch(amenity_file, amenity_data)
+    watcher.watch(place_file, place_data)
+    watcher.watch(user_file, user_data)
+    watcher.watch(review_file, review_data)
+    watcher.watch(place_to_amenity_file, place_to_amenity_data, loader="load_many_to_many_data")
+    watcher.start(interval=float(os.environ['RELOAD_INTERVAL']))
@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+"""This module defines the bitmaps of the places that have each amenity"""
+
+from data.file_storage import FileStorage
+from data.lazy_index import LazyIndex
+
+# the positions of the bits set in each byte value
+BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+def bits_of(ordinals, size):
+    """ Returns the int with the bits of ordinals (all below size) set.
+        Setting them one by one on an int would copy it every time """
+
+    buffer = bytearray((size + 7) // 8)
+    for ordinal in ordinals:
+        buffer[ordinal >> 3] |= 1 << (ordinal & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def ordinals_of(bits):
+    """ Returns the positions of the bits set in bits, lowest first, going
+        through its bytes once and skipping the empty ones """
+
+    ordinals = []
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for index, byte in enumerate(data):
+        if byte:
+            base = index * 8
+            ordinals.extend(base + bit for bit in BYTE_BITS[byte])
+    return ordinals
+
+
+class AmenityBitmaps(LazyIndex):
+    """ Every place gets an ordinal and every amenity a bitmap (a Python
+        int) with the bit of each place that has it set, so that amenity
+        searches are a few AND, OR and NOT operations on ints """
+
+    def __init__(self, place_data, link_data, cached=True):
+        """ constructor. link_data holds the place to amenity link rows """
+        self.place_data = place_data
+        self.link_data = link_data
+        # place id => ordinal, and ordinal => place id. Ordinals are not
+        # reused, the bit of a deleted place is just cleared everywhere
+        self.__ordinals = {}
+        self.__place_ids = []
+        # bits of all the places that exist
+        self.__all = 0
+        # amenity id => bits of the places that have it
+        self.__bitmaps = {}
+        super().__init__(place_data, cached)
+
+        link_data.add_listener(self.refresh_link)
+
+    def entry(self, key, row):
+        """ Every place is indexed """
+        return True
+
+    def build(self):
+        """ Set the bits of every place and link. Call with the lock held """
+
+        self.__ordinals = {}
+        self.__place_ids = []
+        self.indexed = dict.fromkeys(list(self.place_data), True)
+        place_ordinals = [self.ordinal(place_id) for place_id in self.indexed]
+
+        # amenity id => ordinals of the places that have it
+        amenity_ordinals = {}
+        for row in list(self.link_data.values()):
+            amenity_ordinals.setdefault(row["amenity_id"], []).append(
+                self.ordinal(row["place_id"]))
+
+        size = len(self.__place_ids)
+        self.__all = bits_of(place_ordinals, size)
+        self.__bitmaps = dict((amenity_id, bits_of(ordinals, size))
+                              for amenity_id, ordinals in amenity_ordinals.items())
+
+    def ordinal(self, place_id):
+        """ Returns the ordinal of a place, giving it one if it has none.
+            Call with the lock held """
+
+        if place_id not in self.__ordinals:
+            self.__ordinals[place_id] = len(self.__place_ids)
+            self.__place_ids.append(place_id)
+        return self.__ordinals[place_id]
+
+    def set_bit(self, place_id, amenity_id, value):
+        """ Set or clear the bit of a place in the bitmap of an amenity.
+            Call with the lock held """
+
+        bit = 1 << self.ordinal(place_id)
+        bitmap = self.__bitmaps.get(amenity_id, 0)
+        self.__bitmaps[amenity_id] = bitmap | bit if value else bitmap & ~bit
+
+    def update(self, key, old, new):
+        """ Set the bit of the place of key if it exists, or clear it """
+
+        bit = 1 << self.ordinal(key)
+        self.__all = self.__all | bit if new else self.__all & ~bit
+
+    def refresh_link(self, key):
+        """ Bring the bitmaps up to date with the link of key, or with all
+            of the links if key is None """
+
+        with self.lock:
+            if self.indexed is None:
+                return
+            if key is None or not self.cached:
+                self.indexed = None
+                return
+
+            place_id, amenity_id = FileStorage.link_ids(key)
+            self.set_bit(place_id, amenity_id, key in self.link_data)
+
+    def load(self):
+        """ Load the places and the links """
+        self.place_data.load()
+        self.link_data.load()
+
+    @staticmethod
+    def count(bits):
+        """ Returns the number of bits set """
+        # int.bit_count() needs Python 3.10
+        return bin(bits).count("1")
+
+    def search(self, clauses, within=None):
+        """ Find the places matching every clause. A clause is a pair
+            (negated, amenity ids) that matches the places that have any
+            of the amenities, or none of them if negated. If within is given
+            only those place ids are searched.
+            Returns (place ids, facets) where facets maps every amenity id
+            to the number of matching places that have it """
+
+        with self.built():
+            bits = self.__all
+            if within is not None:
+                bits &= bits_of((self.__ordinals[place_id] for place_id in within
+                                 if place_id in self.__ordinals), len(self.__place_ids))
+
+            for negated, amenity_ids in clauses:
+                clause_bits = 0
+                for amenity_id in amenity_ids:
+                    clause_bits |= self.__bitmaps.get(amenity_id, 0)
+                bits &= ~clause_bits if negated else clause_bits
+
+            facets = {}
+            for amenity_id, bitmap in self.__bitmaps.items():
+                facets[amenity_id] = self.count(bits & bitmap)
+
+            place_ids = [self.__place_ids[ordinal] for ordinal in ordinals_of(bits)]
+
+        return place_ids, facets
@@ -0,0 +1,169 @@
+#!/usr/bin/python3
+"""This module defines a server that holds the data for all gunicorn workers"""
+
+# Start the server once, then start the workers with STORAGE_BACKEND=server
+# command to use: python3 -m data.data_server [socket path]
+
+import json
+import os
+import socketserver
+import sys
+import threading
+from data.geo_index import GeoIndex
+from data.model_index import ModelIndex
+from data.prefix_index import PrefixIndex
+from data.sorted_index import SortedIndex
+from data.text_index import TextIndex
+from data.tile_grid import TileGrid
+
+
+class DataServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """ Holds the data of every model in this process only and answers the
+        requests of the RemoteStorage clients in the workers """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, storage, models):
+        """ constructor. models maps each data file to its loaded data """
+        self.storage = storage
+        self.models = models
+        # every write goes through this lock, so they are applied in order
+        self.write_lock = threading.Lock()
+        # (filename, index class, arguments) => index, made the first time
+        # it is asked for. Every change goes through this process, so they
+        # stay up to date
+        self.indexes = {}
+        self.index_lock = threading.Lock()
+
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, DataRequestHandler)
+
+    def index(self, filename, index_class, *args):
+        """ Returns the index_class(data, *args) index of the rows of filename """
+
+        with self.index_lock:
+            if (filename, index_class, args) not in self.indexes:
+                self.indexes[(filename, index_class, args)] = \
+                    index_class(self.models[filename], *args)
+            return self.indexes[(filename, index_class, args)]
+
+    def value_counts(self, filename, group_field, field, group_values):
+        """ Returns [group value, value, number of rows] for the numeric
+            values of field in the rows of filename where group_field is one
+            of group_values, reading only those rows through an index """
+
+        index = self.index(filename, ModelIndex, group_field)
+        data = self.models[filename]
+        counts = {}
+        for group_value in set(group_values):
+            for row in data.get_many(index.lookup(group_value)):
+                value = row.get(field)
+                if SortedIndex.is_number(value):
+                    counts[(group_value, value)] = counts.get((group_value, value), 0) + 1
+        return [[group_value, value, number]
+                for (group_value, value), number in counts.items()]
+
+    def handle_request_message(self, message):
+        """ Run one request and returns its result """
+
+        if message["filename"] not in self.models:
+            raise ValueError("Unknown data file: {}".format(message["filename"]))
+
+        data = self.models[message["filename"]]
+        op = message["op"]
+
+        if op == "get":
+            return data[message["key"]]
+        if op == "contains":
+            return message["key"] in data
+        if op == "len":
+            return len(data)
+        if op == "keys":
+            return list(data)
+        if op == "items":
+            return list(data.items())
+        if op == "get_many":
+            return data.get_many(message["keys"])
+        filename = message["filename"]
+        if op == "lookup":
+            return self.index(filename, ModelIndex, message["field"]).lookup(message["value"])
+        if op == "page":
+            after = message["after"]
+            return self.index(filename, SortedIndex, message["field"]).page(
+                message["limit"], None if after is None else tuple(after), message["reverse"])
+        if op == "range_ids":
+            return self.index(filename, SortedIndex, message["field"]).lookup(
+                message["low"], message["high"])
+        if op == "range_count":
+            return self.index(filename, SortedIndex, message["field"]).count(
+                message["low"], message["high"])
+        if op == "points_within":
+            return self.index(filename, GeoIndex).lookup_points(
+                message["south"], message["west"], message["north"], message["east"])
+        if op == "clusters":
+            return self.index(filename, TileGrid, message["max_zoom"]).clusters(
+                message["zoom"], message["x"], message["y"], message["detail"])
+        if op == "text_search":
+            return self.index(filename, TextIndex, tuple(message["fields"])).search(
+                message["query"])
+        if op == "complete":
+            return self.index(filename, PrefixIndex, message["field"]).complete(
+                message["prefix"], message["limit"])
+
+        if op == "value_counts":
+            return self.value_counts(filename, message["group_field"],
+                                     message["field"], message["group_values"])
+
+        with self.write_lock:
+            if op == "set":
+                data[message["key"]] = message["value"]
+                return None
+            if op == "del":
+                del data[message["key"]]
+                return None
+            if op == "save":
+                self.storage.save_model_change(message["filename"], data, message["key"])
+                return None
+
+        raise ValueError("Unknown operation: {}".format(op))
+
+
+class DataRequestHandler(socketserver.StreamRequestHandler):
+    """ Handles the connection of one client, one request per line """
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = {"result": self.server.handle_request_message(json.loads(line))}
+            except KeyError:
+                response = {"error": "KeyError"}
+            except Exception as e:
+                response = {"error": type(e).__name__, "message": str(e)}
+
+            self.wfile.write(json.dumps(response, separators=(',', ':')).encode() + b"\n")
+            self.wfile.flush()
+
+
+if __name__ == '__main__':
+    if os.environ.get('STORAGE_BACKEND') == 'server':
+        sys.exit("The data server can't use STORAGE_BACKEND=server itself")
+
+    # the data package sets up the storage (and its background threads)
+    # from the environment, just like it does for a single process server
+    import data
+
+    server = DataServer(
+        sys.argv[1] if len(sys.argv) > 1 else os.environ.get('DATA_SERVER_SOCKET', 'data/hbnb.sock'),
+        data.storage,
+        {
+            data.country_file: data.country_data,
+            data.city_file: data.city_data,
+            data.amenity_file: data.amenity_data,
+            data.place_file: data.place_data,
+            data.user_file: data.user_data,
+            data.review_file: data.review_data,
+            data.place_to_amenity_file: data.place_to_amenity_data,
+        })
+    print("Serving data on {}".format(server.server_address))
+    server.serve_forever()
@@ -1,35 +1,299 @@
 #!/usr/bin/python3
 """This module defines a class to manage file storage for hbnb evolution"""
 
+import atexit
 import json
+import logging
+import marshal
+import os
+import queue
+import re
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:
+    # file locking is only available on POSIX systems
+    fcntl = None
+
 
 class FileStorage():
     """ Class for reading from files """
 
+    # 'file' rewrites the whole model file on every change.
+    # 'journal' appends one record per change to a log next to the model file
+    # and the log is replayed on top of the model file when it is loaded.
+    # 'writebehind' only marks the model as changed and a background thread
+    # rewrites each changed model file at most once per flush interval.
+    # 'durable' is 'journal' where a change is only acknowledged once it has
+    # been fsynced. Concurrent changes are fsynced together in one batch.
+    # 'shared' is 'journal' for several processes (gunicorn workers) sharing
+    # the same files. Appends are locked and each process applies the records
+    # the others appended, from where it last stopped reading the journal.
+    # Every journal starts with a header holding a generation id of its own,
+    # so that a process can tell the journal it was reading from a new one.
+    modes = ("file", "journal", "writebehind", "durable", "shared")
+
+    # bump this whenever the layout of the cache files changes
+    cache_version = 3
+    # rows in each chunk of a cache file. Only one chunk at a time is held
+    # as bytes while the cache is written or read
+    cache_chunk_rows = 10000
+
+    def __init__(self, mode="file", cache=True):
+        """ constructor """
+        if mode not in self.modes:
+            raise ValueError("Invalid storage mode specified: {}".format(mode))
+        if mode == "shared" and fcntl is None:
+            raise ValueError("The shared storage mode needs fcntl file locking")
+
+        self.mode = mode
+
+        # keep a binary snapshot next to each data file for faster loading
+        self.cache = cache
+
+        # filename => JSON key of the model ('Place', 'Country', etc.)
+        self.__model_keys = {}
+        # filename => (mtime, size) of the file when it was last read or written
+        self.__signatures = {}
+        self.__lock = threading.Lock()
+        self.__compaction_lock = threading.Lock()
+        self.__compaction_stop = threading.Event()
+        self.__compaction_thread = None
+
+        # filename => data waiting to be written in writebehind mode
+        self.__dirty = {}
+        self.__flush_lock = threading.Lock()
+        self.__flush_stop = threading.Event()
+        self.__flush_thread = None
+
+        # records waiting to be fsynced by the group committer in durable mode
+        self.__commit_queue = queue.Queue()
+        self.__commit_thread = None
+
+        # filename => live data kept in step with the journal in shared mode
+        self.__shared = {}
+        # filename => (generation, offset) of the journal up to where it was read
+        self.__journal_positions = {}
+        # journals already checked for a record left half written by a crash
+        self.__checked_journals = set()
+
     def load_model_data(self, filename):
         """ Load JSON data from file and returns as dictionary """
 
+        if self.mode == "shared":
+            # other processes may be appending to the journal right now
+            with self.locked_journal(filename) as f:
+                return self.read_shared_model_data(filename, f)
+
+        while True:
+            try:
+                signature = self.file_signature(filename)
+            except OSError:
+                signature = None
+
+            data = self.read_model_file(filename)
+
+            # Changes saved since the file was last written are in the journal
+            self.replay_journal(filename, data)
+
+            # if a compaction replaced the model file while it was being
+            # read, the journal it folded in may be gone already, with its
+            # records in the new model file only. Start again.
+            if self.file_signature(filename) == signature:
+                return data
+
+    def read_model_file(self, filename):
+        """ Load JSON data from file only, without replaying the journal """
+
         data = {}
 
         if not Path(filename).is_file():
             raise FileNotFoundError("Data file '{}' missing".format(filename))
 
+        stat = os.stat(filename)
+        self.__signatures[filename] = (stat.st_mtime_ns, stat.st_size)
+
+        cached = self.read_cache(filename)
+        if cached is not None:
+            key, data = cached
+            if key is not None:
+                self.__model_keys[filename] = key
+            return data
+
+        key = None
+
+        # The rows are put straight into a dictionary keyed by the row id
+        # (uuid) as they are parsed, so the whole file is never in memory twice
+        for key, row in self.iter_model_rows(filename):
+            if row is None:
+                self.__model_keys[filename] = key
+            else:
+                data[self.row_key(row)] = row
+
+        self.write_cache(filename, stat, key, data)
+
+        return data
+
+    @staticmethod
+    def cache_filename(filename):
+        """ Returns the name of the binary snapshot kept for a data file """
+        return "{}.cache".format(filename)
+
+    def read_cache(self, filename):
+        """ Returns (model key, data) from the binary snapshot of filename,
+            or None if there is no snapshot for the current file """
+
+        if not self.cache:
+            return None
+
+        try:
+            stat = os.stat(filename)
+            with open(self.cache_filename(filename), 'rb') as f:
+                version, mtime_ns, size, key = marshal.load(f)
+                if (version, mtime_ns, size) != \
+                        (self.cache_version, stat.st_mtime_ns, stat.st_size):
+                    return None
+
+                # marshal.loads() of a chunk read at once is many times
+                # faster than letting marshal.load() read the file bit by bit
+                data = {}
+                while True:
+                    length = f.read(8)
+                    if len(length) != 8:
+                        raise EOFError("Cache file cut short")
+                    length = int.from_bytes(length, "little")
+                    if length == 0:
+                        return key, data
+                    chunk = f.read(length)
+                    if len(chunk) != length:
+                        raise EOFError("Cache file cut short")
+                    data.update(marshal.loads(chunk))
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+    def write_cache(self, filename, stat, key, data):
+        """ Save a binary snapshot of the data parsed from filename. stat is
+            the state of filename from before it was parsed """
+
+        if not self.cache:
+            return
+
+        cache = self.cache_filename(filename)
+        tmp_cache = None
+        try:
+            # a temporary file of its own, since every worker may be
+            # writing the cache of the same file at once
+            fd, tmp_cache = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(cache)),
+                prefix=os.path.basename(cache), suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                marshal.dump((self.cache_version, stat.st_mtime_ns, stat.st_size, key), f)
+                # chunks of rows, each after its length, then a length of 0.
+                # The rows share their keys, so marshal writes each key once
+                # per chunk and they are shared again when read
+                rows = iter(data.items())
+                while True:
+                    chunk = dict(islice(rows, self.cache_chunk_rows))
+                    blob = marshal.dumps(chunk) if chunk else b""
+                    f.write(len(blob).to_bytes(8, "little"))
+                    if not chunk:
+                        break
+                    f.write(blob)
+            os.replace(tmp_cache, cache)
+        except (OSError, ValueError):
+            # the cache only makes the next start faster, so carry on without it
+            if tmp_cache is not None and Path(tmp_cache).is_file():
+                os.remove(tmp_cache)
+
+    def iter_model_rows(self, filename, chunk_size=64 * 1024):
+        """ Parse a {"Model": [{...}, {...}, ...]} file one row at a time.
+            Yields (model key, row) for every row, plus (model key, None)
+            when the list of rows of a model starts """
+
+        # json.load() shares the key strings of every object of a file,
+        # but each raw_decode() call starts afresh. Share them across the
+        # rows here, or every row holds copies of the same keys
+        shared_key = {}.setdefault
+
+        def make_object(pairs):
+            return {shared_key(key, key): value for key, value in pairs}
+
+        decoder = json.JSONDecoder(object_pairs_hook=make_object)
+        whitespace = re.compile(r'\s*')
+
         try:
             with open(filename, 'r') as f:
-                rows = json.load(f)
-            for key in rows:
-                data[key] = rows[key]
+                buffer = ""
+                pos = 0
+                at_eof = False
+
+                def next_token():
+                    """ Skip whitespace and return the next character """
+                    nonlocal buffer, pos, at_eof
+                    while True:
+                        pos = whitespace.match(buffer, pos).end()
+                        if pos < len(buffer) or at_eof:
+                            return buffer[pos:pos + 1]
+                        read_more()
+
+                def read_more():
+                    """ Drop what was parsed already and read the next chunk """
+                    nonlocal buffer, pos, at_eof
+                    chunk = f.read(chunk_size)
+                    at_eof = chunk == ""
+                    buffer = buffer[pos:] + chunk
+                    pos = 0
+
+                def next_value():
+                    """ Decode the next complete value, reading as much as needed """
+                    nonlocal pos
+                    next_token()
+                    while True:
+                        try:
+                            value, pos = decoder.raw_decode(buffer, pos)
+                            return value
+                        except ValueError:
+                            if at_eof:
+                                raise
+                            read_more()
+
+                def expect(token):
+                    """ Consume the next character, which has to be token """
+                    nonlocal pos
+                    if next_token() != token:
+                        raise ValueError("Expected '{}' at position {}".format(token, pos))
+                    pos += 1
+
+                expect('{')
+                if next_token() == '}':
+                    return
+                while True:
+                    key = next_value()
+                    expect(':')
+                    expect('[')
+                    yield key, None
+                    if next_token() == ']':
+                        pos += 1
+                    else:
+                        while True:
+                            yield key, next_value()
+                            if next_token() == ']':
+                                pos += 1
+                                break
+                            expect(',')
+                    if next_token() == '}':
+                        break
+                    expect(',')
         except ValueError as exc:
             raise ValueError(
                 "Unable to load data from file '{}'".format(filename)) from exc
 
-        # The data at this point is not directly usable. It needs to be cleaned up
-        data = self.reorganise_model_data(data)
-
-        return data
-
     def reorganise_model_data(self, data):
         """ Parse and reorganise the data so that the id is the key """
         output = {}
@@ -49,42 +313,555 @@ class FileStorage():
         return output
 
     def load_many_to_many_data(self, filename):
-        """ many to many data is loaded by this function """
+        """ many to many data is loaded by this function.
+            The place to amenity links are rows like those of any other
+            model, keyed by link_key() since they have no id """
 
-        data = {}
-        grouped_data = {}
+        return self.load_model_data(filename)
 
-        if not Path(filename).is_file():
-            raise FileNotFoundError("Data file '{}' missing".format(filename))
+    @staticmethod
+    def link_key(place_id, amenity_id):
+        """ Returns the key of the link between a place and an amenity """
+        return "{}:{}".format(place_id, amenity_id)
+
+    @staticmethod
+    def link_ids(key):
+        """ Returns (place id, amenity id) of a link key """
+        place_id, sep, amenity_id = key.partition(":")
+        if not sep:
+            raise KeyError(key)
+        return place_id, amenity_id
+
+    @staticmethod
+    def row_key(row):
+        """ Returns the key of a row in the loaded data """
+        if 'id' in row:
+            return row['id']
+        return FileStorage.link_key(row['place_id'], row['amenity_id'])
+
+    @staticmethod
+    def file_signature(filename):
+        """ Returns (mtime, size) of a file """
+        stat = os.stat(filename)
+        return stat.st_mtime_ns, stat.st_size
+
+    def has_changed(self, filename):
+        """ Returns True if filename was changed by something other than
+            this storage since it was last loaded """
+
+        if filename not in self.__signatures:
+            return False
 
         try:
-            with open(filename, 'r') as f:
-                rows = json.load(f)
-            for key in rows:
-                data[key] = rows[key]
-        except ValueError as exc:
-            raise ValueError(
-                "Unable to load data from file '{}'".format(filename)) from exc
+            return self.file_signature(filename) != self.__signatures[filename]
+        except OSError:
+            # the file is being replaced right now, look again later
+            return False
 
-        # print(data.items())
+    def model_key(self, filename):
+        """ Returns the JSON key of the model loaded from filename """
+        return self.__model_keys[filename]
 
-        for key in data:
-            # key's value is 'Place_to_Amenity'
-            for row in data[key]:
-                place_id = row['place_id']
-                amenity_id = row['amenity_id']
+    @staticmethod
+    def journal_filename(filename):
+        """ Returns the name of the journal kept for a model file """
+        return "{}.log".format(filename)
+
+    @staticmethod
+    def compacting_filename(filename):
+        """ Returns the name the journal is moved to while it is compacted """
+        return "{}.log.compacting".format(filename)
+
+    @staticmethod
+    def compacted_filename(filename):
+        """ Returns the name a compacted journal is kept under in shared mode,
+            for the processes that have not read all of it yet """
+        return "{}.log.compacted".format(filename)
+
+    def replay_journal(self, filename, data):
+        """ Apply the records in the journals of filename to data """
+
+        # A journal left over from an interrupted compaction is older than
+        # the current one. Replaying it again is harmless since every record
+        # holds the whole row.
+        self.replay_journal_file(self.compacting_filename(filename), data)
+
+        journal = self.journal_filename(filename)
+        offset = self.replay_journal_file(journal, data)
+
+        # Only the first load can find a record left half written by a
+        # crash. On a reload, what follows offset may be a record that was
+        # appended since it was read, so it is left alone.
+        if journal not in self.__checked_journals:
+            self.__checked_journals.add(journal)
+            with self.__lock:
+                self.drop_partial_record(journal, offset)
+
+        return data
+
+    def replay_journal_file(self, journal, data, offset=0, skip_id=None):
+        """ Apply the records in a single journal file to data, from byte
+            offset onwards, leaving out the records of row skip_id.
+            Returns the offset right after the last complete record """
+
+        if not Path(journal).is_file():
+            return offset
+
+        with open(journal, 'rb') as f:
+            f.seek(offset)
+            lines = f.read().split(b"\n")
+
+        # Every record ends with a newline, so the last item is either empty
+        # or a partial record, left by a crash or still being appended
+        for line_number, line in enumerate(lines[:-1], start=1):
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                raise ValueError("Unable to replay journal '{}' at line {}".format(
+                    journal, line_number)) from exc
+
+            offset += len(line) + 1
+            if 'generation' in record:
+                # the header of a journal in shared mode
+                continue
+            if record['id'] == skip_id:
+                continue
+
+            if record['row'] is None:
+                data.pop(record['id'], None)
+            else:
+                data[record['id']] = record['row']
 
-                if place_id not in grouped_data:
-                    grouped_data[place_id] = []
-                grouped_data[place_id].append(amenity_id)
+        return offset
 
-        return grouped_data
+    @staticmethod
+    def drop_partial_record(journal, offset):
+        """ Cut a record left half written by a crash off the end of the
+            journal, so that the next record starts on a new line. Call with
+            the appends locked out """
+
+        try:
+            with open(journal, 'rb') as f:
+                f.seek(offset)
+                tail = f.read()
+            # a complete record was appended after offset was read
+            if tail and b"\n" not in tail:
+                os.truncate(journal, offset)
+        except OSError:
+            # it will be skipped again on the next load
+            pass
+
+    @staticmethod
+    def journal_generation(journal):
+        """ Returns (generation id, length of the header) of a journal, or
+            (None, 0) if it has no header or doesn't exist """
+
+        try:
+            with open(journal, 'rb') as f:
+                line = f.readline()
+        except FileNotFoundError:
+            return None, 0
+
+        if not line.endswith(b"\n"):
+            return None, 0
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None, 0
+        if isinstance(record, dict) and 'generation' in record:
+            return record['generation'], len(line)
+        return None, 0
+
+    @contextmanager
+    def locked_journal(self, filename):
+        """ Open the journal of filename for appending, locked against
+            every other process using it. A new journal gets the header
+            with its generation id first """
+
+        journal = self.journal_filename(filename)
+        while True:
+            f = open(journal, 'ab+')
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                # a compaction may have moved the journal while we waited
+                if os.fstat(f.fileno()).st_ino == os.stat(journal).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            f.close()
+
+        try:
+            if os.fstat(f.fileno()).st_size == 0:
+                header = json.dumps({"generation": uuid.uuid4().hex})
+                f.write((header + "\n").encode())
+                f.flush()
+            yield f
+        finally:
+            f.close()
+
+    def read_shared_model_data(self, filename, journal_file):
+        """ Load the model file and its journals in shared mode.
+            journal_file is the locked journal """
+
+        while True:
+            signature = self.file_signature(filename)
+
+            data = self.read_model_file(filename)
+            self.replay_journal_file(self.compacting_filename(filename), data)
+            journal = self.journal_filename(filename)
+            offset = self.replay_journal_file(journal, data)
+            self.drop_partial_record(journal, offset)
+
+            # if a compaction replaced the model file while it was being
+            # read, the compacted journal may have been missed. Start again.
+            if self.file_signature(filename) == signature:
+                self.__journal_positions[filename] = (
+                    self.journal_generation(journal)[0], offset)
+                return data
+
+    def share(self, filename, data):
+        """ Keep data (a LazyModelData) in step with the changes that other
+            processes make to filename in shared mode """
+        self.__shared[filename] = data
+
+    def sync(self):
+        """ Apply the changes other processes saved since the last sync """
+
+        if self.mode != "shared":
+            return
+
+        for filename, data in list(self.__shared.items()):
+            if not data.is_loaded() or filename not in self.__journal_positions:
+                continue
+
+            # nothing to do as long as the journal has not grown or been
+            # replaced. A new journal can get the inode of an old one back,
+            # so it is told apart by its generation id
+            generation, offset = self.__journal_positions[filename]
+            journal = self.journal_filename(filename)
+            try:
+                if os.path.getsize(journal) == offset and \
+                        self.journal_generation(journal)[0] == generation:
+                    continue
+            except FileNotFoundError:
+                pass
+
+            with self.__lock:
+                with self.locked_journal(filename) as f:
+                    self.catch_up_journal(filename, f)
+
+    def catch_up_journal(self, filename, journal_file, skip_id=None):
+        """ Apply the records appended by other processes since this one last
+            read the journal. journal_file is the locked journal """
+
+        data = self.__shared[filename]
+        generation, offset = self.__journal_positions[filename]
+        journal = self.journal_filename(filename)
+        current_generation = self.journal_generation(journal)[0]
+
+        if current_generation != generation:
+            # the journal was moved away by a compaction since it was last
+            # read, so finish reading it where it is now
+            for moved in (self.compacting_filename(filename),
+                          self.compacted_filename(filename)):
+                if generation is not None and self.journal_generation(moved)[0] == generation:
+                    self.replay_journal_file(moved, data, offset, skip_id)
+                    break
+            else:
+                # it is gone already. Start over from the model file,
+                # keeping the change that is about to be saved.
+                new_data = self.read_shared_model_data(filename, journal_file)
+                if skip_id is not None:
+                    new_data.pop(skip_id, None)
+                    if skip_id in data:
+                        new_data[skip_id] = data[skip_id]
+                data.swap(new_data, data.version())
+                return
+            offset = 0
+
+        offset = self.replay_journal_file(journal, data, offset, skip_id)
+        self.__journal_positions[filename] = (current_generation, offset)
+
+    def append_journal_record(self, filename, row_id, row):
+        """ Append a single change to the journal of filename.
+            A row of None records that the row was deleted """
+
+        record = json.dumps({"id": row_id, "row": row}, separators=(',', ':'))
+
+        if self.mode == "durable":
+            self.commit_journal_record(filename, record)
+            return
+
+        if self.mode == "shared":
+            try:
+                with self.__lock:
+                    with self.locked_journal(filename) as f:
+                        # apply what the other processes saved first, so
+                        # that this record is also the latest in memory
+                        if filename in self.__shared:
+                            self.catch_up_journal(filename, f, skip_id=row_id)
+                        f.write((record + "\n").encode())
+                        f.flush()
+                        self.__journal_positions[filename] = (
+                            self.journal_generation(self.journal_filename(filename))[0],
+                            f.tell())
+            except IOError as e:
+                raise Exception(f"Failed to save data: {str(e)}")
+            return
+
+        try:
+            with self.__lock:
+                with open(self.journal_filename(filename), 'a') as f:
+                    f.write(record + "\n")
+        except IOError as e:
+            raise Exception(f"Failed to save data: {str(e)}")
+
+    def commit_journal_record(self, filename, record):
+        """ Queue a record for the group committer and wait until it is
+            safely on disk """
+
+        pending = {"filename": filename, "record": record,
+                   "done": threading.Event(), "error": None}
+
+        with self.__lock:
+            if self.__commit_thread is None:
+                self.__commit_thread = threading.Thread(
+                    target=self.commit_journal_records, name="group-commit", daemon=True)
+                self.__commit_thread.start()
+
+        self.__commit_queue.put(pending)
+        pending["done"].wait()
+
+        if pending["error"] is not None:
+            raise Exception(f"Failed to save data: {str(pending['error'])}")
+
+    def commit_journal_records(self):
+        """ Group committer. Appends every record queued while the previous
+            batch was being fsynced, with a single fsync per journal """
+
+        while True:
+            batch = [self.__commit_queue.get()]
+            while True:
+                try:
+                    batch.append(self.__commit_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            by_filename = {}
+            for pending in batch:
+                by_filename.setdefault(pending["filename"], []).append(pending)
+
+            for filename, records in by_filename.items():
+                try:
+                    with self.__lock:
+                        journal = self.journal_filename(filename)
+                        created = not Path(journal).is_file()
+                        with open(journal, 'a') as f:
+                            f.write("".join(
+                                pending["record"] + "\n" for pending in records))
+                            f.flush()
+                            os.fsync(f.fileno())
+                        if created:
+                            # a new journal is only there for good once
+                            # its directory is synced too
+                            self.sync_directory(journal)
+                except Exception as e:
+                    for pending in records:
+                        pending["error"] = e
+
+            # release all the requests waiting on this batch at once
+            for pending in batch:
+                pending["done"].set()
+
+    def save_model_change(self, filename, data, row_id):
+        """ Persist the change made to data[row_id] (or its removal) """
+
+        if self.mode in ("journal", "durable", "shared"):
+            self.append_journal_record(filename, row_id, data.get(row_id))
+            return
+
+        if self.mode == "writebehind":
+            with self.__lock:
+                self.__dirty[filename] = data
+            return
+
+        with self.__lock:
+            self.write_model_file(filename, data)
+
+    def write_model_file(self, filename, data):
+        """ Rewrite the whole model file with data """
+
+        self.save_model_data(
+            filename, {self.__model_keys[filename]: list(data.values())})
+        self.__signatures[filename] = self.file_signature(filename)
+
+        # Everything in the journals is now part of the model file
+        for journal in (self.compacting_filename(filename),
+                        self.journal_filename(filename)):
+            if Path(journal).is_file():
+                os.remove(journal)
+
+    def flush(self):
+        """ Write every model changed since the last flush """
+
+        with self.__flush_lock:
+            with self.__lock:
+                dirty = self.__dirty
+                self.__dirty = {}
+
+            for filename, data in dirty.items():
+                try:
+                    self.write_model_file(filename, data)
+                except Exception:
+                    # keep it dirty so that the next flush tries again
+                    with self.__lock:
+                        self.__dirty.setdefault(filename, data)
+                    logging.getLogger(__name__).exception(
+                        "Unable to write data file '%s'", filename)
+
+    def start_write_behind(self, interval=1):
+        """ Start a background thread that writes the changed models once
+            every interval seconds, and once more when the process exits """
+
+        if self.__flush_thread is not None:
+            return
+
+        def flush_models():
+            while not self.__flush_stop.wait(interval):
+                self.flush()
+
+        self.__flush_stop.clear()
+        self.__flush_thread = threading.Thread(
+            target=flush_models, name="write-behind", daemon=True)
+        self.__flush_thread.start()
+        atexit.register(self.stop_write_behind)
+
+    def stop_write_behind(self):
+        """ Stop the background writer after writing what is left """
+
+        if self.__flush_thread is not None:
+            self.__flush_stop.set()
+            self.__flush_thread.join()
+            self.__flush_thread = None
+
+        self.flush()
+
+    def compact_model_data(self, filename):
+        """ Fold the journal of filename into a new snapshot of the model file.
+            Returns True if there was anything to compact """
+
+        journal = self.journal_filename(filename)
+        compacting = self.compacting_filename(filename)
+
+        with self.__compaction_lock:
+            lock_file = None
+            if self.mode == "shared":
+                # only one process compacts a journal at a time
+                lock_file = open("{}.lock".format(journal), 'a')
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    lock_file.close()
+                    return False
+
+            try:
+                # Move the journal out of the way so that requests can keep on
+                # appending to a new one while the snapshot is being written.
+                # If a previous compaction was interrupted, finish that one first.
+                with self.__lock:
+                    if not Path(compacting).is_file():
+                        # a journal with nothing but its header is empty
+                        if not Path(journal).is_file() or \
+                                os.path.getsize(journal) <= self.journal_generation(journal)[1]:
+                            return False
+                        if self.mode == "shared":
+                            with self.locked_journal(filename):
+                                os.replace(journal, compacting)
+                        else:
+                            os.replace(journal, compacting)
+
+                # The snapshot is built from the files, not from the live data,
+                # so the request handlers are never blocked or raced with
+                data = self.read_model_file(filename)
+                self.replay_journal_file(compacting, data)
+
+                # the new model file and its rename are synced before the
+                # journal it replaces goes
+                self.save_model_data(
+                    filename, {self.__model_keys[filename]: list(data.values())}, sync=True)
+                self.__signatures[filename] = self.file_signature(filename)
+
+                if self.mode == "shared":
+                    # other processes may not have read all of it yet
+                    os.replace(compacting, self.compacted_filename(filename))
+                else:
+                    os.remove(compacting)
+            finally:
+                if lock_file is not None:
+                    lock_file.close()
+
+        return True
+
+    def start_compaction(self, interval=60, min_journal_size=1024 * 1024):
+        """ Start a background thread that compacts every journal that has
+            grown past min_journal_size bytes, once every interval seconds """
+
+        if self.__compaction_thread is not None:
+            return
+
+        def compact_journals():
+            while not self.__compaction_stop.wait(interval):
+                for filename in list(self.__model_keys):
+                    journal = self.journal_filename(filename)
+                    try:
+                        if Path(journal).is_file() and \
+                                os.path.getsize(journal) >= min_journal_size:
+                            self.compact_model_data(filename)
+                    except Exception:
+                        logging.getLogger(__name__).exception(
+                            "Unable to compact journal '%s'", journal)
+
+        self.__compaction_stop.clear()
+        self.__compaction_thread = threading.Thread(
+            target=compact_journals, name="journal-compaction", daemon=True)
+        self.__compaction_thread.start()
+
+    def stop_compaction(self):
+        """ Stop the background compaction thread """
+
+        if self.__compaction_thread is None:
+            return
+
+        self.__compaction_stop.set()
+        self.__compaction_thread.join()
+        self.__compaction_thread = None
+
+    @staticmethod
+    def sync_directory(filename):
+        """ fsync the directory of filename, so that the files created,
+            renamed or removed in it are on disk too """
+
+        fd = os.open(os.path.dirname(os.path.abspath(filename)), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
 
     @staticmethod
-    def save_model_data(filename=None, data=None):
+    def save_model_data(filename=None, data=None, sync=False):
         """save data"""
+        tmp_filename = "{}.tmp".format(filename)
         try:
-            with open(filename, 'w') as f:
+            # write to a temporary file first so that a failed write
+            # never leaves a truncated data file behind
+            with open(tmp_filename, 'w') as f:
                 json.dump(data, f)
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_filename, filename)
+            if sync:
+                # or the rename may be lost on a power cut
+                FileStorage.sync_directory(filename)
         except IOError as e:
             raise Exception(f"Failed to save data: {str(e)}")
@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+"""This module defines a class that reloads data files changed on disk"""
+
+import logging
+import threading
+
+
+class FileWatcher():
+    """ Polls the data files loaded by a FileStorage and applies the rows
+        that changed on disk to the live data, without a restart """
+
+    def __init__(self, storage):
+        """ constructor """
+        self.storage = storage
+        # filename => (LazyModelData, name of the storage method loading it)
+        self.__watched = {}
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    def watch(self, filename, data, loader="load_model_data"):
+        """ Reload data from filename whenever the file changes """
+        self.__watched[filename] = (data, loader)
+
+    @staticmethod
+    def diff(live, new):
+        """ Returns (changed rows keyed by id, ids of removed rows) """
+
+        changed = {}
+        for key, row in new.items():
+            if live.get(key) != row:
+                changed[key] = row
+        removed = [key for key in live if key not in new]
+
+        return changed, removed
+
+    def reload(self, filename):
+        """ Apply the changes made to filename to the live data.
+            Returns (changed rows keyed by id, ids of removed rows) """
+
+        data, loader = self.__watched[filename]
+
+        while True:
+            version = data.version()
+            live = data.load()
+
+            # parsing happens here, off the request path
+            new = getattr(self.storage, loader)(filename)
+            changed, removed = self.diff(live, new)
+            if not changed and not removed:
+                return changed, removed
+
+            # keep the live row objects that did not change, so the new
+            # data only costs memory for the rows that did
+            for key in new:
+                if key not in changed:
+                    new[key] = live[key]
+
+            # if a request wrote to the data in the meantime, start again
+            # so that its write is not lost
+            if data.swap(new, version, list(changed) + removed):
+                return changed, removed
+
+    def check(self):
+        """ Reload every loaded file that changed since it was last read """
+
+        for filename, (data, loader) in list(self.__watched.items()):
+            if not data.is_loaded() or not self.storage.has_changed(filename):
+                continue
+            try:
+                self.reload(filename)
+            except Exception:
+                # most likely the file is still being copied in, so try
+                # again on the next check
+                logging.getLogger(__name__).exception(
+                    "Unable to reload data file '%s'", filename)
+
+    def start(self, interval=5):
+        """ Start a background thread that checks the files every
+            interval seconds """
+
+        if self.__thread is not None:
+            return
+
+        def check_files():
+            while not self.__stop.wait(interval):
+                self.check()
+
+        self.__stop.clear()
+        self.__thread = threading.Thread(
+            target=check_files, name="file-watcher", daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """ Stop the background thread """
+
+        if self.__thread is None:
+            return
+
+        self.__stop.set()
+        self.__thread.join()
+        self.__thread = None
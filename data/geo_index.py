@@ -0,0 +1,145 @@
+#!/usr/bin/python3
+"""This module defines an index of the places by where they are"""
+
+import math
+from data.lazy_index import LazyIndex
+
+# mean radius of the earth
+EARTH_RADIUS_KM = 6371.0088
+# length of one degree of latitude
+KM_PER_DEGREE = 111.32
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """ Returns the great circle distance between two points (haversine) """
+
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + \
+        math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoIndex(LazyIndex):
+    """ Keeps the ids of the rows of a model in the cells of a grid of
+        latitude and longitude, so that the rows in an area are found by
+        looking at the few cells that cover it. Rows without a numeric
+        latitude and longitude are left out """
+
+    def __init__(self, data, cell_size=0.1, cached=True):
+        """ constructor. cell_size is in degrees """
+        self.cell_size = cell_size
+        # (row, column) of a cell => ids of the rows in it
+        self.__cells = {}
+        super().__init__(data, cached)
+
+    @staticmethod
+    def point(row):
+        """ Returns (latitude, longitude) of a row, or None """
+
+        point = (row.get("latitude"), row.get("longitude"))
+        for value in point:
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return None
+        return point
+
+    def cell(self, lat, lon):
+        """ Returns the cell a point is in """
+        return (math.floor(lat / self.cell_size), math.floor(lon / self.cell_size))
+
+    def entry(self, key, row):
+        """ Returns (latitude, longitude, cell) of a row, or None """
+        point = self.point(row)
+        return None if point is None else point + (self.cell(*point),)
+
+    def build(self):
+        """ Index every row of the data. Call with the lock held """
+        self.__cells = {}
+        super().build()
+
+    def update(self, key, old, new):
+        """ Move the row of key from the cell of old to that of new """
+
+        if old is not None:
+            del self.__cells[old[2]][key]
+            if not self.__cells[old[2]]:
+                del self.__cells[old[2]]
+        if new is not None:
+            self.__cells.setdefault(new[2], {})[key] = None
+
+    def points_within(self, south, west, north, east):
+        """ Returns (id, latitude, longitude) of the rows in a box.
+            Call with the lock held """
+
+        first_row, first_column = self.cell(south, west)
+        last_row, last_column = self.cell(north, east)
+        rows = range(first_row, last_row + 1)
+        columns = range(first_column, last_column + 1)
+
+        # a big box has more cells than there are cells with places in them
+        if len(rows) * len(columns) > len(self.__cells):
+            cells = [cell for cell in self.__cells
+                     if cell[0] in rows and cell[1] in columns]
+        else:
+            cells = [(row, column) for row in rows for column in columns
+                     if (row, column) in self.__cells]
+
+        points = []
+        for cell in cells:
+            for key in self.__cells[cell]:
+                lat, lon = self.indexed[key][:2]
+                if south <= lat <= north and west <= lon <= east:
+                    points.append((key, lat, lon))
+        return points
+
+    def lookup_points(self, south, west, north, east):
+        """ Returns (id, latitude, longitude) of the rows in a box. If west
+            is greater than east the box crosses the 180th meridian """
+
+        if not self.cached and self.data.can("points_within"):
+            if west > east:
+                return self.data.points_within(south, west, north, 180) + \
+                    self.data.points_within(south, -180, north, east)
+            return self.data.points_within(south, west, north, east)
+
+        with self.built():
+            if west > east:
+                return self.points_within(south, west, north, 180) + \
+                    self.points_within(south, -180, north, east)
+            return self.points_within(south, west, north, east)
+
+    def within(self, south, west, north, east):
+        """ Returns (id, distance in km from the center of the box) of the
+            rows in a box, nearest first """
+
+        center_lat = (south + north) / 2
+        center_lon = (west + east) / 2
+        if west > east:
+            center_lon = center_lon + 180 if center_lon <= 0 else center_lon - 180
+
+        results = [(key, distance_km(center_lat, center_lon, lat, lon))
+                   for key, lat, lon in self.lookup_points(south, west, north, east)]
+        results.sort(key=lambda result: result[1])
+        return results
+
+    def near(self, lat, lon, radius_km):
+        """ Returns (id, distance in km) of the rows at most radius_km away
+            from a point, nearest first """
+
+        # the box around the circle, in degrees
+        lat_delta = radius_km / KM_PER_DEGREE
+        south, north = max(-90.0, lat - lat_delta), min(90.0, lat + lat_delta)
+        cos_lat = min(math.cos(math.radians(south)), math.cos(math.radians(north)))
+        if cos_lat <= 0 or radius_km / (KM_PER_DEGREE * cos_lat) >= 180:
+            west, east = -180.0, 180.0
+        else:
+            lon_delta = radius_km / (KM_PER_DEGREE * cos_lat)
+            west = (lon - lon_delta + 180) % 360 - 180
+            east = (lon + lon_delta + 180) % 360 - 180
+
+        results = []
+        for key, point_lat, point_lon in self.lookup_points(south, west, north, east):
+            distance = distance_km(lat, lon, point_lat, point_lon)
+            if distance <= radius_km:
+                results.append((key, distance))
+        results.sort(key=lambda result: result[1])
+        return results
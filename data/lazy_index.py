@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+"""This module defines the base of the indexes kept over the rows of a model"""
+
+import threading
+from contextlib import contextmanager
+
+
+class LazyIndex():
+    """ Base of the indexes of the rows of a model. An index is built the
+        first time it is used and then kept up to date by the changes made
+        to the data. Subclasses say what they keep of each row with entry(),
+        and fill their own structures in build() and update() """
+
+    def __init__(self, data, cached=True):
+        """ constructor. data is a LazyModelData. An index that is not cached
+            is built again every time it is used, for data that other
+            processes change without telling this one """
+        self.data = data
+        self.cached = cached
+        # id => entry() of the rows indexed, or None until it is built.
+        # Rows are changed in place, so the old entry of a row can't be
+        # worked out from the row anymore
+        self.indexed = None
+        self.lock = threading.Lock()
+
+        data.add_listener(self.refresh)
+
+    def entry(self, key, row):
+        """ Returns what the index keeps of a row, or None to leave it out """
+        raise NotImplementedError
+
+    def build(self):
+        """ Index every row of the data. Call with the lock held """
+
+        self.indexed = {}
+        for key, row in list(self.data.items()):
+            entry = self.entry(key, row)
+            if entry is not None:
+                self.indexed[key] = entry
+                self.update(key, None, entry)
+
+    def update(self, key, old, new):
+        """ Replace the entry old of the row of key by new. Either is None
+            when the row wasn't or isn't indexed. Call with the lock held """
+        raise NotImplementedError
+
+    def refresh(self, key):
+        """ Bring the index up to date with the row of key, or with all of
+            the data if key is None. Returns True if the index changed """
+
+        with self.lock:
+            if self.indexed is None:
+                # not built yet, so it will see the change when it is
+                return False
+
+            # an index that is not cached is built again anyway
+            if key is None or not self.cached:
+                self.indexed = None
+                return True
+
+            row = self.data.get(key)
+            new = None if row is None else self.entry(key, row)
+            old = self.indexed.pop(key, None)
+            if new is not None:
+                self.indexed[key] = new
+            if old == new:
+                return False
+            self.update(key, old, new)
+            return True
+
+    def load(self):
+        """ Load the data the index is built from """
+        self.data.load()
+
+    @contextmanager
+    def built(self):
+        """ Hold the lock of the index, built """
+
+        # load the data before taking the lock, loading may have to wait
+        # for the storage, which notifies this index while it holds its lock
+        self.load()
+        with self.lock:
+            if self.indexed is None or not self.cached:
+                self.build()
+            yield
@@ -0,0 +1,194 @@
+#!/usr/bin/python3
+"""This module defines a dictionary that only loads its data when first used"""
+
+import threading
+from collections.abc import MutableMapping
+
+
+class LazyModelData(MutableMapping):
+    """ Dictionary-like wrapper that calls loader on first access and then
+        forwards everything to the data it returned """
+
+    def __init__(self, loader):
+        """ constructor """
+        self.__loader = loader
+        self.__data = None
+        self.__lock = threading.Lock()
+        # goes up by one on every write, so that a reload can tell
+        # whether the data was changed while it was reading the file
+        self.__version = 0
+        # called with the key of every row that changes, or with None when
+        # all of the data was replaced
+        self.__listeners = []
+
+    def load(self):
+        """ Returns the wrapped data, loading it if needed """
+
+        data = self.__data
+        if data is None:
+            with self.__lock:
+                # another thread may have loaded it while we were waiting
+                if self.__data is None:
+                    self.__data = self.__loader()
+                data = self.__data
+        return data
+
+    def is_loaded(self):
+        """ Returns True once the data has been loaded """
+        return self.__data is not None
+
+    def version(self):
+        """ Returns the number of writes made so far """
+        return self.__version
+
+    def add_listener(self, listener):
+        """ Have listener(key) called after every change to the data """
+        self.__listeners.append(listener)
+
+    def notify(self, key):
+        """ Tell the listeners that the row of key changed, or that
+            everything did if key is None """
+        for listener in self.__listeners:
+            listener(key)
+
+    def swap(self, data, version, changed_keys=None):
+        """ Replace the wrapped data in one go, unless there were writes
+            since version. changed_keys are the keys of the rows that differ
+            between the old and the new data, if known.
+            Returns True if the data was replaced """
+
+        with self.__lock:
+            if self.__version != version:
+                return False
+            self.__data = data
+
+        if changed_keys is None:
+            self.notify(None)
+        else:
+            for key in changed_keys:
+                self.notify(key)
+        return True
+
+    def __getitem__(self, key):
+        return self.load()[key]
+
+    def __setitem__(self, key, value):
+        self.load()
+        with self.__lock:
+            self.__data[key] = value
+            self.__version += 1
+        self.notify(key)
+
+    def __delitem__(self, key):
+        self.load()
+        with self.__lock:
+            del self.__data[key]
+            self.__version += 1
+        self.notify(key)
+
+    def __contains__(self, key):
+        return key in self.load()
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __len__(self):
+        return len(self.load())
+
+    def get(self, key, default=None):
+        return self.load().get(key, default)
+
+    def get_many(self, keys):
+        """ Returns the rows of keys, in the same order, leaving out the
+            keys that have no row. Data that can read them all at once,
+            like a database table, is asked to """
+
+        data = self.load()
+        if hasattr(data, "get_many"):
+            return data.get_many(keys)
+        rows = []
+        for key in keys:
+            row = data.get(key)
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    def can(self, op):
+        """ Returns True if the data answers op itself, like a database
+            table or the data server do for the methods below that are only
+            for data that can() """
+        return hasattr(self.load(), op)
+
+    def page(self, field, limit, after=None, reverse=False):
+        """ Returns the ids of a page of the rows sorted by field and the
+            (value, id) of its last row if there are more, like
+            SortedIndex.page() """
+        return self.load().page(field, limit, after, reverse)
+
+    def range_ids(self, field, low=None, high=None):
+        """ Returns the ids of the rows with a number low <= field <= high,
+            like SortedIndex.lookup() """
+        return self.load().range_ids(field, low, high)
+
+    def range_count(self, field, low=None, high=None):
+        """ Returns the number of rows with a number low <= field <= high,
+            like SortedIndex.count() """
+        return self.load().range_count(field, low, high)
+
+    def points_within(self, south, west, north, east):
+        """ Returns (id, latitude, longitude) of the rows in a box, which
+            doesn't cross the 180th meridian, like GeoIndex.lookup_points() """
+        return self.load().points_within(south, west, north, east)
+
+    def clusters(self, max_zoom, zoom, x, y, detail):
+        """ Returns the clusters of places on a map tile, like
+            TileGrid.clusters() """
+        return self.load().clusters(max_zoom, zoom, x, y, detail)
+
+    def text_search(self, fields, query):
+        """ Returns (id, score) of the rows with any of the words of query in
+            fields, best match first, like TextIndex.search() """
+        return self.load().text_search(fields, query)
+
+    def complete(self, field, prefix, limit):
+        """ Returns the ids of the first limit rows whose field starts with
+            prefix whatever the case, like PrefixIndex.complete() """
+        return self.load().complete(field, prefix, limit)
+
+    def lookup(self, field, value):
+        """ Returns the keys of the rows where field equals value. Data
+            that can find them itself, like a database table, is asked to,
+            otherwise every row is scanned """
+
+        data = self.load()
+        if hasattr(data, "lookup"):
+            return data.lookup(field, value)
+        return [key for key, row in list(data.items()) if row.get(field) == value]
+
+    def value_counts(self, group_field, field, group_values):
+        """ Returns (group value, value, number of rows) for the numeric
+            values of field in the rows where group_field is one of
+            group_values. Data that can count them itself, like a database
+            table, is asked to, otherwise every row is scanned """
+
+        data = self.load()
+        if hasattr(data, "value_counts"):
+            return data.value_counts(group_field, field, group_values)
+        group_values = set(group_values)
+        counts = {}
+        for row in list(data.values()):
+            value = row.get(field)
+            if row.get(group_field) in group_values and isinstance(value, (int, float)) \
+                    and not isinstance(value, bool):
+                count_key = (row[group_field], value)
+                counts[count_key] = counts.get(count_key, 0) + 1
+        return [count_key + (number,) for count_key, number in counts.items()]
+
+    def keys(self):
+        return self.load().keys()
+
+    def values(self):
+        return self.load().values()
+
+    def items(self):
+        return self.load().items()
@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+"""This module defines the store of the links between places and amenities"""
+
+from data.file_storage import FileStorage
+from data.lazy_index import LazyIndex
+
+
+class LinkStore(LazyIndex):
+    """ The place to amenity links, kept both ways: the amenities of each
+        place and the places of each amenity. The ids are kept as the keys
+        of dictionaries, so they are sets that remember their order """
+
+    def __init__(self, storage, filename, data, cached=True):
+        """ constructor. data is a LazyModelData of link rows keyed by
+            FileStorage.link_key(). A store that is not cached asks the data
+            for the links of every lookup instead """
+        self.storage = storage
+        self.filename = filename
+        # place id => amenity ids, and amenity id => place ids
+        self.__amenities = {}
+        self.__places = {}
+        super().__init__(data, cached)
+
+    def entry(self, key, row):
+        """ Returns (place id, amenity id) of a link """
+        return row["place_id"], row["amenity_id"]
+
+    def build(self):
+        """ Index every link. Call with the lock held """
+
+        self.__amenities = {}
+        self.__places = {}
+        super().build()
+
+    def update(self, key, old, new):
+        """ Replace the link old by new """
+
+        if old is not None:
+            place_id, amenity_id = old
+            for ids_by_id, id_from, id_to in ((self.__amenities, place_id, amenity_id),
+                                              (self.__places, amenity_id, place_id)):
+                ids = ids_by_id[id_from]
+                del ids[id_to]
+                if not ids:
+                    del ids_by_id[id_from]
+        if new is not None:
+            place_id, amenity_id = new
+            self.__amenities.setdefault(place_id, {})[amenity_id] = None
+            self.__places.setdefault(amenity_id, {})[place_id] = None
+
+    def linked_ids(self, by_place, row_id):
+        """ Returns the amenity ids of place row_id if by_place, otherwise
+            the place ids of amenity row_id """
+
+        if not self.cached:
+            self.load()
+            # link_ids() of a key is (place id, amenity id)
+            field, far = ("place_id", 1) if by_place else ("amenity_id", 0)
+            return [FileStorage.link_ids(key)[far] for key in self.data.lookup(field, row_id)]
+
+        with self.built():
+            ids_by_id = self.__amenities if by_place else self.__places
+            return list(ids_by_id.get(row_id, ()))
+
+    def amenities(self, place_id):
+        """ Returns the ids of the amenities of a place """
+        return self.linked_ids(True, place_id)
+
+    def places(self, amenity_id):
+        """ Returns the ids of the places that have an amenity """
+        return self.linked_ids(False, amenity_id)
+
+    def place_ids(self):
+        """ Returns the ids of the places that have any amenity """
+
+        if not self.cached:
+            self.load()
+            return list(dict.fromkeys(row["place_id"] for row in self.data.values()))
+
+        with self.built():
+            return list(self.__amenities)
+
+    def has(self, place_id, amenity_id):
+        """ Returns True if the place has the amenity """
+        return FileStorage.link_key(place_id, amenity_id) in self.data
+
+    def attach(self, place_id, amenity_id):
+        """ Link an amenity to a place and save the link.
+            Returns False if they were linked already """
+
+        key = FileStorage.link_key(place_id, amenity_id)
+        if key in self.data:
+            return False
+        self.data[key] = {"place_id": place_id, "amenity_id": amenity_id}
+        self.storage.save_model_change(self.filename, self.data, key)
+        return True
+
+    def detach(self, place_id, amenity_id):
+        """ Remove the link between an amenity and a place and save it.
+            Returns False if they were not linked """
+
+        key = FileStorage.link_key(place_id, amenity_id)
+        if key not in self.data:
+            return False
+        del self.data[key]
+        self.storage.save_model_change(self.filename, self.data, key)
+        return True
+
+    def detach_place(self, place_id):
+        """ Remove all the links of a place """
+        for amenity_id in self.amenities(place_id):
+            self.detach(place_id, amenity_id)
+
+    def detach_amenity(self, amenity_id):
+        """ Remove all the links of an amenity """
+        for place_id in self.places(amenity_id):
+            self.detach(place_id, amenity_id)
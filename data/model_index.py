@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+"""This module defines an index of the rows of a model by the value of a field"""
+
+from data.lazy_index import LazyIndex
+
+
+class ModelIndex(LazyIndex):
+    """ Keeps the ids of the rows of a model grouped by the value of one
+        of their fields, so rows can be found without scanning the data.
+        Rows where the field is None are left out """
+
+    def __init__(self, data, field, cached=True):
+        """ constructor. An index that is not cached asks the data for the
+            rows of every lookup instead """
+        self.field = field
+        # value => ids of the rows with that value. The ids are kept as the
+        # keys of a dictionary so that they stay in the order of the data
+        self.__ids = {}
+        super().__init__(data, cached)
+
+    def entry(self, key, row):
+        """ Returns the value of the field of a row """
+        return row.get(self.field)
+
+    def build(self):
+        """ Index every row of the data. Call with the lock held """
+        self.__ids = {}
+        super().build()
+
+    def update(self, key, old, new):
+        """ Move the row of key from the ids of old to those of new """
+
+        if old is not None:
+            ids = self.__ids[old]
+            del ids[key]
+            if not ids:
+                del self.__ids[old]
+        if new is not None:
+            self.__ids.setdefault(new, {})[key] = None
+
+    def lookup(self, value):
+        """ Returns the ids of the rows where the field equals value """
+
+        if not self.cached:
+            self.load()
+            return self.data.lookup(self.field, value)
+
+        with self.built():
+            return list(self.__ids.get(value, ()))
+
+    def lookup_one(self, value):
+        """ Returns the id of the first row where the field equals value,
+            or None if there is no such row """
+
+        ids = self.lookup(value)
+        return ids[0] if ids else None
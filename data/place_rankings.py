@@ -0,0 +1,94 @@
+#!/usr/bin/python3
+"""This module defines the rankings of the places of each city"""
+
+import heapq
+from bisect import bisect_left, insort
+from itertools import islice
+from data.lazy_index import LazyIndex
+from data.sorted_index import SortedIndex
+
+
+class PlaceRankings(LazyIndex):
+    """ Keeps the places of every city sorted by price and by average
+        rating, so that the top places of a city, or of the cities of a
+        country merged together, are read from the front of a list instead
+        of sorting every place """
+
+    def __init__(self, place_data, review_aggregates, cached=True):
+        """ constructor """
+        self.place_data = place_data
+        self.review_aggregates = review_aggregates
+        # city id => sorted [(price, id)]
+        self.__by_price = {}
+        # city id => sorted [(-average rating, -number of reviews, id)] of
+        # the places that have reviews, best first
+        self.__by_rating = {}
+        super().__init__(place_data, cached)
+
+        review_aggregates.add_listener(self.refresh)
+
+    def entry(self, key, row, rating=None):
+        """ Returns the city id, price entry and rating entry of a place.
+            rating is the summary of its reviews if it was looked up already """
+
+        if rating is None:
+            rating = self.review_aggregates.place(key)
+        price = row.get("price_per_night")
+        price_entry = (price, key) if SortedIndex.is_number(price) else None
+        rating_entry = None
+        if rating["count"]:
+            rating_entry = (-rating["sum"] / rating["count"], -rating["count"], key)
+        return row.get("city_id"), price_entry, rating_entry
+
+    def build(self):
+        """ Rank every place. Call with the lock held """
+
+        self.__by_price = {}
+        self.__by_rating = {}
+        self.indexed = {}
+        rows = list(self.place_data.items())
+        ratings = self.review_aggregates.places([key for key, row in rows])
+        for key, row in rows:
+            self.indexed[key] = self.entry(key, row, ratings[key])
+            self.update(key, None, self.indexed[key])
+
+    def update(self, key, old, new):
+        """ Move the place of key from the rankings of old to those of new """
+
+        if old is not None:
+            city_id, price_entry, rating_entry = old
+            for rankings, entry in ((self.__by_price, price_entry),
+                                    (self.__by_rating, rating_entry)):
+                if entry is None:
+                    continue
+                ranking = rankings[city_id]
+                del ranking[bisect_left(ranking, entry)]
+                if not ranking:
+                    del rankings[city_id]
+        if new is not None:
+            city_id, price_entry, rating_entry = new
+            if price_entry is not None:
+                insort(self.__by_price.setdefault(city_id, []), price_entry)
+            if rating_entry is not None:
+                insort(self.__by_rating.setdefault(city_id, []), rating_entry)
+
+    def load(self):
+        """ Load the places and the totals of their reviews """
+        self.place_data.load()
+        self.review_aggregates.lookup()
+
+    def top(self, city_ids, by="rating", limit=10, min_reviews=1):
+        """ Returns the ids of the first limit places of the cities of
+            city_ids, cheapest first when by is "price", or best rated first
+            among the places with at least min_reviews reviews when by is
+            "rating" """
+
+        with self.built():
+            rankings = self.__by_price if by == "price" else self.__by_rating
+            # each ranking is sorted already, merging them only reads as far
+            # as the places returned
+            merged = heapq.merge(*[rankings[city_id] for city_id in city_ids
+                                   if city_id in rankings])
+            if by != "price":
+                merged = (entry for entry in merged if -entry[1] >= min_reviews)
+            return [entry[-1] for entry in islice(merged, limit)]
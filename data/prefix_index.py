@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""This module defines an index of the rows of a model by the start of a name"""
+
+from bisect import bisect_left, bisect_right
+from data.lazy_index import LazyIndex
+
+
+class PrefixIndex(LazyIndex):
+    """ Keeps the ids of the rows of a model sorted by the lowercase value
+        of a text field, so that the rows starting with some letters are
+        next to each other and found with a binary search """
+
+    def __init__(self, data, field, cached=True):
+        """ constructor """
+        self.field = field
+        # the lowercase names in order and the id of the row of each of them
+        self.__sorted_names = []
+        self.__sorted_ids = []
+        super().__init__(data, cached)
+
+    def entry(self, key, row):
+        """ Returns the lowercase name of a row, or None """
+        value = row.get(self.field)
+        return value.lower() if isinstance(value, str) else None
+
+    def build(self):
+        """ Index every row of the data. Call with the lock held """
+
+        self.indexed = {}
+        for key, row in list(self.data.items()):
+            name = self.entry(key, row)
+            if name is not None:
+                self.indexed[key] = name
+        entries = sorted((name, key) for key, name in self.indexed.items())
+        self.__sorted_names = [name for name, key in entries]
+        self.__sorted_ids = [key for name, key in entries]
+
+    def update(self, key, old, new):
+        """ Move the row of key from the place of the name old to that of new """
+
+        if old is not None:
+            position = self.__sorted_ids.index(
+                key, bisect_left(self.__sorted_names, old), bisect_right(self.__sorted_names, old))
+            del self.__sorted_names[position]
+            del self.__sorted_ids[position]
+        if new is not None:
+            position = bisect_right(self.__sorted_names, new)
+            self.__sorted_names.insert(position, new)
+            self.__sorted_ids.insert(position, key)
+
+    def complete(self, prefix, limit=10):
+        """ Returns the ids of the first limit rows, in name order, whose
+            name starts with prefix (whatever the case) """
+
+        if not self.cached and self.data.can("complete"):
+            return self.data.complete(self.field, prefix, limit)
+
+        prefix = prefix.lower()
+
+        with self.built():
+            start = bisect_left(self.__sorted_names, prefix)
+            ids = []
+            for position in range(start, min(start + limit, len(self.__sorted_names))):
+                if not self.__sorted_names[position].startswith(prefix):
+                    break
+                ids.append(self.__sorted_ids[position])
+            return ids
@@ -0,0 +1,37 @@
+#!/usr/bin/python3
+"""This module defines an index of the places sorted by their rating"""
+
+from data.sorted_index import SortedIndex
+
+
+class RatingIndex(SortedIndex):
+    """ Keeps the ids of the places sorted by the average rating of their
+        reviews, then by id. Places without reviews are ranked at -1, below
+        every rating """
+
+    # the rating of the places that have no reviews
+    unrated = -1
+    # ratings are not a field of the places
+    stored = False
+
+    def __init__(self, place_data, review_aggregates, cached=True):
+        """ constructor """
+        self.review_aggregates = review_aggregates
+        super().__init__(place_data, "rating", cached)
+
+        review_aggregates.add_listener(self.refresh)
+
+    def values(self, rows):
+        """ Returns the average ratings of a list of (id, row) """
+
+        ratings = self.review_aggregates.places([key for key, row in rows])
+        values = []
+        for key, row in rows:
+            rating = ratings[key]
+            values.append(rating["sum"] / rating["count"] if rating["count"] else self.unrated)
+        return values
+
+    def load(self):
+        """ Load the places and the reviews """
+        self.data.load()
+        self.review_aggregates.lookup()
@@ -0,0 +1,173 @@
+#!/usr/bin/python3
+"""This module defines a class to use the data held by a data server"""
+
+import json
+import socket
+import threading
+from collections.abc import MutableMapping
+
+
+class RemoteStorage():
+    """ Class for reading from and writing to the data server over its
+        Unix domain socket, see data/data_server.py """
+
+    mode = "remote"
+
+    def __init__(self, socket_path="data/hbnb.sock"):
+        """ constructor """
+        self.socket_path = socket_path
+        self.__local = threading.local()
+
+    def request(self, op, filename, **kwargs):
+        """ Send one request to the data server and return its result """
+
+        conn = getattr(self.__local, "conn", None)
+        if conn is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.socket_path)
+            conn = sock.makefile('rwb')
+            self.__local.conn = conn
+
+        message = dict(kwargs, op=op, filename=filename)
+        try:
+            conn.write(json.dumps(message, separators=(',', ':')).encode() + b"\n")
+            conn.flush()
+            line = conn.readline()
+        except OSError:
+            # the server may have restarted, connect again next time
+            self.__local.conn = None
+            raise
+        if not line:
+            self.__local.conn = None
+            raise ConnectionError("Data server closed the connection")
+
+        response = json.loads(line)
+        if "error" in response:
+            if response["error"] == "KeyError":
+                raise KeyError(kwargs.get("key"))
+            raise Exception(response["message"])
+        return response["result"]
+
+    def load_model_data(self, filename):
+        """ Returns the data of a model as a dictionary-like object """
+        return RemoteModelData(self, filename, "load_model_data")
+
+    def load_many_to_many_data(self, filename):
+        """ Returns the place to amenity links as a dictionary-like object """
+        return RemoteModelData(self, filename, "load_many_to_many_data")
+
+    def save_model_change(self, filename, data, row_id):
+        """ Have the data server persist the change made to data[row_id] """
+        self.request("save", filename, key=row_id)
+
+    def sync(self):
+        """ Every worker reads the same data, so there is nothing to catch
+            up with """
+
+
+class RemoteModelData(MutableMapping):
+    """ Dictionary of rows keyed by id, held by the data server """
+
+    def __init__(self, storage, filename, loader):
+        """ constructor """
+        self.storage = storage
+        self.filename = filename
+        self.loader = loader
+
+    def request(self, op, **kwargs):
+        """ Send one request about this data to the data server """
+        return self.storage.request(op, self.filename, loader=self.loader, **kwargs)
+
+    def __getitem__(self, key):
+        return self.request("get", key=key)
+
+    def __setitem__(self, key, value):
+        self.request("set", key=key, value=value)
+
+    def __delitem__(self, key):
+        self.request("del", key=key)
+
+    def __contains__(self, key):
+        return self.request("contains", key=key)
+
+    def __iter__(self):
+        return iter(self.request("keys"))
+
+    def __len__(self):
+        return self.request("len")
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def get_many(self, keys):
+        """ The rows of keys that exist, in order, fetched with a single
+            request """
+        return self.request("get_many", keys=list(keys))
+
+    def page(self, field, limit, after=None, reverse=False):
+        """ A page of the rows sorted by field, read from an index kept by
+            the data server, see SortedIndex.page() """
+
+        ids, last = self.request("page", field=field, limit=limit,
+                                 after=None if after is None else list(after),
+                                 reverse=reverse)
+        return ids, None if last is None else tuple(last)
+
+    def range_ids(self, field, low=None, high=None):
+        """ The ids of the rows with a number low <= field <= high, read
+            from an index kept by the data server, see SortedIndex.lookup() """
+        return self.request("range_ids", field=field, low=low, high=high)
+
+    def range_count(self, field, low=None, high=None):
+        """ The number of rows with a number low <= field <= high, counted
+            with an index kept by the data server """
+        return self.request("range_count", field=field, low=low, high=high)
+
+    def points_within(self, south, west, north, east):
+        """ The (id, latitude, longitude) of the rows in a box, found with
+            an index kept by the data server, see GeoIndex.lookup_points() """
+        return [tuple(point) for point in self.request(
+            "points_within", south=south, west=west, north=north, east=east)]
+
+    def clusters(self, max_zoom, zoom, x, y, detail):
+        """ The clusters of places on a map tile, read from the tiles kept
+            by the data server, see TileGrid.clusters() """
+        return [tuple(cluster) for cluster in self.request(
+            "clusters", max_zoom=max_zoom, zoom=zoom, x=x, y=y, detail=detail)]
+
+    def text_search(self, fields, query):
+        """ The (id, score) of the rows with any of the words of query in
+            fields, found with an index kept by the data server, see
+            TextIndex.search() """
+        return [tuple(result) for result in self.request(
+            "text_search", fields=list(fields), query=query)]
+
+    def complete(self, field, prefix, limit):
+        """ The ids of the first limit rows whose field starts with prefix,
+            found with an index kept by the data server, see
+            PrefixIndex.complete() """
+        return self.request("complete", field=field, prefix=prefix, limit=limit)
+
+    def lookup(self, field, value):
+        """ The ids of the rows where field equals value, found with an
+            index kept by the data server """
+        return self.request("lookup", field=field, value=value)
+
+    def value_counts(self, group_field, field, group_values):
+        """ The (group value, value, number of rows) of the numeric values
+            of field in the rows where group_field is one of group_values,
+            counted by the data server with an index it keeps """
+        return [tuple(count) for count in self.request(
+            "value_counts", group_field=group_field, field=field,
+            group_values=list(group_values))]
+
+    def values(self):
+        """ All the rows, fetched with a single request """
+        return [value for key, value in self.request("items")]
+
+    def items(self):
+        """ All the (id, row) pairs, fetched with a single request """
+        return [tuple(item) for item in self.request("items")]
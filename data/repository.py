@@ -0,0 +1,54 @@
+#!/usr/bin/python3
+"""This module defines the class the blueprints read and write rows through"""
+
+
+class Repository():
+    """ Access to the rows of one model by their id. The data is keyed by
+        id, so every call here is a single lookup whatever the number of
+        rows. Writes are saved with the storage right away """
+
+    def __init__(self, storage, filename, data):
+        """ constructor """
+        self.storage = storage
+        self.filename = filename
+        self.data = data
+
+    def get(self, row_id):
+        """ Returns the row with id row_id, or None if there is none """
+        return self.data.get(row_id)
+
+    def get_many(self, row_ids):
+        """ Returns the rows with the given ids, in the same order, leaving
+            out the ids that have no row. A database or the data server
+            reads them with a single query """
+        return self.data.get_many(row_ids)
+
+    def all(self):
+        """ Returns every row """
+        return self.data.values()
+
+    def exists(self, row_id):
+        """ Returns True if there is a row with id row_id """
+        return row_id in self.data
+
+    def count(self):
+        """ Returns the number of rows """
+        return len(self.data)
+
+    def put(self, row):
+        """ Create or replace the row with id row["id"] and save it.
+            Rows changed in place must be put back too, since the data may
+            not be a plain dictionary """
+
+        self.data[row["id"]] = row
+        self.storage.save_model_change(self.filename, self.data, row["id"])
+
+    def delete(self, row_id):
+        """ Delete the row with id row_id and save the change.
+            Returns False if there was no such row """
+
+        if row_id not in self.data:
+            return False
+        del self.data[row_id]
+        self.storage.save_model_change(self.filename, self.data, row_id)
+        return True
@@ -0,0 +1,217 @@
+#!/usr/bin/python3
+"""This module defines the running review totals of each place and host"""
+
+from data.lazy_index import LazyIndex
+
+
+class ReviewAggregates(LazyIndex):
+    """ Keeps the number of reviews, the sum of their ratings and how many
+        got each rating from 0 to 5 for every place and for every host
+        (the user owning the places), so that showing them costs nothing """
+
+    def __init__(self, review_data, place_data, cached=True):
+        """ constructor """
+        self.review_data = review_data
+        self.place_data = place_data
+        # place id / host id => [count, sum of the ratings, histogram]
+        self.__places = {}
+        self.__hosts = {}
+        # place id => id of the host its reviews are counted for
+        self.__place_hosts = {}
+        # the places whose totals changed, for the listeners
+        self.__changed = []
+        self.__listeners = []
+        super().__init__(review_data, cached)
+
+        place_data.add_listener(self.refresh_place)
+
+    @staticmethod
+    def rating(row):
+        """ Returns the rating of a review, or None if it has none """
+        value = row.get("rating")
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and 0 <= value <= 5:
+            return value
+        return None
+
+    @staticmethod
+    def add_to(totals, key, rating, sign):
+        """ Count a rating in (sign 1) or out (sign -1) of totals[key] """
+
+        total = totals.setdefault(key, [0, 0, [0] * 6])
+        total[0] += sign
+        total[1] += sign * rating
+        total[2][int(rating + 0.5)] += sign
+        if total[0] == 0:
+            del totals[key]
+
+    def entry(self, key, row):
+        """ Returns (place id, rating) of a review, or None if it has no rating """
+        rating = self.rating(row)
+        return None if rating is None else (row.get("place_id"), rating)
+
+    def build(self):
+        """ Count every review. Call with the lock held """
+
+        self.__places = {}
+        self.__hosts = {}
+        self.__place_hosts = {}
+        self.__changed = []
+        super().build()
+
+    def host_of(self, place_id):
+        """ Returns the host of a place, remembering it. Call with the lock held """
+
+        if place_id not in self.__place_hosts:
+            place = self.place_data.get(place_id)
+            self.__place_hosts[place_id] = None if place is None else place.get("host_user_id")
+        return self.__place_hosts[place_id]
+
+    def update(self, key, old, new):
+        """ Count the review of key out of the totals of old and in those of new """
+
+        for entry, sign in ((old, -1), (new, 1)):
+            if entry is None:
+                continue
+            place_id, rating = entry
+            self.add_to(self.__places, place_id, rating, sign)
+            host_id = self.host_of(place_id)
+            if host_id is not None:
+                self.add_to(self.__hosts, host_id, rating, sign)
+            if place_id not in self.__changed:
+                self.__changed.append(place_id)
+
+    def add_listener(self, listener):
+        """ Have listener(place_id) called after the totals of a place
+            change, or listener(None) when they are all counted again """
+        self.__listeners.append(listener)
+
+    def notify(self, place_id):
+        """ Tell the listeners that the totals of a place changed """
+        for listener in self.__listeners:
+            listener(place_id)
+
+    def refresh(self, key):
+        """ Bring the totals up to date with the review of key, or with all
+            the reviews if key is None, and tell the listeners """
+
+        if not super().refresh(key):
+            return False
+        with self.lock:
+            changed, self.__changed = self.__changed, []
+        if key is None or not self.cached:
+            changed = [None]
+
+        # outside of the lock, the listeners read the totals
+        for place_id in changed:
+            self.notify(place_id)
+        return True
+
+    def refresh_place(self, key):
+        """ Move the totals of the place of key to its new host if it has
+            changed, or count everything again if key is None """
+
+        with self.lock:
+            if self.indexed is None:
+                return
+
+            if key is not None:
+                self.move_place(key)
+                return
+
+            self.indexed = None
+
+        self.notify(None)
+
+    def move_place(self, key):
+        """ Move the totals of a place to its new host. Call with the lock held """
+
+        if key not in self.__place_hosts:
+            return
+
+        old_host_id = self.__place_hosts.pop(key)
+        new_host_id = self.host_of(key)
+        if old_host_id == new_host_id or key not in self.__places:
+            return
+
+        # the histogram has all the ratings, rounded. Move the exact
+        # ratings of the reviews of the place instead
+        for place_id, rating in self.indexed.values():
+            if place_id != key:
+                continue
+            if old_host_id is not None:
+                self.add_to(self.__hosts, old_host_id, rating, -1)
+            if new_host_id is not None:
+                self.add_to(self.__hosts, new_host_id, rating, 1)
+
+    @staticmethod
+    def summary(total):
+        """ Returns the totals in the form they are shown """
+
+        count, rating_sum, histogram = total if total else (0, 0, [0] * 6)
+        return {
+            "count": count,
+            "sum": rating_sum,
+            "average": round(rating_sum / count, 2) if count else None,
+            "histogram": dict((str(rating), number) for rating, number in enumerate(histogram))
+        }
+
+    def load(self):
+        """ Load the reviews and the places """
+        self.review_data.load()
+        self.place_data.load()
+
+    def counted(self, place_ids, host_ids):
+        """ lookup() for totals that are not cached. The storage counts the
+            ratings of the places asked for and of the places of the hosts,
+            instead of every review being read """
+
+        place_ids = list(place_ids)
+        host_places = dict((host_id, self.place_data.lookup("host_user_id", host_id))
+                           for host_id in host_ids)
+        counted_ids = set(place_ids)
+        for host_place_ids in host_places.values():
+            counted_ids.update(host_place_ids)
+
+        places = {}
+        if counted_ids:
+            for place_id, rating, number in self.review_data.value_counts(
+                    "place_id", "rating", counted_ids):
+                if self.rating({"rating": rating}) is not None:
+                    self.add_to(places, place_id, rating, number)
+
+        hosts = {}
+        for host_id, host_place_ids in host_places.items():
+            for place_id in host_place_ids:
+                if place_id in places:
+                    count, rating_sum, histogram = places[place_id]
+                    total = hosts.setdefault(host_id, [0, 0, [0] * 6])
+                    total[0] += count
+                    total[1] += rating_sum
+                    total[2] = [a + b for a, b in zip(total[2], histogram)]
+
+        return (dict((place_id, self.summary(places.get(place_id))) for place_id in place_ids),
+                dict((host_id, self.summary(hosts.get(host_id))) for host_id in host_ids))
+
+    def lookup(self, place_ids=(), host_ids=()):
+        """ Returns ({place id: summary}, {host id: summary}) """
+
+        if not self.cached:
+            return self.counted(place_ids, host_ids)
+
+        with self.built():
+            return (dict((place_id, self.summary(self.__places.get(place_id)))
+                         for place_id in place_ids),
+                    dict((host_id, self.summary(self.__hosts.get(host_id)))
+                         for host_id in host_ids))
+
+    def place(self, place_id):
+        """ Returns the summary of the reviews of a place """
+        return self.lookup(place_ids=[place_id])[0][place_id]
+
+    def places(self, place_ids):
+        """ Returns {place id: summary} for a number of places at once """
+        return self.lookup(place_ids=place_ids)[0]
+
+    def host(self, host_id):
+        """ Returns the summary of the reviews of all the places of a host """
+        return self.lookup(host_ids=[host_id])[1][host_id]
@@ -0,0 +1,170 @@
+#!/usr/bin/python3
+"""This module defines an index of the rows of a model sorted by a number"""
+
+from bisect import bisect_left, bisect_right, insort
+from data.lazy_index import LazyIndex
+
+
+class SortedIndex(LazyIndex):
+    """ Keeps the ids of the rows of a model sorted by the value of one of
+        their numeric fields, then by id, so that the rows in a range of
+        values, or the rows after a given one, are found with a binary
+        search. Rows where the field is not a number are kept apart, by id,
+        and come after all of the others in pages """
+
+    # whether the values are fields of the rows, that a database or the
+    # data server can sort by itself when the index is not cached
+    stored = True
+
+    def __init__(self, data, field, cached=True):
+        """ constructor """
+        self.field = field
+        # the values in order and the id of the row of each of them
+        self.__sorted_values = []
+        self.__sorted_ids = []
+        # the ids of the rows whose value is not a number, in order
+        self.__other_ids = []
+        super().__init__(data, cached)
+
+    @staticmethod
+    def is_number(value):
+        """ Returns True if value can be put in the index """
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    def values(self, rows):
+        """ Returns the values to index of a list of (id, row). Call with
+            the lock held """
+        return [row.get(self.field) for key, row in rows]
+
+    def entries(self, rows):
+        """ Returns the sorted (value, id) of a list of (id, row) whose value
+            is a number, and the sorted ids of the others """
+
+        values = self.values(rows)
+        return (sorted((value, key) for (key, row), value in zip(rows, values)
+                       if self.is_number(value)),
+                sorted(key for (key, row), value in zip(rows, values)
+                       if not self.is_number(value)))
+
+    def entry(self, key, row):
+        """ Returns the (value, id) of a row, or (None, id) if its value is
+            not a number """
+        value = self.values([(key, row)])[0]
+        return (value if self.is_number(value) else None, key)
+
+    def build(self):
+        """ Index every row of the data. Call with the lock held """
+
+        entries, self.__other_ids = self.entries(list(self.data.items()))
+        self.__sorted_values = [value for value, key in entries]
+        self.__sorted_ids = [key for value, key in entries]
+        self.indexed = dict((key, (value, key)) for value, key in entries)
+        self.indexed.update((key, (None, key)) for key in self.__other_ids)
+
+    def update(self, key, old, new):
+        """ Move the row of key from the place of old to that of new """
+
+        if old is not None and old[0] is None:
+            del self.__other_ids[bisect_left(self.__other_ids, key)]
+        elif old is not None:
+            position = self.position(*old)
+            del self.__sorted_values[position]
+            del self.__sorted_ids[position]
+
+        if new is not None and new[0] is None:
+            insort(self.__other_ids, key)
+        elif new is not None:
+            position = self.position(*new)
+            self.__sorted_values.insert(position, new[0])
+            self.__sorted_ids.insert(position, key)
+
+    def position(self, value, key, after=False):
+        """ Returns the position of the row (value, key), or where it would
+            go, or the position past it if after is True. Call with the lock
+            held """
+
+        start = bisect_left(self.__sorted_values, value)
+        end = bisect_right(self.__sorted_values, value)
+        if after:
+            return bisect_right(self.__sorted_ids, key, start, end)
+        return bisect_left(self.__sorted_ids, key, start, end)
+
+    def bounds(self, low, high):
+        """ Returns the positions of the first value from low and of the
+            first value past high. Call with the lock held """
+
+        start = 0 if low is None else bisect_left(self.__sorted_values, low)
+        end = len(self.__sorted_values) if high is None \
+            else bisect_right(self.__sorted_values, high)
+        return start, max(start, end)
+
+    def count(self, low=None, high=None):
+        """ Returns the number of rows with low <= value <= high.
+            A bound of None is open """
+
+        if not self.cached and self.stored and self.data.can("range_count"):
+            return self.data.range_count(self.field, low, high)
+
+        with self.built():
+            start, end = self.bounds(low, high)
+            return end - start
+
+    def lookup(self, low=None, high=None):
+        """ Returns the ids of the rows with low <= value <= high, in the
+            order of their values. A bound of None is open """
+
+        if not self.cached and self.stored and self.data.can("range_ids"):
+            return self.data.range_ids(self.field, low, high)
+
+        with self.built():
+            start, end = self.bounds(low, high)
+            return self.__sorted_ids[start:end]
+
+    def positions(self, ids):
+        """ Returns the (value, id) of the rows of ids, in order, followed by
+            the (None, id) of the rows whose value is not a number, by id """
+
+        if not self.cached and self.stored:
+            # only read the rows asked for instead of building the index
+            entries, other_ids = self.entries(
+                [(row["id"], row) for row in self.data.get_many(ids)])
+            return entries + [(None, key) for key in other_ids]
+
+        with self.built():
+            entries = [self.indexed.get(key, (None, key)) for key in ids]
+            return sorted(entry for entry in entries if entry[0] is not None) \
+                + sorted(entry for entry in entries if entry[0] is None)
+
+    def page(self, limit, after=None, reverse=False):
+        """ Returns the ids of the limit rows that come after the row
+            (value, id) of after, or the first ones if after is None, and
+            the (value, id) of the last row if there are more rows past it.
+            reverse goes from the highest value down. The rows whose value
+            is not a number come last either way, by id, as (None, id) """
+
+        if not self.cached and self.stored and self.data.can("page"):
+            return self.data.page(self.field, limit, after, reverse)
+
+        with self.built():
+            # one more row than asked for tells whether there are more
+            entries = []
+            other_start = 0
+            if after is not None and after[0] is None:
+                other_start = bisect_right(self.__other_ids, after[1])
+            elif reverse:
+                end = len(self.__sorted_ids) if after is None else self.position(*after)
+                start = max(0, end - limit - 1)
+                entries = [(self.__sorted_values[position], self.__sorted_ids[position])
+                           for position in range(end - 1, start - 1, -1)]
+            else:
+                start = 0 if after is None else self.position(*after, after=True)
+                end = min(len(self.__sorted_ids), start + limit + 1)
+                entries = [(self.__sorted_values[position], self.__sorted_ids[position])
+                           for position in range(start, end)]
+
+            if len(entries) <= limit:
+                other_end = other_start + limit + 1 - len(entries)
+                entries += [(None, key) for key in self.__other_ids[other_start:other_end]]
+
+            ids = [key for value, key in entries[:limit]]
+            return ids, entries[limit - 1] if len(entries) > limit else None
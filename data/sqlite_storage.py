@@ -0,0 +1,619 @@
+#!/usr/bin/python3
+"""This module defines a class to manage SQLite storage for hbnb evolution"""
+
+import sqlite3
+import sys
+import threading
+from collections.abc import MutableMapping
+from pathlib import Path
+from data.file_storage import FileStorage
+from data.text_index import TextIndex, text_words, tokenize
+
+
+class SQLiteStorage():
+    """ Class for reading from and writing to a SQLite database """
+
+    mode = "sqlite"
+
+    # columns of the table of each model, apart from the id
+    columns = {
+        "Country": ["name", "code", "created_at", "updated_at"],
+        "City": ["country_id", "name", "created_at", "updated_at"],
+        "Amenity": ["name", "created_at", "updated_at"],
+        "Place": ["host_user_id", "city_id", "name", "description", "address",
+                  "latitude", "longitude", "number_of_rooms", "bathrooms",
+                  "price_per_night", "max_guests", "created_at", "updated_at"],
+        "User": ["first_name", "last_name", "email", "password",
+                 "created_at", "updated_at"],
+        "Review": ["commentor_user_id", "place_id", "feedback", "rating",
+                   "created_at", "updated_at"],
+    }
+
+    # columns that are looked up by value and need an index
+    indexes = {
+        "Country": ["code"],
+        "City": ["country_id"],
+        "Amenity": ["name"],
+        "Place": ["city_id", "host_user_id", "latitude"],
+        "User": ["email"],
+        "Review": ["place_id", "commentor_user_id"],
+    }
+
+    # numeric columns that rows are sorted and paged by, indexed with the
+    # id that breaks ties
+    sorted_indexes = {
+        "Country": ["created_at"],
+        "City": ["created_at"],
+        "Amenity": ["created_at"],
+        "Place": ["created_at", "price_per_night", "max_guests", "number_of_rooms",
+                  "bathrooms"],
+        "User": ["created_at"],
+        "Review": ["created_at"],
+    }
+
+    # text columns searched by their words, kept in a table of the words of
+    # each row and one of the number of words of each row
+    text_indexes = {
+        "Place": ["name", "description", "address"],
+        "Review": ["feedback"],
+    }
+
+    # text columns that rows are found by the start of, whatever the case,
+    # indexed in lowercase
+    prefix_indexes = {
+        "Country": ["name"],
+        "City": ["name"],
+    }
+
+    def __init__(self, database="data/hbnb.db"):
+        """ constructor """
+        self.database = database
+        self.__local = threading.local()
+
+        conn = self.connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS sources (
+            filename TEXT PRIMARY KEY, table_name TEXT, model TEXT)""")
+
+    def connection(self):
+        """ Returns the connection to the database of the current thread """
+
+        conn = getattr(self.__local, "conn", None)
+        if conn is None:
+            # isolation_level=None so that every statement commits by itself
+            conn = sqlite3.connect(self.database, isolation_level=None)
+            # Python's lower() for the prefix indexes, which SQLite's only
+            # does for ASCII letters
+            conn.create_function("py_lower", 1, lambda value: value.lower()
+                                 if isinstance(value, str) else None, deterministic=True)
+            self.__local.conn = conn
+        return conn
+
+    @staticmethod
+    def table_name(filename):
+        """ Returns the name of the table holding the data of a file """
+        return Path(filename).stem.replace(".", "_")
+
+    def source_model(self, filename):
+        """ Returns the model imported from filename, None if not imported """
+
+        row = self.connection().execute(
+            "SELECT model FROM sources WHERE filename = ?", (filename,)).fetchone()
+        return row[0] if row else None
+
+    def has_table(self, table):
+        """ Returns True if the database has a table of that name """
+        return self.connection().execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (table,)).fetchone() is not None
+
+    def create_model_table(self, table, model):
+        """ Create the table and indexes for a model """
+
+        if model not in self.columns:
+            raise ValueError("Invalid model specified: {}".format(model))
+
+        conn = self.connection()
+        # columns have no declared type so that ints and floats come back
+        # exactly as they were saved
+        for suffix in ("", "_words", "_lengths", "_totals"):
+            conn.execute("DROP TABLE IF EXISTS {}{}".format(table, suffix))
+        conn.execute("CREATE TABLE {} (id TEXT PRIMARY KEY, {})".format(
+            table, ", ".join(self.columns[model])))
+        self.create_indexes(table, model)
+        self.create_text_tables(table, model)
+
+    def create_indexes(self, table, model):
+        """ Create the indexes of a model that are missing, so that a
+            database imported before an index was added gets it too """
+
+        conn = self.connection()
+        for column in self.indexes.get(model, []):
+            conn.execute("CREATE INDEX IF NOT EXISTS {0}_{1} ON {0} ({1})".format(table, column))
+        for column in self.sorted_indexes.get(model, []):
+            conn.execute("CREATE INDEX IF NOT EXISTS {0}_{1}_id ON {0} ({1}, id)".format(
+                table, column))
+        for column in self.prefix_indexes.get(model, []):
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS {0}_{1}_lower ON {0} (py_lower({1}), id)".format(
+                    table, column))
+
+    def create_text_tables(self, table, model):
+        """ Create the tables of the words of the text columns of a model.
+            Returns True if they are new and have to be filled """
+
+        if model not in self.text_indexes or self.has_table(table + "_totals"):
+            return False
+
+        conn = self.connection()
+        conn.execute("""CREATE TABLE {}_words (word TEXT, id TEXT, count INTEGER,
+            PRIMARY KEY (word, id))""".format(table))
+        conn.execute("CREATE INDEX {0}_words_id ON {0}_words (id)".format(table))
+        conn.execute("CREATE TABLE {}_lengths (id TEXT PRIMARY KEY, length INTEGER)".format(table))
+        # the number of rows and of their words, which the scores need
+        conn.execute("CREATE TABLE {}_totals (row_count INTEGER, word_count INTEGER)".format(
+            table))
+        conn.execute("INSERT INTO {}_totals VALUES (0, 0)".format(table))
+        return True
+
+    def create_missing_text_tables(self, table, model):
+        """ Create and fill the tables of the words of a model if they are
+            missing, for a database imported before they were added """
+
+        if model not in self.text_indexes or self.has_table(table + "_totals"):
+            return
+
+        conn = self.connection()
+        # IMMEDIATE so that only one process fills them
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.create_text_tables(table, model):
+                data = SQLiteModelData(self, table, model)
+                for key, row in data.items():
+                    data.index_words(key, row)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def import_model_file(self, filename):
+        """ Import (or re-import) the data of a JSON file into its table """
+
+        json_storage = FileStorage()
+        rows = json_storage.load_model_data(filename)
+        model = json_storage.model_key(filename)
+        table = self.table_name(filename)
+
+        conn = self.connection()
+        conn.execute("BEGIN")
+        try:
+            self.create_model_table(table, model)
+            data = SQLiteModelData(self, table, model)
+            conn.executemany(data.insert_sql, (data.row_values(row) for row in rows.values()))
+            for key, row in rows.items():
+                data.index_words(key, row)
+            conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?)",
+                         (filename, table, model))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def import_many_to_many_file(self, filename):
+        """ Import (or re-import) the place to amenity links of a JSON file """
+
+        links = FileStorage().load_many_to_many_data(filename)
+        table = self.table_name(filename)
+
+        conn = self.connection()
+        conn.execute("BEGIN")
+        try:
+            conn.execute("DROP TABLE IF EXISTS {}".format(table))
+            conn.execute("""CREATE TABLE {} (place_id TEXT, amenity_id TEXT,
+                PRIMARY KEY (place_id, amenity_id))""".format(table))
+            conn.execute("CREATE INDEX {0}_amenity_id ON {0} (amenity_id)".format(table))
+            conn.executemany(
+                "INSERT OR IGNORE INTO {} VALUES (?, ?)".format(table),
+                ((row["place_id"], row["amenity_id"]) for row in links.values()))
+            conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?)",
+                         (filename, table, "Place_to_Amenity"))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def load_model_data(self, filename):
+        """ Returns the data of a model as a dictionary-like object.
+            The JSON file is imported the first time it is loaded """
+
+        if self.source_model(filename) is None:
+            self.import_model_file(filename)
+
+        model = self.source_model(filename)
+        self.create_indexes(self.table_name(filename), model)
+        self.create_missing_text_tables(self.table_name(filename), model)
+        return SQLiteModelData(self, self.table_name(filename), model)
+
+    def load_many_to_many_data(self, filename):
+        """ Returns the place to amenity links as a dictionary-like object """
+
+        if self.source_model(filename) is None:
+            self.import_many_to_many_file(filename)
+
+        return SQLiteManyToManyData(self, self.table_name(filename))
+
+    def save_model_change(self, filename, data, row_id):
+        """ Changes are written to the database as soon as they are made
+            to the data, so there is nothing left to do here """
+
+    def sync(self):
+        """ Every process reads the same database, so there is nothing to
+            catch up with """
+
+
+class SQLiteModelData(MutableMapping):
+    """ Dictionary of rows keyed by id, backed by a table """
+
+    def __init__(self, storage, table, model):
+        """ constructor """
+        self.storage = storage
+        self.table = table
+        self.fields = ["id"] + storage.columns[model]
+        self.text_fields = storage.text_indexes.get(model)
+        self.select_sql = "SELECT {} FROM {}".format(", ".join(self.fields), table)
+        self.insert_sql = "INSERT OR REPLACE INTO {} VALUES ({})".format(
+            table, ", ".join("?" for _ in self.fields))
+
+    def row_values(self, row):
+        """ Returns the values of a row in column order """
+        return [row.get(field) for field in self.fields]
+
+    def __getitem__(self, key):
+        row = self.storage.connection().execute(
+            self.select_sql + " WHERE id = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return dict(zip(self.fields, row))
+
+    def index_words(self, key, row):
+        """ Replace the words kept of the row of key by those of row, or
+            remove them if row is None. Call in a transaction """
+
+        if not self.text_fields:
+            return
+
+        conn = self.storage.connection()
+        old = conn.execute("SELECT length FROM {}_lengths WHERE id = ?".format(self.table),
+                           (key,)).fetchone()
+        if old is not None:
+            conn.execute("DELETE FROM {}_words WHERE id = ?".format(self.table), (key,))
+            conn.execute("DELETE FROM {}_lengths WHERE id = ?".format(self.table), (key,))
+            conn.execute("UPDATE {}_totals SET row_count = row_count - 1, "
+                         "word_count = word_count - ?".format(self.table), old)
+        if row is None:
+            return
+
+        words = text_words(row, self.text_fields)
+        counts = {}
+        for word in words:
+            counts[word] = counts.get(word, 0) + 1
+        conn.executemany("INSERT INTO {}_words VALUES (?, ?, ?)".format(self.table),
+                         ((word, key, count) for word, count in counts.items()))
+        conn.execute("INSERT INTO {}_lengths VALUES (?, ?)".format(self.table),
+                     (key, len(words)))
+        conn.execute("UPDATE {}_totals SET row_count = row_count + 1, "
+                     "word_count = word_count + ?".format(self.table), (len(words),))
+
+    def write(self, statements):
+        """ Run statements(), in a transaction if the words of the rows are
+            kept too """
+
+        conn = self.storage.connection()
+        if not self.text_fields:
+            return statements()
+
+        conn.execute("BEGIN")
+        try:
+            result = statements()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def __setitem__(self, key, value):
+        def statements():
+            self.storage.connection().execute(self.insert_sql, self.row_values(value))
+            self.index_words(key, value)
+        self.write(statements)
+
+    def __delitem__(self, key):
+        def statements():
+            cursor = self.storage.connection().execute(
+                "DELETE FROM {} WHERE id = ?".format(self.table), (key,))
+            if cursor.rowcount == 0:
+                raise KeyError(key)
+            self.index_words(key, None)
+        self.write(statements)
+
+    def __contains__(self, key):
+        return self.storage.connection().execute(
+            "SELECT 1 FROM {} WHERE id = ?".format(self.table), (key,)).fetchone() is not None
+
+    def __iter__(self):
+        for row in self.storage.connection().execute("SELECT id FROM {}".format(self.table)):
+            yield row[0]
+
+    def __len__(self):
+        return self.storage.connection().execute(
+            "SELECT COUNT(*) FROM {}".format(self.table)).fetchone()[0]
+
+    def check_field(self, field):
+        """ Fields are put in the SQL, so only columns are allowed """
+        if field not in self.fields:
+            raise ValueError("Invalid field specified: {}".format(field))
+
+    def get_many(self, keys):
+        """ The rows of keys that exist, in the same order, read with a
+            query for every 500 of them """
+
+        keys = list(keys)
+        rows = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            for row in self.storage.connection().execute(
+                    self.select_sql + " WHERE id IN ({})".format(", ".join("?" for _ in chunk)),
+                    chunk):
+                rows[row[0]] = dict(zip(self.fields, row))
+        return [rows[key] for key in keys if key in rows]
+
+    def page(self, field, limit, after=None, reverse=False):
+        """ The ids of the limit rows sorted by field, then id, that come
+            after the row (value, id) of after, and the (value, id) of the
+            last one if there are more, read with keyset queries on the
+            index of field. Works like SortedIndex.page(): rows whose value
+            is not a number come last, by id, as (None, id) """
+
+        self.check_field(field)
+        conn = self.storage.connection()
+        number = "typeof({}) IN ('integer', 'real')".format(field)
+
+        # one more row than asked for tells whether there are more
+        entries = []
+        other_after = None
+        if after is not None and after[0] is None:
+            other_after = after[1]
+        else:
+            sql = "SELECT {}, id FROM {} WHERE {}".format(field, self.table, number)
+            params = []
+            if after is not None:
+                sql += " AND ({0} {1} ? OR ({0} = ? AND id {1} ?))".format(
+                    field, "<" if reverse else ">")
+                params = [after[0], after[0], after[1]]
+            sql += " ORDER BY {0}{1}, id{1} LIMIT ?".format(field, " DESC" if reverse else "")
+            entries = [tuple(row) for row in conn.execute(sql, params + [limit + 1])]
+
+        if len(entries) <= limit:
+            sql = "SELECT id FROM {} WHERE NOT {}".format(self.table, number)
+            params = []
+            if other_after is not None:
+                sql += " AND id > ?"
+                params = [other_after]
+            sql += " ORDER BY id LIMIT ?"
+            entries += [(None, row[0]) for row in conn.execute(
+                sql, params + [limit + 1 - len(entries)])]
+
+        ids = [key for value, key in entries[:limit]]
+        return ids, entries[limit - 1] if len(entries) > limit else None
+
+    def range_where(self, field, low, high):
+        """ Returns the WHERE clause and its parameters of the rows with a
+            number low <= field <= high. A bound of None is open """
+
+        self.check_field(field)
+        sql = " WHERE typeof({0}) IN ('integer', 'real')".format(field)
+        params = []
+        if low is not None:
+            sql += " AND {} >= ?".format(field)
+            params.append(low)
+        if high is not None:
+            sql += " AND {} <= ?".format(field)
+            params.append(high)
+        return sql, params
+
+    def range_ids(self, field, low=None, high=None):
+        """ The ids of the rows with a number low <= field <= high, by
+            value then id like SortedIndex.lookup(), read from the index of
+            field """
+
+        sql, params = self.range_where(field, low, high)
+        return [row[0] for row in self.storage.connection().execute(
+            "SELECT id FROM {}{} ORDER BY {}, id".format(self.table, sql, field), params)]
+
+    def range_count(self, field, low=None, high=None):
+        """ The number of rows with a number low <= field <= high, counted
+            on the index of field """
+
+        sql, params = self.range_where(field, low, high)
+        return self.storage.connection().execute(
+            "SELECT COUNT(*) FROM {}{}".format(self.table, sql), params).fetchone()[0]
+
+    def points_within(self, south, west, north, east):
+        """ The (id, latitude, longitude) of the rows in a box, which
+            doesn't cross the 180th meridian, found with the index of the
+            latitude. In the order of the table, so that the sums of their
+            coordinates come out like in the other storages """
+
+        self.check_field("latitude")
+        self.check_field("longitude")
+        return [tuple(row) for row in self.storage.connection().execute(
+            "SELECT id, latitude, longitude FROM {} WHERE typeof(latitude) IN "
+            "('integer', 'real') AND typeof(longitude) IN ('integer', 'real') AND "
+            "latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ? ORDER BY rowid".format(
+                self.table), (south, north, west, east))]
+
+    def text_search(self, fields, query):
+        """ The (id, score) of the rows with any of the words of query in
+            fields, best match first, scored like TextIndex.search() from
+            the tables of the words of the rows """
+
+        if list(fields) != self.text_fields:
+            raise ValueError("No text index on: {}".format(", ".join(fields)))
+
+        conn = self.storage.connection()
+        words = set(tokenize(query))
+        count, total_length = conn.execute(
+            "SELECT row_count, word_count FROM {}_totals".format(self.table)).fetchone()
+
+        # in the order the words were written, like the postings of TextIndex
+        postings = {}
+        for word in words:
+            word_postings = dict(conn.execute(
+                "SELECT id, count FROM {}_words WHERE word = ? ORDER BY rowid".format(self.table),
+                (word,)).fetchall())
+            if word_postings:
+                postings[word] = word_postings
+
+        keys = list(set(key for word_postings in postings.values() for key in word_postings))
+        lengths = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            lengths.update(conn.execute(
+                "SELECT id, length FROM {}_lengths WHERE id IN ({})".format(
+                    self.table, ", ".join("?" for _ in chunk)), chunk).fetchall())
+
+        return TextIndex.rank(words, count, total_length, postings, lengths)
+
+    def complete(self, field, prefix, limit):
+        """ The ids of the first limit rows, by lowercase field then id,
+            whose field starts with prefix whatever the case, read from the
+            lowercase index of field like PrefixIndex.complete() """
+
+        self.check_field(field)
+        prefix = prefix.lower()
+        sql = "SELECT id FROM {0} WHERE py_lower({1}) >= ?".format(self.table, field)
+        params = [prefix]
+        # the names starting with prefix come before the prefix with its
+        # last letter moved to the next one
+        if prefix and ord(prefix[-1]) < sys.maxunicode:
+            sql += " AND py_lower({}) < ?".format(field)
+            params.append(prefix[:-1] + chr(ord(prefix[-1]) + 1))
+        sql += " AND substr(py_lower({0}), 1, ?) = ? ORDER BY py_lower({0}), id LIMIT ?".format(
+            field)
+        return [row[0] for row in self.storage.connection().execute(
+            sql, params + [len(prefix), prefix, limit])]
+
+    def lookup(self, field, value):
+        """ The ids of the rows where field equals value, found by the
+            database, with the index of the field if it has one """
+
+        self.check_field(field)
+        return [row[0] for row in self.storage.connection().execute(
+            "SELECT id FROM {} WHERE {} = ?".format(self.table, field), (value,))]
+
+    def value_counts(self, group_field, field, group_values):
+        """ The (group value, value, number of rows) of the numeric values
+            of field in the rows where group_field is one of group_values,
+            counted by the database for every 500 of them, with the index
+            of group_field if it has one """
+
+        self.check_field(group_field)
+        self.check_field(field)
+        group_values = list(group_values)
+        counts = []
+        for start in range(0, len(group_values), 500):
+            chunk = group_values[start:start + 500]
+            counts += [tuple(row) for row in self.storage.connection().execute(
+                "SELECT {0}, {1}, COUNT(*) FROM {2} WHERE {0} IN ({3}) AND typeof({1}) "
+                "IN ('integer', 'real') GROUP BY {0}, {1}".format(
+                    group_field, field, self.table, ", ".join("?" for _ in chunk)),
+                chunk)]
+        return counts
+
+    def values(self):
+        """ All the rows, read with a single query. A list like the dict
+            views of the other storages, so it can be gone through twice """
+        return [dict(zip(self.fields, row))
+                for row in self.storage.connection().execute(self.select_sql)]
+
+    def items(self):
+        """ All the (id, row) pairs, read with a single query """
+        return [(row["id"], row) for row in self.values()]
+
+
+class SQLiteManyToManyData(MutableMapping):
+    """ Dictionary of place to amenity link rows keyed by
+        FileStorage.link_key(), backed by a table """
+
+    def __init__(self, storage, table):
+        """ constructor """
+        self.storage = storage
+        self.table = table
+
+    def __getitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        place_id, amenity_id = FileStorage.link_ids(key)
+        return {"place_id": place_id, "amenity_id": amenity_id}
+
+    def __setitem__(self, key, value):
+        self.storage.connection().execute(
+            "INSERT OR IGNORE INTO {} VALUES (?, ?)".format(self.table),
+            (value["place_id"], value["amenity_id"]))
+
+    def __delitem__(self, key):
+        cursor = self.storage.connection().execute(
+            "DELETE FROM {} WHERE place_id = ? AND amenity_id = ?".format(self.table),
+            FileStorage.link_ids(key))
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        try:
+            link_ids = FileStorage.link_ids(key)
+        except KeyError:
+            return False
+        return self.storage.connection().execute(
+            "SELECT 1 FROM {} WHERE place_id = ? AND amenity_id = ?".format(self.table),
+            link_ids).fetchone() is not None
+
+    def __iter__(self):
+        for row in self.values():
+            yield FileStorage.link_key(row["place_id"], row["amenity_id"])
+
+    def __len__(self):
+        return self.storage.connection().execute(
+            "SELECT COUNT(*) FROM {}".format(self.table)).fetchone()[0]
+
+    def lookup(self, field, value):
+        """ The link keys of the links where field (place_id or amenity_id)
+            equals value, found with the primary key or the amenity index """
+
+        if field not in ("place_id", "amenity_id"):
+            raise ValueError("Invalid field specified: {}".format(field))
+        return [FileStorage.link_key(row[0], row[1]) for row in self.storage.connection().execute(
+            "SELECT place_id, amenity_id FROM {} WHERE {} = ?".format(self.table, field),
+            (value,))]
+
+    def values(self):
+        """ All the links, read with a single query """
+        return [{"place_id": row[0], "amenity_id": row[1]}
+                for row in self.storage.connection().execute(
+                    "SELECT place_id, amenity_id FROM {}".format(self.table))]
+
+    def items(self):
+        """ All the (link key, link) pairs, read with a single query """
+        return [(FileStorage.link_key(row["place_id"], row["amenity_id"]), row)
+                for row in self.values()]
+
+
+# Import or re-import JSON files into the database
+# command to use: python3 -m data.sqlite_storage data/place.json data/review.json
+if __name__ == '__main__':
+    sqlite_storage = SQLiteStorage()
+    for json_filename in sys.argv[1:]:
+        if json_filename.endswith("place_to_amenity.json"):
+            sqlite_storage.import_many_to_many_file(json_filename)
+        else:
+            sqlite_storage.import_model_file(json_filename)
+        print("Imported {}".format(json_filename))
@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+"""This module defines a full-text index of the rows of a model"""
+
+import math
+import re
+from data.lazy_index import LazyIndex
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """ Returns the lowercase words of text """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def text_words(row, fields):
+    """ Returns the words of the text fields of a row, in order """
+
+    words = []
+    for field in fields:
+        if isinstance(row.get(field), str):
+            words.extend(tokenize(row[field]))
+    return tuple(words)
+
+
+class TextIndex(LazyIndex):
+    """ Inverted index of the words in some text fields of the rows of a
+        model, ranking matches with BM25 """
+
+    # BM25 parameters: how fast repeated words stop counting, and how much
+    # long texts are penalised
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, data, fields, cached=True):
+        """ constructor """
+        self.fields = fields
+        # word => {id: number of times the word is in the row}
+        self.__postings = {}
+        # the number of words of all the rows
+        self.__total_length = 0
+        super().__init__(data, cached)
+
+    def entry(self, key, row):
+        """ Returns the words of the indexed fields of a row """
+        return text_words(row, self.fields)
+
+    def build(self):
+        """ Index every row of the data. Call with the lock held """
+
+        self.__postings = {}
+        self.__total_length = 0
+        super().build()
+
+    def update(self, key, old, new):
+        """ Replace the words old of the row of key by new """
+
+        if old is not None:
+            self.__total_length -= len(old)
+            for word in set(old):
+                del self.__postings[word][key]
+                if not self.__postings[word]:
+                    del self.__postings[word]
+        if new is not None:
+            self.__total_length += len(new)
+            for word in new:
+                postings = self.__postings.setdefault(word, {})
+                postings[key] = postings.get(key, 0) + 1
+
+    @classmethod
+    def rank(cls, words, count, total_length, postings, lengths):
+        """ Returns (id, score) of the rows with any of words, best match
+            first. count and total_length are the number of rows and of
+            their words, postings is {word: {id: number of times the word
+            is in the row}} and lengths {id: number of words of the row} """
+
+        average_length = total_length / count if count else 0
+
+        scores = {}
+        for word in words:
+            word_postings = postings.get(word, {})
+            idf = math.log(1 + (count - len(word_postings) + 0.5) / (len(word_postings) + 0.5))
+            for key, frequency in word_postings.items():
+                length_ratio = lengths[key] / average_length if average_length else 0
+                scores[key] = scores.get(key, 0) + idf * frequency * (cls.k1 + 1) / (
+                    frequency + cls.k1 * (1 - cls.b + cls.b * length_ratio))
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+    def search(self, query):
+        """ Returns (id, score) of the rows with any of the words of query,
+            best match first """
+
+        if not self.cached and self.data.can("text_search"):
+            return self.data.text_search(self.fields, query)
+
+        words = set(tokenize(query))
+
+        with self.built():
+            postings = dict((word, self.__postings[word])
+                            for word in words if word in self.__postings)
+            lengths = dict((key, len(self.indexed[key]))
+                           for word_postings in postings.values() for key in word_postings)
+            return self.rank(words, len(self.indexed), self.__total_length, postings, lengths)
@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+"""This module defines the counts of places in the map tiles of every zoom"""
+
+import math
+from data.geo_index import GeoIndex
+from data.lazy_index import LazyIndex
+
+# web maps can't show the poles, latitudes are clamped to this
+MAX_LATITUDE = 85.05112878
+
+
+def tile_of(lat, lon, zoom):
+    """ Returns (x, y) of the web map (Web Mercator) tile a point is in """
+
+    n = 2 ** zoom
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    lat_rad = math.radians(lat)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bounds(x, y, zoom):
+    """ Returns (south, west, north, east) of a tile, in degrees. The tiles
+        on the edges of the map go on forever, as tile_of() puts the points
+        past the edges in them """
+
+    n = 2 ** zoom
+
+    def latitude(tile_y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return (-math.inf if y == n - 1 else latitude(y + 1),
+            -math.inf if x == 0 else x / n * 360.0 - 180.0,
+            math.inf if y == 0 else latitude(y),
+            math.inf if x == n - 1 else (x + 1) / n * 360.0 - 180.0)
+
+
+class TileGrid(LazyIndex):
+    """ Keeps, for every zoom level, the number of places in each map tile
+        and the sum of their coordinates, so that the clusters shown on a
+        tile are read from a fixed number of cells whatever the number of
+        places """
+
+    def __init__(self, data, max_zoom=22, cached=True):
+        """ constructor """
+        self.max_zoom = max_zoom
+        # one dictionary per zoom level of (x, y) => [count, sum of the
+        # latitudes, sum of the longitudes] of the places in that tile
+        self.__levels = []
+        super().__init__(data, cached)
+
+    def entry(self, key, row):
+        """ Returns (latitude, longitude) of a place, or None """
+        return GeoIndex.point(row)
+
+    def build(self):
+        """ Count every place. Call with the lock held """
+        self.__levels = [{} for zoom in range(self.max_zoom + 1)]
+        super().build()
+
+    def add(self, point, sign):
+        """ Count a place in (sign 1) or out (sign -1) of the tile it is in
+            at every zoom level. Call with the lock held """
+
+        lat, lon = point
+        for zoom, cells in enumerate(self.__levels):
+            cell = tile_of(lat, lon, zoom)
+            totals = cells.setdefault(cell, [0, 0.0, 0.0])
+            totals[0] += sign
+            totals[1] += sign * lat
+            totals[2] += sign * lon
+            if totals[0] == 0:
+                del cells[cell]
+
+    def update(self, key, old, new):
+        """ Move the place of key from the tiles of old to those of new """
+
+        if old is not None:
+            self.add(old, -1)
+        if new is not None:
+            self.add(new, 1)
+
+    def clusters(self, zoom, x, y, detail=3):
+        """ Returns the clusters of places on tile (x, y) of a zoom level as
+            (count, latitude, longitude) of their centroid. The tile is split
+            in 2 ** detail by 2 ** detail cells, one cluster per cell that
+            has any place, as long as the grid goes that deep """
+
+        if not self.cached and self.data.can("clusters"):
+            return self.data.clusters(self.max_zoom, zoom, x, y, detail)
+
+        cell_zoom = min(zoom + detail, self.max_zoom)
+        side = 2 ** (cell_zoom - zoom)
+
+        if not self.cached and self.data.can("points_within"):
+            return self.cell_clusters(self.tile_cells(zoom, x, y, cell_zoom), x, y, side)
+
+        with self.built():
+            return self.cell_clusters(self.__levels[cell_zoom], x, y, side)
+
+    def tile_cells(self, zoom, x, y, cell_zoom):
+        """ Returns the totals of the places on tile (x, y) of zoom in each
+            tile of cell_zoom, like the level of cell_zoom has them, counted
+            from the places in the box of the tile only """
+
+        south, west, north, east = tile_bounds(x, y, zoom)
+        # a slightly bigger box so that rounding leaves no place out,
+        # tile_of() says which are on the tile
+        margin = 1e-9
+        cells = {}
+        for key, lat, lon in self.data.points_within(
+                south - margin, west - margin, north + margin, east + margin):
+            if tile_of(lat, lon, zoom) == (x, y):
+                totals = cells.setdefault(tile_of(lat, lon, cell_zoom), [0, 0.0, 0.0])
+                totals[0] += 1
+                totals[1] += lat
+                totals[2] += lon
+        return cells
+
+    @staticmethod
+    def cell_clusters(cells, x, y, side):
+        """ Returns the clusters of the side by side cells of tile (x, y) """
+
+        clusters = []
+        for cell_x in range(x * side, (x + 1) * side):
+            for cell_y in range(y * side, (y + 1) * side):
+                totals = cells.get((cell_x, cell_y))
+                if totals is not None:
+                    count, lat_sum, lon_sum = totals
+                    clusters.append((count, lat_sum / count, lon_sum / count))
+        return clusters
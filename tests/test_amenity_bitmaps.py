@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from data.amenity_bitmaps import AmenityBitmaps, bits_of, ordinals_of
+from data.file_storage import FileStorage
+from data.lazy_model_data import LazyModelData
+
+
+def link(place_id, amenity_id):
+    """ Returns the (key, row) of a place to amenity link """
+    return FileStorage.link_key(place_id, amenity_id), {"place_id": place_id, "amenity_id": amenity_id}
+
+
+class TestAmenityBitmaps(unittest.TestCase):
+    """Test amenity searches on the bitmaps
+    """
+
+    def setUp(self):
+        self.places = LazyModelData(lambda: {
+            "p1": {"id": "p1"}, "p2": {"id": "p2"}, "p3": {"id": "p3"}})
+        self.links = LazyModelData(lambda: dict([
+            link("p1", "wifi"), link("p1", "pool"), link("p2", "wifi"), link("p3", "spa")]))
+        self.bitmaps = AmenityBitmaps(self.places, self.links)
+
+    def test_search(self):
+        """ Tests AND, OR and NOT clauses and the facet counts """
+
+        self.assertEqual(self.bitmaps.search([(False, ["wifi"])])[0], ["p1", "p2"])
+        self.assertEqual(self.bitmaps.search([(False, ["wifi"]), (False, ["pool"])])[0], ["p1"])
+        self.assertEqual(self.bitmaps.search([(False, ["pool", "spa"])])[0], ["p1", "p3"])
+        self.assertEqual(self.bitmaps.search([(True, ["wifi"])])[0], ["p3"])
+
+        place_ids, facets = self.bitmaps.search([(False, ["wifi"])])
+        self.assertEqual(facets, {"wifi": 2, "pool": 1, "spa": 0})
+
+        place_ids, facets = self.bitmaps.search([(False, ["wifi"])], within=["p2", "p3"])
+        self.assertEqual(place_ids, ["p2"])
+        self.assertEqual(facets["pool"], 0)
+
+    def test_changes(self):
+        """ Tests that new places and links are found and deleted ones not """
+
+        self.bitmaps.search([])
+        self.places["p4"] = {"id": "p4"}
+        key, row = link("p4", "wifi")
+        self.links[key] = row
+        del self.links[FileStorage.link_key("p1", "wifi")]
+        del self.places["p2"]
+
+        self.assertEqual(self.bitmaps.search([(False, ["wifi"])])[0], ["p4"])
+        self.assertEqual(self.bitmaps.search([(True, ["wifi"])])[0], ["p1", "p3"])
+
+    def test_bits(self):
+        """ Tests turning ordinals into bits and back """
+
+        ordinals = [0, 7, 8, 9, 100, 4095]
+        bits = bits_of(ordinals, 4096)
+        self.assertEqual(bits, sum(1 << ordinal for ordinal in ordinals))
+        self.assertEqual(ordinals_of(bits), ordinals)
+        self.assertEqual(ordinals_of(0), [])
+        self.assertEqual(bits_of([], 0), 0)
+
+    def test_many_places(self):
+        """ Tests a search over enough places to span many bytes of bits """
+
+        self.places.load().update(("p%d" % i, {"id": "p%d" % i}) for i in range(4, 2000))
+        self.links.load().update(link("p%d" % i, "tv") for i in range(4, 2000, 3))
+        self.bitmaps.cached = False
+        self.assertEqual(self.bitmaps.search([(False, ["tv"])])[0],
+                         ["p%d" % i for i in range(4, 2000, 3)])
+        self.assertEqual(len(self.bitmaps.search([(True, ["tv"])])[0]), 1999 - 666)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from app import app
+
+PREFIX = "/api/v1"
+RINGWOOD = "90c83333-35d4-4638-bdd8-1eceac56915e"
+BLACKBURN = "cee845de-c341-4f5a-a0c5-2ca1f4c327b2"
+BOX_HILL = "a1a3d915-68c8-4771-9bf4-498b9ae62463"
+MELBOURNE = "687da7c4-eaba-411f-b00d-65c954eb2b8c"
+CLARK = "0215a722-a3fc-4f08-9120-f8621147f2be"
+
+
+class ApiTestCase(unittest.TestCase):
+    """Requests the endpoints of the app on the data files. Only GET
+    requests are made, so the data files are left as they are
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = app.test_client()
+
+    def get(self, url, status=200):
+        """ Returns the response to GET url, checking its status code """
+        response = self.app.get(PREFIX + url)
+        self.assertEqual(response.status_code, status, url)
+        return response
+
+    def ids(self, url):
+        """ Returns the ids of the rows listed by url """
+        return [row["id"] for row in self.get(url).get_json()]
+
+
+class TestListPaging(ApiTestCase):
+    """Test the keyset paging of the other collections
+    """
+
+    def test_list_paging(self):
+        """ Tests paging through the other collections """
+
+        for url in ("/amenities", "/countries", "/cities", "/users", "/reviews"):
+            response = self.get(f"{url}?limit=1")
+            self.assertIn("X-Next-Cursor", response.headers, url)
+
+        first = self.get("/amenities?limit=3")
+        names = [amenity["name"] for amenity in first.get_json()]
+        after = first.headers["X-Next-Cursor"]
+        names += [amenity["name"] for amenity in self.get(f"/amenities?after={after}").get_json()]
+        self.assertEqual(names, ["toilet", "tv", "mini-bar", "air-con"])
+
+
+class TestFields(ApiTestCase):
+    """Test that ?fields= only shows the fields asked for
+    """
+
+    def test_fields(self):
+        """ Tests ?fields= on lists and single rows """
+
+        places = self.get("/places?fields=id,price_per_night&sort=price_per_night").get_json()
+        self.assertEqual(places[0], {"id": BLACKBURN, "price_per_night": 120.0})
+
+        self.assertEqual(self.get(f"/places/{BLACKBURN}?fields=name,average_rating").get_json(),
+                         {"name": "Blackburn Hotel", "average_rating": 0.35})
+        self.assertEqual(self.get(f"/users/{CLARK}?fields=first_name").get_json(),
+                         {"first_name": "Clark"})
+        for url in ("/amenities", "/countries", "/cities", "/users"):
+            for row in self.get(f"{url}?fields=id").get_json():
+                self.assertEqual(list(row), ["id"], url)
+
+        places = self.get("/places/near?lat=-37.8147&lon=145.2306&radius_km=1"
+                          "&fields=id,distance_km").get_json()
+        self.assertEqual(set(places[0]), {"id", "distance_km"})
+
+        # no fields listed shows all of them
+        for query in ("fields=", "fields=,+"):
+            self.assertEqual(self.get(f"/places/{BLACKBURN}?{query}").get_json(),
+                             self.get(f"/places/{BLACKBURN}").get_json())
+
+
+class TestSQLiteBackend(unittest.TestCase):
+    """Test that the SQLite backend answers like the data files. The storage
+    is picked when the app is imported, so it runs in a process of its own
+    """
+
+    urls = [
+        "/places?sort=price_per_night",
+        "/places?sort=-price_per_night&limit=2",
+        "/places?sort=price_per_night&limit=2&after=WzE1MC4wLCI5MGM4MzMzMy0zNWQ0LTQ2MzgtYmRkOC0xZWNlYWM1NjkxNWUiXQ",
+        "/places?sort=rating&min_price=130&limit=1",
+        "/places?min_guests=2&max_price=180&fields=id,name",
+        f"/places?city_id={MELBOURNE}&sort=price_per_night",
+        "/places?amenities=toilet,!mini-bar",
+        "/places?after=NQ",
+        "/amenities?limit=2",
+        "/countries/AU/cities",
+        "/search?q=hotel",
+        "/autocomplete?q=mel",
+        "/places/near?lat=-37.8147&lon=145.2306&radius_km=20",
+        "/places/clusters/0/0/0",
+        f"/places/{BLACKBURN}/rating",
+        f"/places/{BLACKBURN}/amenities",
+        f"/places/top?city_id={MELBOURNE}",
+    ]
+
+    # prints [status, body, next cursor] for every url on the line read
+    script = """if True:
+        import json, sys
+        from app import app
+        client = app.test_client()
+        for url in json.loads(sys.stdin.read()):
+            response = client.get(url)
+            print(json.dumps([response.status_code, response.get_json(),
+                              response.headers.get("X-Next-Cursor")]))
+    """
+
+    def test_same_responses(self):
+        """ Tests that every url gets the same response from both backends """
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            env = dict(os.environ, STORAGE_BACKEND="sqlite",
+                       DATABASE=os.path.join(tmp_dir, "hbnb.db"))
+            urls = [PREFIX + url for url in self.urls]
+            output = subprocess.run([sys.executable, "-c", self.script], env=env, check=True,
+                                    input=json.dumps(urls).encode(),
+                                    stdout=subprocess.PIPE).stdout
+        finally:
+            shutil.rmtree(tmp_dir)
+
+        client = app.test_client()
+        lines = output.decode().splitlines()[-len(urls):]
+        for url, line in zip(urls, lines):
+            response = client.get(url)
+            expected = [response.status_code, response.get_json(),
+                        response.headers.get("X-Next-Cursor")]
+            self.assertEqual(json.loads(line), expected, url)
+
+
+if __name__ == '__main__':
+    unittest.main()
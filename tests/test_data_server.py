@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from data.data_server import DataServer
+from data.file_storage import FileStorage
+from data.geo_index import GeoIndex
+from data.lazy_model_data import LazyModelData
+from data.prefix_index import PrefixIndex
+from data.remote_storage import RemoteStorage
+from data.sorted_index import SortedIndex
+from data.text_index import TextIndex
+from data.tile_grid import TileGrid
+
+
+class TestDataServer(unittest.TestCase):
+    """Test that workers can use the data held by the data server
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp_dir, "amenity.json")
+        shutil.copy("data/amenity.json", self.filename)
+
+        self.storage = FileStorage(mode="journal")
+        self.data = LazyModelData(lambda: self.storage.load_model_data(self.filename))
+        self.server = DataServer(os.path.join(self.tmp_dir, "hbnb.sock"),
+                                 self.storage, {self.filename: self.data})
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.client = RemoteStorage(self.server.server_address)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_mapping(self):
+        """ Tests that the client works like the data it stands for """
+
+        remote = self.client.load_model_data(self.filename)
+        self.assertEqual(len(remote), len(self.data))
+        self.assertEqual(dict(remote.items()), dict(self.data))
+
+        remote["new-id"] = {"id": "new-id", "name": "Sauna"}
+        self.client.save_model_change(self.filename, remote, "new-id")
+        self.assertIn("new-id", remote)
+        self.assertEqual(self.data["new-id"]["name"], "Sauna")
+
+        # the change was saved by the server's storage
+        self.assertIn("new-id", FileStorage().load_model_data(self.filename))
+
+        del remote["new-id"]
+        self.assertNotIn("new-id", self.data)
+        self.assertIsNone(remote.get("new-id"))
+        with self.assertRaises(KeyError):
+            remote["new-id"]
+
+    def test_lookup(self):
+        """ Tests that rows are looked up by value on the server, and that
+            its index follows the changes """
+
+        remote = self.client.load_model_data(self.filename)
+        name = next(iter(self.data.values()))["name"]
+        self.assertEqual(remote.lookup("name", name),
+                         [key for key, row in self.data.items() if row["name"] == name])
+
+        remote["new-id"] = {"id": "new-id", "name": "Sauna"}
+        self.assertEqual(remote.lookup("name", "Sauna"), ["new-id"])
+        del remote["new-id"]
+        self.assertEqual(remote.lookup("name", "Sauna"), [])
+
+    def test_get_many_and_page(self):
+        """ Tests that rows are read by id and paged on the server """
+
+        remote = self.client.load_model_data(self.filename)
+        keys = list(self.data)
+        self.assertEqual(remote.get_many(keys[::-1] + ["missing"]),
+                         [self.data[key] for key in keys[::-1]])
+
+        index = SortedIndex(self.data, "created_at")
+        remote_index = SortedIndex(LazyModelData(lambda: remote), "created_at", cached=False)
+        self.assertEqual(remote_index.page(2), index.page(2))
+        self.assertEqual(remote_index.page(2, index.page(2)[1], reverse=True),
+                         index.page(2, index.page(2)[1], reverse=True))
+        self.assertEqual(remote_index.positions(keys[:2]), index.positions(keys[:2]))
+
+        remote["new-id"] = {"id": "new-id", "name": "Sauna", "created_at": 0}
+        self.assertEqual(remote_index.page(1), (["new-id"], (0, "new-id")))
+
+    def test_value_counts(self):
+        """ Tests that values are counted on the server """
+
+        remote = self.client.load_model_data(self.filename)
+        remote["a"] = {"id": "a", "name": "Sauna", "created_at": 1}
+        remote["b"] = {"id": "b", "name": "Sauna", "created_at": 1}
+        remote["c"] = {"id": "c", "name": "Spa", "created_at": 2}
+        self.assertEqual(sorted(remote.value_counts("name", "created_at", ["Sauna", "Spa"])),
+                         [("Sauna", 1, 2), ("Spa", 2, 1)])
+        self.assertEqual(remote.value_counts("name", "created_at", ["Pool"]), [])
+
+    def test_index_ops(self):
+        """ Tests that ranges, boxes, tiles, words and names are read from
+            indexes kept by the server """
+
+        remote = self.client.load_model_data(self.filename)
+        remote["a"] = {"id": "a", "name": "Hot tub", "created_at": 1,
+                       "latitude": -37.81, "longitude": 145.23}
+        remote["b"] = {"id": "b", "name": "hot water", "created_at": 2,
+                       "latitude": 10, "longitude": 179.5}
+        remote_data = LazyModelData(lambda: remote)
+
+        index = SortedIndex(self.data, "created_at")
+        remote_index = SortedIndex(remote_data, "created_at", cached=False)
+        self.assertEqual(remote_index.lookup(1, 2), index.lookup(1, 2))
+        self.assertEqual(remote_index.count(None, 1), index.count(None, 1))
+
+        geo_index = GeoIndex(self.data)
+        remote_geo_index = GeoIndex(remote_data, cached=False)
+        self.assertEqual(remote_geo_index.lookup_points(0, 179, 20, -179),
+                         geo_index.lookup_points(0, 179, 20, -179))
+
+        grid = TileGrid(self.data)
+        remote_grid = TileGrid(remote_data, cached=False)
+        self.assertEqual(remote_grid.clusters(0, 0, 0), grid.clusters(0, 0, 0))
+
+        text_index = TextIndex(self.data, ["name"])
+        remote_text_index = TextIndex(remote_data, ["name"], cached=False)
+        self.assertEqual(remote_text_index.search("hot tub"), text_index.search("hot tub"))
+
+        names = PrefixIndex(self.data, "name")
+        remote_names = PrefixIndex(remote_data, "name", cached=False)
+        self.assertEqual(remote_names.complete("HOT", 1), names.complete("HOT", 1))
+
+        # the indexes of the server follow the changes
+        del remote["a"]
+        self.assertEqual(remote_names.complete("hot"), ["b"])
+        self.assertEqual(remote_index.count(1, 1), 0)
+
+    def test_unknown_file(self):
+        """ Tests that only the files served can be used """
+
+        with self.assertRaises(Exception):
+            len(self.client.load_model_data("data/user.json"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,407 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from data.file_storage import FileStorage
+from data.lazy_model_data import LazyModelData
+
+
+class TestFileStorage(unittest.TestCase):
+    """Test that the storage modes save and load data as expected
+    """
+
+    def setUp(self):
+        # work on a copy of a data file so the real data is never touched
+        self.tmp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp_dir, "amenity.json")
+        shutil.copy("data/amenity.json", self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_journal_replay(self):
+        """ Tests that journaled changes are applied when loading again """
+
+        storage = FileStorage(mode="journal")
+        data = storage.load_model_data(self.filename)
+        deleted_id, updated_id = list(data)[:2]
+
+        data["new-id"] = {"id": "new-id", "name": "Sauna"}
+        storage.save_model_change(self.filename, data, "new-id")
+        data[updated_id]["name"] = "Jacuzzi"
+        storage.save_model_change(self.filename, data, updated_id)
+        del data[deleted_id]
+        storage.save_model_change(self.filename, data, deleted_id)
+
+        # the model file itself is never rewritten in journal mode
+        with open(self.filename, 'r') as f:
+            self.assertEqual(len(json.load(f)["Amenity"]), len(data))
+
+        reloaded = FileStorage(mode="journal").load_model_data(self.filename)
+        self.assertEqual(reloaded, data)
+
+    def test_journal_partial_record(self):
+        """ Tests that a record cut short by a crash is ignored """
+
+        storage = FileStorage(mode="journal")
+        data = storage.load_model_data(self.filename)
+        data["new-id"] = {"id": "new-id", "name": "Sauna"}
+        storage.save_model_change(self.filename, data, "new-id")
+
+        with open(storage.journal_filename(self.filename), 'a') as f:
+            f.write('{"id":"other-id","ro')
+
+        reloaded = FileStorage().load_model_data(self.filename)
+        self.assertIn("new-id", reloaded)
+        self.assertNotIn("other-id", reloaded)
+
+    def test_reload_racing_append(self):
+        """ Tests that a record appended while the journal is replayed by a
+            reload is kept """
+
+        storage = FileStorage(mode="journal")
+        data = storage.load_model_data(self.filename)
+        data["a"] = {"id": "a", "name": "Sauna"}
+        storage.save_model_change(self.filename, data, "a")
+
+        class RacingStorage(FileStorage):
+            """ A request saves a change right after the journal is read """
+            racing = False
+
+            def replay_journal_file(self, journal, rows, offset=0, skip_id=None):
+                offset = super().replay_journal_file(journal, rows, offset, skip_id)
+                if self.racing and journal.endswith(".log"):
+                    self.racing = False
+                    data["c"] = {"id": "c", "name": "Spa"}
+                    self.save_model_change(self.filename, data, "c")
+                return offset
+
+        for first_load in (True, False):
+            racing = RacingStorage(mode="journal", cache=False)
+            racing.filename = self.filename
+            if not first_load:
+                racing.load_model_data(self.filename)
+            racing.racing = True
+            racing.load_model_data(self.filename)
+
+            reloaded = FileStorage(mode="journal").load_model_data(self.filename)
+            self.assertIn("c", reloaded)
+            os.remove(storage.journal_filename(self.filename))
+
+    def test_file_mode_folds_journal(self):
+        """ Tests that a full rewrite replaces the journal """
+
+        storage = FileStorage(mode="journal")
+        data = storage.load_model_data(self.filename)
+        data["new-id"] = {"id": "new-id", "name": "Sauna"}
+        storage.save_model_change(self.filename, data, "new-id")
+
+        storage = FileStorage(mode="file")
+        data = storage.load_model_data(self.filename)
+        data["other-id"] = {"id": "other-id", "name": "Gym"}
+        storage.save_model_change(self.filename, data, "other-id")
+
+        self.assertFalse(os.path.exists(storage.journal_filename(self.filename)))
+        reloaded = FileStorage().load_model_data(self.filename)
+        self.assertIn("new-id", reloaded)
+        self.assertIn("other-id", reloaded)
+
+    def test_compaction(self):
+        """ Tests that compaction folds the journal into the model file """
+
+        storage = FileStorage(mode="journal")
+        data = storage.load_model_data(self.filename)
+        data["new-id"] = {"id": "new-id", "name": "Sauna"}
+        storage.save_model_change(self.filename, data, "new-id")
+
+        self.assertTrue(storage.compact_model_data(self.filename))
+        self.assertFalse(storage.compact_model_data(self.filename))
+        self.assertFalse(os.path.exists(storage.journal_filename(self.filename)))
+
+        with open(self.filename, 'r') as f:
+            rows = json.load(f)["Amenity"]
+        self.assertIn("new-id", [row["id"] for row in rows])
+
+    def test_compaction_syncs_rename(self):
+        """ Tests that the rename of the new model file is synced before
+            the compacted journal is removed """
+
+        storage = FileStorage(mode="journal")
+        data = storage.load_model_data(self.filename)
+        data["new-id"] = {"id": "new-id", "name": "Sauna"}
+        storage.save_model_change(self.filename, data, "new-id")
+
+        events = []
+        sync_directory = FileStorage.sync_directory
+        remove = os.remove
+
+        def record_sync(filename):
+            events.append(("sync", os.path.dirname(os.path.abspath(filename))))
+            sync_directory(filename)
+
+        def record_remove(filename):
+            events.append(("remove", filename))
+            remove(filename)
+
+        with mock.patch.object(FileStorage, "sync_directory", side_effect=record_sync), \
+                mock.patch("os.remove", side_effect=record_remove):
+            storage.compact_model_data(self.filename)
+
+        self.assertEqual(events, [("sync", self.tmp_dir),
+                                  ("remove", storage.compacting_filename(self.filename))])
+
+    def test_interrupted_compaction(self):
+        """ Tests that no change is lost if compaction stops half way """
+
+        storage = FileStorage(mode="journal")
+        data = storage.load_model_data(self.filename)
+        data["new-id"] = {"id": "new-id", "name": "Sauna"}
+        storage.save_model_change(self.filename, data, "new-id")
+
+        # crash right after the journal was moved out of the way
+        os.replace(storage.journal_filename(self.filename),
+                   storage.compacting_filename(self.filename))
+        data["new-id"]["name"] = "Spa"
+        storage.save_model_change(self.filename, data, "new-id")
+
+        reloaded = FileStorage(mode="journal").load_model_data(self.filename)
+        self.assertEqual(reloaded["new-id"]["name"], "Spa")
+
+        # the next compaction picks up where the previous one stopped
+        storage.compact_model_data(self.filename)
+        storage.compact_model_data(self.filename)
+        reloaded = FileStorage(mode="journal").load_model_data(self.filename)
+        self.assertEqual(reloaded, data)
+
+    def test_load_racing_compaction(self):
+        """ Tests that a load that read the model file right before a
+            compaction replaced it still gets the compacted changes """
+
+        storage = FileStorage(mode="journal")
+        data = storage.load_model_data(self.filename)
+        data["new-id"] = {"id": "new-id", "name": "Sauna"}
+        storage.save_model_change(self.filename, data, "new-id")
+
+        class RacingStorage(FileStorage):
+            """ Another process compacts right after the model file is read """
+            raced = False
+
+            def read_model_file(self, filename):
+                rows = super().read_model_file(filename)
+                if not self.raced:
+                    self.raced = True
+                    FileStorage(mode="journal").compact_model_data(filename)
+                return rows
+
+        reloaded = RacingStorage(mode="journal", cache=False).load_model_data(self.filename)
+        self.assertEqual(reloaded["new-id"]["name"], "Sauna")
+
+    def test_write_behind(self):
+        """ Tests that changes are only written when the models are flushed """
+
+        storage = FileStorage(mode="writebehind")
+        data = storage.load_model_data(self.filename)
+        mtime = os.stat(self.filename).st_mtime_ns
+
+        for i in range(100):
+            data[str(i)] = {"id": str(i), "name": "Sauna"}
+            storage.save_model_change(self.filename, data, str(i))
+        self.assertEqual(os.stat(self.filename).st_mtime_ns, mtime)
+
+        storage.flush()
+        reloaded = FileStorage().load_model_data(self.filename)
+        self.assertEqual(reloaded, data)
+
+    def test_durable_concurrent_writes(self):
+        """ Tests that every acknowledged change from concurrent writers is
+            in the journal, fsynced before it was acknowledged, and that
+            concurrent changes share their fsyncs """
+
+        storage = FileStorage(mode="durable")
+        data = storage.load_model_data(self.filename)
+        journal = storage.journal_filename(self.filename)
+
+        # ids of the records in the journal when it was last fsynced
+        synced = set()
+        fsyncs = []
+        fsync = os.fsync
+        lost = []
+
+        def slow_fsync(fd):
+            fsync(fd)
+            with open(journal, 'rb') as f:
+                synced.update(json.loads(line)["id"] for line in f.read().splitlines())
+            fsyncs.append(fd)
+            # long enough for the other writers to queue up behind it
+            time.sleep(0.01)
+
+        def write_rows(prefix):
+            for i in range(20):
+                row_id = "{}-{}".format(prefix, i)
+                data[row_id] = {"id": row_id, "name": "Sauna"}
+                storage.save_model_change(self.filename, data, row_id)
+                if row_id not in synced:
+                    lost.append(row_id)
+
+        threads = [threading.Thread(target=write_rows, args=(str(n),))
+                   for n in range(8)]
+        with mock.patch("os.fsync", side_effect=slow_fsync):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(lost, [])
+        self.assertLess(len(fsyncs), 8 * 20 / 2)
+        reloaded = FileStorage().load_model_data(self.filename)
+        self.assertEqual(reloaded, data)
+
+    def test_streaming_loader(self):
+        """ Tests that parsing rows chunk by chunk gives the same data """
+
+        storage = FileStorage()
+        for filename in ["data/place.json", "data/review.json"]:
+            with open(filename, 'r') as f:
+                expected = storage.reorganise_model_data(json.load(f))
+            self.assertEqual(storage.load_model_data(filename), expected)
+
+            rows = [row for key, row in storage.iter_model_rows(filename, chunk_size=5)
+                    if row is not None]
+            self.assertEqual(rows, list(expected.values()))
+
+            # the rows share their keys, like they do with json.load()
+            for first_key, second_key in zip(rows[0], rows[1]):
+                self.assertIs(first_key, second_key)
+
+    def test_streaming_loader_invalid_file(self):
+        """ Tests that a truncated file is reported as invalid """
+
+        with open(self.filename, 'w') as f:
+            f.write('{"Amenity": [{"id": "new-id", "name": "Sauna"}')
+
+        with self.assertRaises(ValueError):
+            FileStorage().load_model_data(self.filename)
+
+    def test_cache(self):
+        """ Tests that the binary snapshot is used only while it is current """
+
+        storage = FileStorage()
+        data = storage.load_model_data(self.filename)
+        self.assertTrue(os.path.exists(storage.cache_filename(self.filename)))
+        self.assertEqual(storage.read_cache(self.filename), ("Amenity", data))
+        self.assertEqual(FileStorage().load_model_data(self.filename), data)
+
+        data["new-id"] = {"id": "new-id", "name": "Sauna"}
+        storage.save_model_change(self.filename, data, "new-id")
+        self.assertIsNone(storage.read_cache(self.filename))
+        self.assertEqual(FileStorage().load_model_data(self.filename), data)
+
+    def test_cache_chunks(self):
+        """ Tests a cache of several chunks, and that a cut short one is
+            not used """
+
+        storage = FileStorage()
+        storage.cache_chunk_rows = 2
+        data = storage.load_model_data(self.filename)
+        self.assertEqual(storage.read_cache(self.filename), ("Amenity", data))
+        # and the temporary file is gone
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), ["amenity.json", "amenity.json.cache"])
+
+        # the rows of every chunk share their keys
+        rows = list(storage.read_cache(self.filename)[1].values())
+        for first_key, second_key in zip(rows[0], rows[1]):
+            self.assertIs(first_key, second_key)
+
+        cache = storage.cache_filename(self.filename)
+        os.truncate(cache, os.path.getsize(cache) - 1)
+        self.assertIsNone(storage.read_cache(self.filename))
+
+    def shared_storage(self):
+        """ Returns a storage in shared mode, as one worker would have it """
+        storage = FileStorage(mode="shared")
+        data = LazyModelData(lambda: storage.load_model_data(self.filename))
+        storage.share(self.filename, data)
+        return storage, data
+
+    def test_shared(self):
+        """ Tests that workers see each other's changes """
+
+        storage_a, data_a = self.shared_storage()
+        storage_b, data_b = self.shared_storage()
+        self.assertEqual(dict(data_a), dict(data_b))
+
+        data_a["new-id"] = {"id": "new-id", "name": "Sauna"}
+        storage_a.save_model_change(self.filename, data_a, "new-id")
+        storage_b.sync()
+        self.assertEqual(data_b["new-id"]["name"], "Sauna")
+
+        # b saves a change before a has seen it
+        data_b["new-id"] = {"id": "new-id", "name": "Spa"}
+        storage_b.save_model_change(self.filename, data_b, "new-id")
+        data_a["other-id"] = {"id": "other-id", "name": "Gym"}
+        storage_a.save_model_change(self.filename, data_a, "other-id")
+        self.assertEqual(data_a["new-id"]["name"], "Spa")
+
+        # a compaction moves the journal but b reads on where it stopped
+        storage_a.compact_model_data(self.filename)
+        data_a["third-id"] = {"id": "third-id", "name": "Pool"}
+        storage_a.save_model_change(self.filename, data_a, "third-id")
+        storage_b.sync()
+        self.assertEqual(dict(data_a), dict(data_b))
+
+        reloaded = FileStorage(mode="shared").load_model_data(self.filename)
+        self.assertEqual(reloaded, dict(data_a))
+
+    def test_shared_processes_with_compaction(self):
+        """ Tests that no worker misses a change while the journal is
+            compacted over and over, whatever inode each new journal gets """
+
+        workers = 4
+        rows_per_worker = 300
+        expected = len(FileStorage().load_model_data(self.filename)) + workers * rows_per_worker
+        context = multiprocessing.get_context("fork")
+        all_written = context.Barrier(workers)
+        counts = context.Queue()
+
+        def write_rows(worker):
+            storage, data = self.shared_storage()
+            data.load()
+            for i in range(rows_per_worker):
+                storage.sync()
+                row_id = "{}-{}".format(worker, i)
+                data[row_id] = {"id": row_id, "name": "Sauna"}
+                storage.save_model_change(self.filename, data, row_id)
+                if worker == 0 and i % 50 == 49:
+                    storage.compact_model_data(self.filename)
+
+            all_written.wait()
+            storage.sync()
+            counts.put(len(data))
+
+        processes = [context.Process(target=write_rows, args=(n,)) for n in range(workers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(60)
+
+        self.assertEqual([counts.get(timeout=5) for n in range(workers)], [expected] * workers)
+        reloaded = FileStorage(mode="shared").load_model_data(self.filename)
+        self.assertEqual(len(reloaded), expected)
+
+    def test_invalid_mode(self):
+        """ Tests that unknown storage modes are rejected """
+
+        with self.assertRaises(ValueError):
+            FileStorage(mode="bogus")
+
+
+if __name__ == '__main__':
+    unittest.main()
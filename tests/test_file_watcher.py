@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from data.file_storage import FileStorage
+from data.file_watcher import FileWatcher
+from data.lazy_model_data import LazyModelData
+
+
+class TestFileWatcher(unittest.TestCase):
+    """Test that data files changed on disk are reloaded
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp_dir, "amenity.json")
+        shutil.copy("data/amenity.json", self.filename)
+
+        self.storage = FileStorage()
+        self.data = LazyModelData(lambda: self.storage.load_model_data(self.filename))
+        self.watcher = FileWatcher(self.storage)
+        self.watcher.watch(self.filename, self.data)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def replace_file(self, rows):
+        """ Drop a new version of the data file in place """
+        with open(self.filename, 'w') as f:
+            json.dump({"Amenity": rows}, f)
+        # make sure the change is visible even on coarse mtimes
+        stat = os.stat(self.filename)
+        os.utime(self.filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+
+    def test_reload(self):
+        """ Tests that only the changed rows are replaced """
+
+        rows = list(self.data.values())
+        kept = self.data[rows[1]["id"]]
+        rows[0] = dict(rows[0], name="Sauna")
+        removed = rows.pop()
+
+        self.replace_file(rows)
+        self.assertTrue(self.storage.has_changed(self.filename))
+        self.watcher.check()
+
+        self.assertEqual(self.data[rows[0]["id"]]["name"], "Sauna")
+        self.assertNotIn(removed["id"], self.data)
+        self.assertIs(self.data[rows[1]["id"]], kept)
+        self.assertFalse(self.storage.has_changed(self.filename))
+
+    def test_own_writes_are_not_reloaded(self):
+        """ Tests that files written by the storage are not seen as changed """
+
+        self.data["new-id"] = {"id": "new-id", "name": "Sauna"}
+        self.storage.save_model_change(self.filename, self.data, "new-id")
+
+        self.assertFalse(self.storage.has_changed(self.filename))
+
+    def test_diff(self):
+        """ Tests the per row diff """
+
+        changed, removed = FileWatcher.diff(
+            {"a": {"id": "a"}, "b": {"id": "b"}},
+            {"a": {"id": "a"}, "c": {"id": "c"}})
+        self.assertEqual(changed, {"c": {"id": "c"}})
+        self.assertEqual(removed, ["b"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from data.geo_index import GeoIndex, distance_km
+from data.lazy_model_data import LazyModelData
+
+
+class TestGeoIndex(unittest.TestCase):
+    """Test radius and box searches on the grid of places
+    """
+
+    def setUp(self):
+        self.data = LazyModelData(lambda: {
+            "melbourne": {"id": "melbourne", "latitude": -37.8136, "longitude": 144.9631},
+            "box-hill": {"id": "box-hill", "latitude": -37.8189, "longitude": 145.1225},
+            "sydney": {"id": "sydney", "latitude": -33.8688, "longitude": 151.2093},
+            "fiji": {"id": "fiji", "latitude": -17.7134, "longitude": 178.0650},
+            "nowhere": {"id": "nowhere", "latitude": None, "longitude": None},
+        })
+        self.index = GeoIndex(self.data)
+
+    def test_distance(self):
+        """ Tests the great circle distance """
+        self.assertAlmostEqual(distance_km(-37.8136, 144.9631, -33.8688, 151.2093), 714, delta=2)
+
+    def test_near(self):
+        """ Tests that the places in the radius are found, nearest first """
+
+        results = self.index.near(-37.81, 144.96, 20)
+        self.assertEqual([key for key, distance in results], ["melbourne", "box-hill"])
+        self.assertLess(results[0][1], results[1][1])
+        self.assertEqual(len(self.index.near(-37.81, 144.96, 1000)), 3)
+
+    def test_within(self):
+        """ Tests box searches, also across the 180th meridian """
+
+        results = self.index.within(-40, 140, -30, 155)
+        self.assertEqual(sorted(key for key, distance in results),
+                         ["box-hill", "melbourne", "sydney"])
+        self.assertEqual([key for key, distance in self.index.within(-20, 175, -15, -175)],
+                         ["fiji"])
+
+    def test_changes(self):
+        """ Tests that moved, new and deleted places are indexed """
+
+        self.index.near(0, 0, 1)
+        row = self.data["sydney"]
+        row["latitude"], row["longitude"] = -37.82, 144.97
+        self.data["sydney"] = row
+        self.data["perth"] = {"id": "perth", "latitude": -31.95, "longitude": 115.86}
+        del self.data["melbourne"]
+
+        self.assertEqual([key for key, distance in self.index.near(-37.81, 144.96, 20)],
+                         ["sydney", "box-hill"])
+        self.assertEqual([key for key, distance in self.index.near(-31.95, 115.86, 1)],
+                         ["perth"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from data.lazy_index import LazyIndex
+from data.lazy_model_data import LazyModelData
+
+
+class NameIndex(LazyIndex):
+    """ Keeps the names of the rows that have one, and every update made """
+
+    def __init__(self, data, cached=True):
+        self.updates = []
+        super().__init__(data, cached)
+
+    def entry(self, key, row):
+        return row.get("name")
+
+    def update(self, key, old, new):
+        self.updates.append((key, old, new))
+
+    def names(self):
+        with self.built():
+            return dict(self.indexed)
+
+
+class TestLazyIndex(unittest.TestCase):
+    """Test the building and updating shared by the indexes
+    """
+
+    def setUp(self):
+        self.loads = 0
+
+        def load():
+            self.loads += 1
+            return {"a": {"id": "a", "name": "x"}, "b": {"id": "b"}}
+        self.data = LazyModelData(load)
+
+    def test_lazy_build(self):
+        """ Tests that the index is only built once it is used """
+
+        index = NameIndex(self.data)
+        self.assertEqual(self.loads, 0)
+        self.assertEqual(index.names(), {"a": "x"})
+        self.assertEqual(index.updates, [("a", None, "x")])
+
+    def test_updates(self):
+        """ Tests that only the rows whose entry changed are updated """
+
+        index = NameIndex(self.data)
+        index.names()
+        del index.updates[:]
+
+        self.data["c"] = {"id": "c", "name": "y"}
+        row = self.data["a"]
+        row["name"] = "z"
+        self.data["a"] = row
+        self.data["b"] = {"id": "b"}
+        del self.data["c"]
+
+        self.assertEqual(index.updates, [("c", None, "y"), ("a", "x", "z"), ("c", "y", None)])
+        self.assertEqual(index.names(), {"a": "z"})
+
+    def test_not_cached(self):
+        """ Tests that an index that is not cached is built for every use """
+
+        index = NameIndex(self.data, cached=False)
+        index.names()
+        self.data["c"] = {"id": "c", "name": "y"}
+        self.assertIsNone(index.indexed)
+        self.assertEqual(index.names(), {"a": "x", "c": "y"})
+        self.assertEqual(len(index.updates), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
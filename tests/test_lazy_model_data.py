@@ -0,0 +1,33 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from data.lazy_model_data import LazyModelData
+
+
+class TestLazyModelData(unittest.TestCase):
+    """Test that data is only loaded when it is first used
+    """
+
+    def test_loads_on_first_access(self):
+        """ Tests that the loader is called once, on first access """
+
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return {"a": {"id": "a"}}
+
+        data = LazyModelData(loader)
+        self.assertFalse(data.is_loaded())
+        self.assertEqual(calls, [])
+
+        self.assertIn("a", data)
+        data["b"] = {"id": "b"}
+        del data["a"]
+        self.assertEqual(list(data.values()), [{"id": "b"}])
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
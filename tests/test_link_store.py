@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import os
+import shutil
+import tempfile
+import unittest
+from data.file_storage import FileStorage
+from data.lazy_model_data import LazyModelData
+from data.link_store import LinkStore
+
+
+class TestLinkStore(unittest.TestCase):
+    """Test that place to amenity links are kept both ways and saved
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp_dir, "place_to_amenity.json")
+        shutil.copy("data/place_to_amenity.json", self.filename)
+
+        self.storage = FileStorage(mode="journal")
+        self.data = LazyModelData(lambda: self.storage.load_many_to_many_data(self.filename))
+        self.links = LinkStore(self.storage, self.filename, self.data)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_both_ways(self):
+        """ Tests that links are found from either side """
+
+        row = next(iter(self.data.values()))
+        place_id, amenity_id = row["place_id"], row["amenity_id"]
+        self.assertIn(amenity_id, self.links.amenities(place_id))
+        self.assertIn(place_id, self.links.places(amenity_id))
+        self.assertIn(place_id, self.links.place_ids())
+        self.assertTrue(self.links.has(place_id, amenity_id))
+
+        self.assertEqual(sum(len(self.links.amenities(p)) for p in self.links.place_ids()),
+                         len(self.data))
+
+    def test_attach_and_detach(self):
+        """ Tests that links are saved and can't be duplicated """
+
+        self.links.amenities("place-id")
+        self.assertTrue(self.links.attach("place-id", "amenity-id"))
+        self.assertFalse(self.links.attach("place-id", "amenity-id"))
+        self.assertEqual(self.links.amenities("place-id"), ["amenity-id"])
+        self.assertEqual(self.links.places("amenity-id"), ["place-id"])
+
+        reloaded = FileStorage(mode="journal").load_many_to_many_data(self.filename)
+        self.assertIn(FileStorage.link_key("place-id", "amenity-id"), reloaded)
+
+        self.links.detach_place("place-id")
+        self.assertFalse(self.links.detach("place-id", "amenity-id"))
+        self.assertEqual(self.links.amenities("place-id"), [])
+        self.assertEqual(self.links.places("amenity-id"), [])
+
+        reloaded = FileStorage(mode="journal").load_many_to_many_data(self.filename)
+        self.assertEqual(reloaded, dict(self.data))
+
+    def test_not_cached(self):
+        """ Tests that a store that is not cached scans the data """
+
+        links = LinkStore(self.storage, self.filename, self.data, cached=False)
+        links.attach("place-id", "amenity-id")
+        self.assertEqual(links.amenities("place-id"), ["amenity-id"])
+        self.assertEqual(links.places("amenity-id"), ["place-id"])
+
+
+if __name__ == '__main__':
+    unittest.main()
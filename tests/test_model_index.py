@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from data.lazy_model_data import LazyModelData
+from data.model_index import ModelIndex
+
+
+class TestModelIndex(unittest.TestCase):
+    """Test that the indexes follow the changes made to the data
+    """
+
+    def setUp(self):
+        self.data = LazyModelData(lambda: {
+            "a": {"id": "a", "country_id": "au"},
+            "b": {"id": "b", "country_id": "nz"},
+            "c": {"id": "c", "country_id": "au"},
+        })
+        self.index = ModelIndex(self.data, "country_id")
+
+    def test_lookup(self):
+        """ Tests that the rows are found by the value of the field """
+
+        self.assertEqual(self.index.lookup("au"), ["a", "c"])
+        self.assertEqual(self.index.lookup_one("nz"), "b")
+        self.assertEqual(self.index.lookup("us"), [])
+        self.assertIsNone(self.index.lookup_one("us"))
+
+    def test_changes(self):
+        """ Tests that creates, updates and deletes are indexed """
+
+        self.index.lookup("au")
+
+        self.data["d"] = {"id": "d", "country_id": "us"}
+        row = self.data["a"]
+        row["country_id"] = "nz"
+        self.data["a"] = row
+        del self.data["c"]
+
+        self.assertEqual(self.index.lookup("au"), [])
+        self.assertEqual(self.index.lookup("nz"), ["b", "a"])
+        self.assertEqual(self.index.lookup("us"), ["d"])
+
+    def test_swap(self):
+        """ Tests that replacing the data rebuilds the index """
+
+        self.index.lookup("au")
+        self.data.swap({"e": {"id": "e", "country_id": "au"}}, self.data.version())
+        self.assertEqual(self.index.lookup("au"), ["e"])
+
+        self.data.swap({"e": {"id": "e", "country_id": "nz"}}, self.data.version(), ["e"])
+        self.assertEqual(self.index.lookup("au"), [])
+        self.assertEqual(self.index.lookup("nz"), ["e"])
+
+    def test_not_cached(self):
+        """ Tests that an index that is not cached scans the data """
+
+        index = ModelIndex(self.data, "country_id", cached=False)
+        self.data["d"] = {"id": "d", "country_id": "au"}
+        self.assertEqual(index.lookup("au"), ["a", "c", "d"])
+
+    def test_storage_lookup(self):
+        """ Tests that an index that is not cached has data that can find
+            the rows itself, like a database table, do it """
+
+        calls = []
+
+        class Table(dict):
+            """ Rows that can be looked up by value """
+            def lookup(self, field, value):
+                calls.append((field, value))
+                return [key for key, row in self.items() if row[field] == value]
+
+        table = LazyModelData(lambda: Table(self.data))
+        index = ModelIndex(table, "country_id", cached=False)
+        self.assertEqual(index.lookup("nz"), ["b"])
+        self.assertEqual(calls, [("country_id", "nz")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,206 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from urllib.parse import parse_qs, urlparse
+from tests.test_api import ApiTestCase, BLACKBURN, BOX_HILL, MELBOURNE, PREFIX, RINGWOOD
+
+
+class TestAmenityEndpoints(ApiTestCase):
+    """Test the amenities of places
+    """
+
+    def test_place_amenities(self):
+        """ Tests the amenities of one place and of all of them """
+
+        names = [amenity["name"] for amenity in self.get(f"/places/{BLACKBURN}/amenities").get_json()]
+        self.assertEqual(sorted(names), ["air-con", "toilet"])
+        self.assertEqual(self.get(f"/places/{BOX_HILL}/amenities?fields=name").get_json(),
+                         [{"name": "tv"}])
+        self.get("/places/missing/amenities", 404)
+
+        output = self.get("/places_amenties").get_json()
+        self.assertEqual(output["Box Hill Motel"], ["tv"])
+
+
+class TestAmenitySearch(ApiTestCase):
+    """Test the amenity searches of /places
+    """
+
+    def test_amenities(self):
+        """ Tests amenity searches and the number of places having each """
+
+        output = self.get("/places?amenities=toilet,!mini-bar").get_json()
+        self.assertEqual(output["count"], 1)
+        self.assertEqual([place["id"] for place in output["places"]], [BLACKBURN])
+        counts = dict((amenity["name"], amenity["count"]) for amenity in output["amenities"])
+        self.assertEqual(counts, {"toilet": 1, "tv": 0, "mini-bar": 0, "air-con": 1})
+
+        output = self.get("/places?amenities=tv|mini-bar&max_price=160").get_json()
+        self.assertEqual([place["id"] for place in output["places"]], [RINGWOOD])
+
+        self.get("/places?amenities=sauna", 400)
+
+
+class TestPlaceFilters(ApiTestCase):
+    """Test the filters of /places
+    """
+
+    def test_filters(self):
+        """ Tests that only the places matching every filter are listed """
+
+        self.assertEqual(set(self.ids("/places?min_price=130")), {RINGWOOD, BOX_HILL})
+        self.assertEqual(self.ids("/places?max_price=130"), [BLACKBURN])
+        self.assertEqual(self.ids("/places?min_price=130&max_price=180"), [RINGWOOD])
+        self.assertEqual(set(self.ids("/places?min_guests=2&min_bathrooms=1")),
+                         {RINGWOOD, BOX_HILL})
+        self.assertEqual(set(self.ids("/places?min_rooms=10")), {BLACKBURN, BOX_HILL})
+        self.assertEqual(len(self.ids(f"/places?city_id={MELBOURNE}")), 3)
+        self.assertEqual(len(self.ids("/places?country=AU&min_price=100")), 3)
+        self.assertEqual(self.ids("/places?country=NZ"), [])
+
+        self.get("/places?min_price=cheap", 400)
+        self.get("/places?min_price=nan", 400)
+        self.get("/places?max_price=inf", 400)
+        self.get("/places?country=XX", 400)
+
+
+class TestMapSearch(ApiTestCase):
+    """Test the searches by distance, by box and by map tile
+    """
+
+    def test_near(self):
+        """ Tests that the places in a radius are listed nearest first """
+
+        places = self.get("/places/near?lat=-37.8147&lon=145.2306&radius_km=1").get_json()
+        self.assertEqual([place["id"] for place in places], [RINGWOOD])
+        self.assertLess(places[0]["distance_km"], 0.1)
+
+        places = self.get("/places/near?lat=-37.8147&lon=145.2306&radius_km=20").get_json()
+        self.assertEqual([place["id"] for place in places], [RINGWOOD, BLACKBURN, BOX_HILL])
+
+        self.get("/places/near?lat=-37.8&lon=145.2", 400)
+        self.get("/places/near?lat=100&lon=145.2&radius_km=1", 400)
+        self.get("/places/near?lat=x&lon=145.2&radius_km=1", 400)
+        for query in ("lat=nan&lon=145.2&radius_km=1", "lat=-37.8&lon=inf&radius_km=1",
+                      "lat=-37.8&lon=1e308&radius_km=1", "lat=-37.8&lon=145.2&radius_km=nan",
+                      "lat=-37.8&lon=145.2&radius_km=inf", "lat=-37.8&lon=145.2&radius_km=-1"):
+            self.get(f"/places/near?{query}", 400)
+
+    def test_within(self):
+        """ Tests that the places in a box are listed """
+
+        self.assertEqual(set(self.ids("/places/within?bbox=145.1,-37.82,145.2,-37.81")),
+                         {BLACKBURN, BOX_HILL})
+        self.assertEqual(self.ids("/places/within?bbox=0,0,1,1"), [])
+
+        self.get("/places/within", 400)
+        self.get("/places/within?bbox=145.1,-37.82,145.2", 400)
+        self.get("/places/within?bbox=145.1,-37.81,145.2,-37.82", 400)
+        for bbox in ("nan,-37.82,145.2,-37.81", "145.1,-inf,145.2,-37.81",
+                     "145.1,-37.82,1e308,-37.81", "145.1,-37.82,145.2,91"):
+            self.get(f"/places/within?bbox={bbox}", 400)
+
+    def test_clusters(self):
+        """ Tests that the places of a tile are counted """
+
+        output = self.get("/places/clusters/0/0/0").get_json()
+        self.assertEqual(sum(cluster["count"] for cluster in output["clusters"]), 3)
+        # Melbourne is in the south east quarter of the world
+        self.assertEqual(self.get("/places/clusters/1/0/0").get_json()["clusters"], [])
+        self.assertEqual(len(self.get("/places/clusters/1/1/1").get_json()["clusters"]), 1)
+
+        self.get("/places/clusters/1/2/0", 400)
+        self.get("/places/clusters/99/0/0", 400)
+
+
+class TestRatings(ApiTestCase):
+    """Test the review totals of places
+    """
+
+    def test_place_rating(self):
+        """ Tests the totals of the reviews of a place """
+
+        rating = self.get(f"/places/{BLACKBURN}/rating").get_json()
+        self.assertEqual(rating["place_id"], BLACKBURN)
+        self.assertEqual(rating["count"], 1)
+        self.assertEqual(rating["average"], 0.35)
+        self.assertEqual(rating["histogram"]["0"], 1)
+
+        rating = self.get(f"/places/{RINGWOOD}/rating?fields=count,average").get_json()
+        self.assertEqual(rating, {"count": 0, "average": None})
+
+        self.get("/places/missing/rating", 404)
+
+
+class TestTopPlaces(ApiTestCase):
+    """Test the best rated and cheapest places of a city or country
+    """
+
+    def test_top(self):
+        """ Tests the best rated and cheapest places of a city or country """
+
+        self.assertEqual(self.ids(f"/places/top?city_id={MELBOURNE}"), [BLACKBURN, BOX_HILL])
+        self.assertEqual(self.ids("/places/top?country=AU&by=price&limit=1"), [BLACKBURN])
+
+        self.get("/places/top", 400)
+        self.get("/places/top?country=AU&by=name", 400)
+
+
+class TestPlacePaging(ApiTestCase):
+    """Test the keyset paging of /places
+    """
+
+    def test_paging(self):
+        """ Tests that pages follow each other through the cursor headers """
+
+        for url in ("/places?sort=price_per_night&limit=2",
+                    "/places?sort=-price_per_night&limit=2&min_price=100",
+                    "/places?limit=1"):
+            ids = []
+            response = self.get(url)
+            while True:
+                ids += [place["id"] for place in response.get_json()]
+                cursor = response.headers.get("X-Next-Cursor")
+                if cursor is None:
+                    self.assertNotIn("Link", response.headers)
+                    break
+                link = response.headers["Link"]
+                self.assertTrue(link.endswith('>; rel="next"'))
+                next_url = urlparse(link[1:link.index(">")])
+                self.assertEqual(parse_qs(next_url.query)["after"], [cursor])
+                response = self.get(f"{next_url.path[len(PREFIX):]}?{next_url.query}")
+            self.assertEqual(len(ids), 3, url)
+            self.assertEqual(len(set(ids)), 3, url)
+
+        self.assertEqual(self.ids("/places?sort=price_per_night&limit=2"), [BLACKBURN, RINGWOOD])
+
+    def test_bad_paging(self):
+        """ Tests that limits and cursors that can't be used are refused """
+
+        for query in ("limit=0", "limit=1001", "limit=ten", "after=NQ", "after=!!",
+                      "after=WyJhIiwiYiJd", "sort=rating&after=W251bGxd"):
+            self.get(f"/places?{query}", 400)
+        self.get("/amenities?after=NQ", 400)
+
+
+class TestPlaceSort(ApiTestCase):
+    """Test the orders /places can be listed in
+    """
+
+    def test_sort(self):
+        """ Tests the orders places can be listed in """
+
+        self.assertEqual(self.ids("/places?sort=price_per_night"),
+                         [BLACKBURN, RINGWOOD, BOX_HILL])
+        self.assertEqual(self.ids("/places?sort=-price_per_night"),
+                         [BOX_HILL, RINGWOOD, BLACKBURN])
+        self.assertEqual(self.ids("/places?sort=max_guests&min_guests=2"), [RINGWOOD, BOX_HILL])
+        # places without reviews come last from the best rated down
+        self.assertEqual(self.ids("/places?sort=-rating"), [BLACKBURN, BOX_HILL, RINGWOOD])
+
+        self.get("/places?sort=name", 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from data.lazy_model_data import LazyModelData
+from data.place_rankings import PlaceRankings
+from data.review_aggregates import ReviewAggregates
+
+
+class TestPlaceRankings(unittest.TestCase):
+    """Test the top places of cities
+    """
+
+    def setUp(self):
+        self.places = LazyModelData(lambda: {
+            "p1": {"id": "p1", "city_id": "c1", "price_per_night": 100},
+            "p2": {"id": "p2", "city_id": "c1", "price_per_night": 50},
+            "p3": {"id": "p3", "city_id": "c2", "price_per_night": 70},
+            "p4": {"id": "p4", "city_id": "c2", "price_per_night": 20},
+        })
+        self.reviews = LazyModelData(lambda: {
+            "r1": {"id": "r1", "place_id": "p1", "rating": 5},
+            "r2": {"id": "r2", "place_id": "p1", "rating": 4},
+            "r3": {"id": "r3", "place_id": "p2", "rating": 3},
+            "r4": {"id": "r4", "place_id": "p3", "rating": 5},
+        })
+        self.rankings = PlaceRankings(
+            self.places, ReviewAggregates(self.reviews, self.places))
+
+    def test_top(self):
+        """ Tests the rankings of a city and of several cities merged """
+
+        self.assertEqual(self.rankings.top(["c1"]), ["p1", "p2"])
+        self.assertEqual(self.rankings.top(["c1", "c2"]), ["p3", "p1", "p2"])
+        self.assertEqual(self.rankings.top(["c1", "c2"], min_reviews=2), ["p1"])
+        self.assertEqual(self.rankings.top(["c1", "c2"], by="price", limit=3),
+                         ["p4", "p2", "p3"])
+        self.assertEqual(self.rankings.top(["nowhere"]), [])
+
+    def test_changes(self):
+        """ Tests that new reviews and changed places are ranked """
+
+        self.rankings.top(["c1"])
+        self.reviews["r5"] = {"id": "r5", "place_id": "p4", "rating": 5}
+        self.reviews["r6"] = {"id": "r6", "place_id": "p4", "rating": 5}
+        del self.reviews["r4"]
+        row = self.places["p2"]
+        row["city_id"] = "c2"
+        row["price_per_night"] = 10
+        self.places["p2"] = row
+
+        self.assertEqual(self.rankings.top(["c1"]), ["p1"])
+        self.assertEqual(self.rankings.top(["c2"]), ["p4", "p2"])
+        self.assertEqual(self.rankings.top(["c2"], by="price"), ["p2", "p4", "p3"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from data.lazy_model_data import LazyModelData
+from data.prefix_index import PrefixIndex
+
+
+class TestPrefixIndex(unittest.TestCase):
+    """Test name autocompletion
+    """
+
+    def setUp(self):
+        self.data = LazyModelData(lambda: {
+            "a": {"id": "a", "name": "Melbourne"},
+            "b": {"id": "b", "name": "Melton"},
+            "c": {"id": "c", "name": "Sydney"},
+            "d": {"id": "d", "name": "melba"},
+        })
+        self.index = PrefixIndex(self.data, "name")
+
+    def test_complete(self):
+        """ Tests that matches are found whatever the case, in name order """
+
+        self.assertEqual(self.index.complete("MEL"), ["d", "a", "b"])
+        self.assertEqual(self.index.complete("mel", limit=2), ["d", "a"])
+        self.assertEqual(self.index.complete("melbourne"), ["a"])
+        self.assertEqual(self.index.complete("x"), [])
+
+    def test_changes(self):
+        """ Tests that creates, updates and deletes are indexed """
+
+        self.index.complete("mel")
+        self.data["e"] = {"id": "e", "name": "Melrose"}
+        row = self.data["c"]
+        row["name"] = "Melville"
+        self.data["c"] = row
+        del self.data["d"]
+
+        self.assertEqual(self.index.complete("mel"), ["a", "e", "b", "c"])
+        self.assertEqual(self.index.complete("syd"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
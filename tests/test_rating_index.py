@@ -0,0 +1,44 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from data.lazy_model_data import LazyModelData
+from data.rating_index import RatingIndex
+from data.review_aggregates import ReviewAggregates
+
+
+class TestRatingIndex(unittest.TestCase):
+    """Test sorting the places by rating
+    """
+
+    def setUp(self):
+        self.places = LazyModelData(lambda: {
+            "p1": {"id": "p1"},
+            "p2": {"id": "p2"},
+            "p3": {"id": "p3"},
+        })
+        self.reviews = LazyModelData(lambda: {
+            "r1": {"id": "r1", "place_id": "p1", "rating": 3},
+            "r2": {"id": "r2", "place_id": "p2", "rating": 5},
+        })
+        self.index = RatingIndex(self.places, ReviewAggregates(self.reviews, self.places))
+
+    def test_lookup(self):
+        """ Tests that places without reviews come below every rating """
+
+        self.assertEqual(self.index.lookup(), ["p3", "p1", "p2"])
+        self.assertEqual(self.index.page(2, reverse=True), (["p2", "p1"], (3, "p1")))
+
+    def test_changes(self):
+        """ Tests that new reviews and places are indexed """
+
+        self.index.lookup()
+        self.reviews["r3"] = {"id": "r3", "place_id": "p3", "rating": 4}
+        self.reviews["r4"] = {"id": "r4", "place_id": "p2", "rating": 0}
+        self.places["p4"] = {"id": "p4"}
+
+        self.assertEqual(self.index.lookup(), ["p4", "p2", "p1", "p3"])
+
+
+if __name__ == '__main__':
+    unittest.main()
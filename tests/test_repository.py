@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import os
+import shutil
+import tempfile
+import unittest
+from data.file_storage import FileStorage
+from data.lazy_model_data import LazyModelData
+from data.repository import Repository
+
+
+class TestRepository(unittest.TestCase):
+    """Test that rows are read and saved by id through the repository
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp_dir, "amenity.json")
+        shutil.copy("data/amenity.json", self.filename)
+
+        self.storage = FileStorage(mode="journal")
+        self.data = LazyModelData(lambda: self.storage.load_model_data(self.filename))
+        self.repository = Repository(self.storage, self.filename, self.data)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_get(self):
+        """ Tests reading rows by id """
+
+        first_id, second_id = list(self.data)[:2]
+        self.assertEqual(self.repository.get(first_id), self.data[first_id])
+        self.assertIsNone(self.repository.get("missing-id"))
+        self.assertEqual(self.repository.get_many([second_id, "missing-id", first_id]),
+                         [self.data[second_id], self.data[first_id]])
+        self.assertTrue(self.repository.exists(first_id))
+        self.assertFalse(self.repository.exists("missing-id"))
+        self.assertEqual(self.repository.count(), len(self.data))
+
+    def test_put_and_delete(self):
+        """ Tests that writes are saved with the storage """
+
+        self.repository.put({"id": "new-id", "name": "Sauna"})
+        reloaded = FileStorage(mode="journal").load_model_data(self.filename)
+        self.assertEqual(reloaded["new-id"]["name"], "Sauna")
+
+        self.assertTrue(self.repository.delete("new-id"))
+        self.assertFalse(self.repository.delete("new-id"))
+        reloaded = FileStorage(mode="journal").load_model_data(self.filename)
+        self.assertNotIn("new-id", reloaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from data.lazy_model_data import LazyModelData
+from data.review_aggregates import ReviewAggregates
+
+
+class TestReviewAggregates(unittest.TestCase):
+    """Test the review totals of places and hosts
+    """
+
+    def setUp(self):
+        self.places = LazyModelData(lambda: {
+            "p1": {"id": "p1", "host_user_id": "u1"},
+            "p2": {"id": "p2", "host_user_id": "u1"},
+            "p3": {"id": "p3", "host_user_id": "u2"},
+        })
+        self.reviews = LazyModelData(lambda: {
+            "r1": {"id": "r1", "place_id": "p1", "rating": 5},
+            "r2": {"id": "r2", "place_id": "p1", "rating": 4},
+            "r3": {"id": "r3", "place_id": "p2", "rating": 2.5},
+            "r4": {"id": "r4", "place_id": "p3", "rating": 1},
+        })
+        self.aggregates = ReviewAggregates(self.reviews, self.places)
+
+    def test_totals(self):
+        """ Tests the counts, averages and histograms """
+
+        place = self.aggregates.place("p1")
+        self.assertEqual(place["count"], 2)
+        self.assertEqual(place["average"], 4.5)
+        self.assertEqual(place["histogram"],
+                         {"0": 0, "1": 0, "2": 0, "3": 0, "4": 1, "5": 1})
+
+        host = self.aggregates.host("u1")
+        self.assertEqual(host["count"], 3)
+        self.assertEqual(host["sum"], 11.5)
+        self.assertEqual(host["histogram"]["3"], 1)
+
+        self.assertEqual(self.aggregates.place("nowhere")["count"], 0)
+        self.assertIsNone(self.aggregates.place("nowhere")["average"])
+
+    def test_review_changes(self):
+        """ Tests that creates, updates and deletes are counted """
+
+        self.aggregates.place("p1")
+        self.reviews["r5"] = {"id": "r5", "place_id": "p1", "rating": 0}
+        row = self.reviews["r1"]
+        row["rating"] = 3
+        self.reviews["r1"] = row
+        del self.reviews["r4"]
+
+        self.assertEqual(self.aggregates.place("p1")["count"], 3)
+        self.assertEqual(self.aggregates.place("p1")["sum"], 7)
+        self.assertEqual(self.aggregates.host("u1")["count"], 4)
+        self.assertEqual(self.aggregates.host("u2")["count"], 0)
+
+    def test_place_changes(self):
+        """ Tests that the totals follow a place to its new host """
+
+        self.aggregates.host("u1")
+        row = self.places["p2"]
+        row["host_user_id"] = "u2"
+        self.places["p2"] = row
+
+        self.assertEqual(self.aggregates.host("u1")["count"], 2)
+        self.assertEqual(self.aggregates.host("u2")["count"], 2)
+        self.assertEqual(self.aggregates.host("u2")["sum"], 3.5)
+
+    def test_not_cached(self):
+        """ Tests that totals that are not cached are counted by the data
+            for the places and hosts asked for only """
+
+        aggregates = ReviewAggregates(self.reviews, self.places, cached=False)
+        self.reviews["r5"] = {"id": "r5", "place_id": "p3", "rating": True}
+        counted = []
+        value_counts = self.reviews.value_counts
+
+        def counting(group_field, field, group_values):
+            counted.append(set(group_values))
+            return value_counts(group_field, field, group_values)
+        self.reviews.value_counts = counting
+
+        self.assertEqual(aggregates.lookup(["p1", "nowhere"], ["u1", "u2"]),
+                         self.aggregates.lookup(["p1", "nowhere"], ["u1", "u2"]))
+        self.assertEqual(counted, [{"p1", "p2", "p3", "nowhere"}])
+        self.assertEqual(aggregates.host("u2")["count"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
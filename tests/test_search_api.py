@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from tests.test_api import ApiTestCase, BLACKBURN, MELBOURNE, RINGWOOD
+
+
+class TestSearch(ApiTestCase):
+    """Test the text search of places and reviews
+    """
+
+    def test_search(self):
+        """ Tests that places and reviews are found by their words """
+
+        output = self.get("/search?q=hotel").get_json()
+        self.assertEqual(output["places"]["total"], 2)
+        self.assertEqual(set(place["id"] for place in output["places"]["results"]),
+                         {RINGWOOD, BLACKBURN})
+        self.assertEqual(output["reviews"]["total"], 0)
+
+        output = self.get("/search?q=floor+dirty&type=reviews").get_json()
+        self.assertNotIn("places", output)
+        self.assertEqual(output["reviews"]["total"], 1)
+
+        output = self.get("/search?q=hotel&type=places&per_page=1&page=2").get_json()
+        self.assertEqual(len(output["places"]["results"]), 1)
+
+        self.get("/search", 400)
+        self.get("/search?q=hotel&type=users", 400)
+        self.get("/search?q=hotel&per_page=0", 400)
+
+
+class TestAutocomplete(ApiTestCase):
+    """Test the autocompletion of city and country names
+    """
+
+    def test_autocomplete(self):
+        """ Tests that cities and countries are completed whatever the case """
+
+        matches = self.get("/autocomplete?q=MEL").get_json()
+        self.assertEqual(matches, [{"type": "city", "id": MELBOURNE, "name": "Melbourne",
+                                    "country_code": "AU"}])
+        names = [match["name"] for match in self.get("/autocomplete?q=a").get_json()]
+        self.assertEqual(names, ["Australia"])
+
+        self.get("/autocomplete?q=+", 400)
+        self.get("/autocomplete?q=mel&limit=0", 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
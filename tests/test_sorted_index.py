@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from flask import Flask
+from werkzeug.exceptions import BadRequest
+from data.lazy_model_data import LazyModelData
+from data.sorted_index import SortedIndex
+from utils import decode_cursor, encode_cursor, keyset_slice
+
+
+class TestSortedIndex(unittest.TestCase):
+    """Test range lookups on the sorted indexes
+    """
+
+    def setUp(self):
+        self.data = LazyModelData(lambda: {
+            "a": {"id": "a", "price": 120},
+            "b": {"id": "b", "price": 80.5},
+            "c": {"id": "c", "price": 120},
+            "d": {"id": "d", "price": "free"},
+        })
+        self.index = SortedIndex(self.data, "price")
+
+    def test_lookup(self):
+        """ Tests that ranges are found in the order of their values """
+
+        self.assertEqual(self.index.lookup(), ["b", "a", "c"])
+        self.assertEqual(self.index.lookup(100), ["a", "c"])
+        self.assertEqual(self.index.lookup(None, 100), ["b"])
+        self.assertEqual(self.index.lookup(80.5, 120), ["b", "a", "c"])
+        self.assertEqual(self.index.lookup(130), [])
+        self.assertEqual(self.index.count(100, 200), 2)
+
+    def test_changes(self):
+        """ Tests that creates, updates and deletes are indexed """
+
+        self.index.lookup()
+        self.data["e"] = {"id": "e", "price": 50}
+        row = self.data["a"]
+        row["price"] = 200
+        self.data["a"] = row
+        del self.data["b"]
+
+        self.assertEqual(self.index.lookup(), ["e", "c", "a"])
+        self.assertEqual(self.index.count(100), 2)
+
+    def test_page(self):
+        """ Tests that pages follow each other in (value, id) order """
+
+        self.assertEqual(self.index.page(2), (["b", "a"], (120, "a")))
+        self.assertEqual(self.index.page(1, (120, "a")), (["c"], (120, "c")))
+        self.assertEqual(self.index.page(2, (100, "z")), (["a", "c"], (120, "c")))
+        self.assertEqual(self.index.page(2, (120, "c")), (["d"], None))
+        self.assertEqual(self.index.page(2, (None, "d")), ([], None))
+
+        self.assertEqual(self.index.page(2, reverse=True), (["c", "a"], (120, "a")))
+        self.assertEqual(self.index.page(2, (120, "a"), reverse=True), (["b", "d"], None))
+
+        # a row added before the cursor doesn't shift the next page
+        self.data["e"] = {"id": "e", "price": 10}
+        self.assertEqual(self.index.page(5, (80.5, "b")), (["a", "c", "d"], None))
+
+    def test_other_values(self):
+        """ Tests that rows whose value is not a number come last, by id """
+
+        self.data["e"] = {"id": "e"}
+        self.assertEqual(self.index.page(10), (["b", "a", "c", "d", "e"], None))
+        self.assertEqual(self.index.page(4), (["b", "a", "c", "d"], (None, "d")))
+        self.assertEqual(self.index.page(4, (None, "d")), (["e"], None))
+        self.assertEqual(self.index.page(2, (120, "c"), reverse=True), (["a", "b"], (80.5, "b")))
+        self.assertEqual(self.index.positions(["e", "d", "c", "b"]),
+                         [(80.5, "b"), (120, "c"), (None, "d"), (None, "e")])
+
+        # a row whose value becomes a number moves out of the others
+        row = self.data["d"]
+        row["price"] = 1
+        self.data["d"] = row
+        del self.data["e"]
+        self.assertEqual(self.index.page(10), (["d", "b", "a", "c"], None))
+        self.assertEqual(self.index.lookup(), ["d", "b", "a", "c"])
+
+    def test_keyset_slice(self):
+        """ Tests that slices of positions page like the index does """
+
+        positions = self.index.positions(["a", "b", "c", "d"])
+        for reverse in (False, True):
+            after = None
+            pages = []
+            while True:
+                expected = self.index.page(1, after, reverse)
+                page, after = keyset_slice(positions, 1, after, reverse)
+                self.assertEqual((page, after), expected)
+                pages += page
+                if after is None:
+                    break
+            self.assertEqual(pages, ["c", "a", "b", "d"] if reverse else ["b", "a", "c", "d"])
+
+
+class TestCursor(unittest.TestCase):
+    """Test reading the cursors of ?after=
+    """
+
+    def test_decode(self):
+        """ Tests that cursors come back the way they were made and that
+            anything else is a bad request """
+
+        app = Flask(__name__)
+        for position in ((120, "a"), (80.5, "b"), (None, "d")):
+            with app.test_request_context():
+                self.assertEqual(decode_cursor(encode_cursor(position)), position)
+        for cursor in ("NQ", "!!", encode_cursor(["a"]), encode_cursor(["x", "a"]),
+                       encode_cursor([True, "a"]), encode_cursor([1, 2]), "e30"):
+            with app.test_request_context(), self.assertRaises(BadRequest):
+                decode_cursor(cursor)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,261 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from data.file_storage import FileStorage
+from data.geo_index import GeoIndex
+from data.lazy_model_data import LazyModelData
+from data.prefix_index import PrefixIndex
+from data.sorted_index import SortedIndex
+from data.sqlite_storage import SQLiteStorage
+from data.text_index import TextIndex
+from data.tile_grid import TileGrid
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    """Test that the SQLite backend behaves like the loaded dictionaries
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.database = os.path.join(self.tmp_dir, "hbnb.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_import_and_save(self):
+        """ Tests that a JSON file is imported and changes are kept """
+
+        storage = SQLiteStorage(self.database)
+        data = storage.load_model_data("data/place.json")
+        self.assertEqual(len(data), 3)
+
+        place_id = next(iter(data))
+        place = data[place_id]
+        place["price_per_night"] = 99.5
+        data[place_id] = place
+        del data[list(data)[1]]
+
+        reloaded = SQLiteStorage(self.database).load_model_data("data/place.json")
+        self.assertEqual(len(reloaded), 2)
+        self.assertEqual(reloaded[place_id], place)
+        self.assertIsInstance(reloaded[place_id]["number_of_rooms"], int)
+
+    def test_foreign_key_indexes(self):
+        """ Tests that foreign keys are indexed """
+
+        storage = SQLiteStorage(self.database)
+        storage.load_model_data("data/review.json")
+
+        plan = storage.connection().execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM review WHERE place_id = ?", ("x",)).fetchall()
+        self.assertIn("review_place_id", str(plan))
+
+    def test_lookup(self):
+        """ Tests that rows are looked up by value in the database, and that
+            a database imported without an index gets it when loaded """
+
+        storage = SQLiteStorage(self.database)
+        data = storage.load_model_data("data/review.json")
+        rows = FileStorage().load_model_data("data/review.json")
+        place_id = next(iter(rows.values()))["place_id"]
+        self.assertEqual(sorted(data.lookup("place_id", place_id)),
+                         sorted(key for key, row in rows.items() if row["place_id"] == place_id))
+        self.assertEqual(data.lookup("place_id", "missing"), [])
+        with self.assertRaises(ValueError):
+            data.lookup("id; DROP TABLE review", "x")
+
+        storage.connection().execute("DROP INDEX review_place_id")
+        storage.load_model_data("data/review.json")
+        plan = storage.connection().execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM review WHERE place_id = ?", ("x",)).fetchall()
+        self.assertIn("review_place_id", str(plan))
+
+        links = storage.load_many_to_many_data("data/place_to_amenity.json")
+        link_key = next(iter(links))
+        place_id, amenity_id = FileStorage.link_ids(link_key)
+        self.assertIn(link_key, links.lookup("place_id", place_id))
+        self.assertIn(link_key, links.lookup("amenity_id", amenity_id))
+
+    def test_get_many_and_page(self):
+        """ Tests that rows are read by id and paged in the database in the
+            same order as a SortedIndex would """
+
+        storage = SQLiteStorage(self.database)
+        data = storage.load_model_data("data/place.json")
+        place_ids = list(data)
+        self.assertEqual([row["id"] for row in data.get_many(place_ids[::-1] + ["missing"])],
+                         place_ids[::-1])
+
+        row = data[place_ids[0]]
+        row["price_per_night"] = "ask"
+        data[place_ids[0]] = row
+        row = data[place_ids[1]]
+        row["price_per_night"] = data[place_ids[2]]["price_per_night"]
+        data[place_ids[1]] = row
+        data["no-price"] = {"id": "no-price"}
+
+        index = SortedIndex(LazyModelData(lambda: dict(data.items())), "price_per_night")
+        for reverse in (False, True):
+            for limit in (1, 2, 10):
+                after = None
+                while True:
+                    expected = index.page(limit, after, reverse)
+                    page = data.page("price_per_night", limit, after, reverse)
+                    self.assertEqual(page, expected)
+                    after = page[1]
+                    if after is None:
+                        break
+
+        plan = storage.connection().execute(
+            "EXPLAIN QUERY PLAN SELECT price_per_night, id FROM place "
+            "WHERE price_per_night > 1 ORDER BY price_per_night, id LIMIT 2").fetchall()
+        self.assertIn("place_price_per_night_id", str(plan))
+
+    def test_value_counts(self):
+        """ Tests that the values of the rows of some groups are counted in
+            the database like the data files would """
+
+        storage = SQLiteStorage(self.database)
+        data = storage.load_model_data("data/review.json")
+        rows = LazyModelData(lambda: FileStorage().load_model_data("data/review.json"))
+        data["no-rating"] = {"id": "no-rating", "place_id": "p", "rating": "good"}
+        place_ids = list(dict.fromkeys(row["place_id"] for row in rows.values())) + ["p"]
+
+        self.assertEqual(sorted(data.value_counts("place_id", "rating", place_ids)),
+                         sorted(rows.value_counts("place_id", "rating", place_ids)))
+        self.assertEqual(data.value_counts("place_id", "rating", ["missing"]), [])
+
+    def test_ranges_and_points(self):
+        """ Tests that ranges of values, boxes and map tiles are read from
+            the database like the indexes would """
+
+        storage = SQLiteStorage(self.database)
+        data = storage.load_model_data("data/place.json")
+        data["no-price"] = {"id": "no-price", "price_per_night": "ask", "latitude": "?"}
+        data["far"] = {"id": "far", "price_per_night": 150, "latitude": 89.9, "longitude": -200}
+        rows = LazyModelData(lambda: dict(data.items()))
+        stored = LazyModelData(lambda: data)
+
+        index = SortedIndex(rows, "price_per_night")
+        stored_index = SortedIndex(stored, "price_per_night", cached=False)
+        for low, high in ((None, None), (100, 150), (150, None), (None, 100), (200, 100)):
+            self.assertEqual(stored_index.lookup(low, high), index.lookup(low, high))
+            self.assertEqual(stored_index.count(low, high), index.count(low, high))
+
+        geo_index = GeoIndex(rows)
+        stored_geo_index = GeoIndex(stored, cached=False)
+        for box in ((-38, 145, -37, 146), (-90, 170, 90, -170), (-90, -180, 90, 180)):
+            self.assertEqual(sorted(stored_geo_index.lookup_points(*box)),
+                             sorted(geo_index.lookup_points(*box)))
+
+        grid = TileGrid(rows)
+        stored_grid = TileGrid(stored, cached=False)
+        for zoom, x, y in ((0, 0, 0), (1, 1, 1), (1, 0, 0), (10, 925, 628), (3, 7, 4)):
+            self.assertEqual(stored_grid.clusters(zoom, x, y), grid.clusters(zoom, x, y))
+
+        plan = storage.connection().execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM place WHERE latitude BETWEEN 1 AND 2").fetchall()
+        self.assertIn("place_latitude", str(plan))
+
+    def test_text_search(self):
+        """ Tests that the words of the rows are kept in the database as the
+            rows change, and scored like a TextIndex would """
+
+        storage = SQLiteStorage(self.database)
+        data = storage.load_model_data("data/place.json")
+        fields = ["name", "description", "address"]
+        index = TextIndex(LazyModelData(lambda: dict(data.items())), fields)
+        stored_index = TextIndex(LazyModelData(lambda: data), fields, cached=False)
+
+        place_id = next(iter(data))
+        row = data[place_id]
+        row["description"] = "A hotel, a HOTEL"
+        data[place_id] = row
+        data["new-id"] = {"id": "new-id", "name": "Hotel"}
+        del data["new-id"]
+        data["other-id"] = {"id": "other-id", "address": "1 Hotel St"}
+
+        for query in ("hotel", "hotel cosy room", "missing", ""):
+            self.assertEqual(stored_index.search(query), index.search(query))
+
+        # a database imported before the words were kept gets them
+        for table in ("place_words", "place_lengths", "place_totals"):
+            storage.connection().execute("DROP TABLE {}".format(table))
+        storage.load_model_data("data/place.json")
+        self.assertEqual(stored_index.search("hotel"), index.search("hotel"))
+
+        # and so does a file imported again
+        storage.import_model_file("data/place.json")
+        index = TextIndex(LazyModelData(lambda: dict(data.items())), fields)
+        self.assertEqual(data.text_search(fields, "hotel"), index.search("hotel"))
+
+        with self.assertRaises(ValueError):
+            data.text_search(["name"], "hotel")
+
+    def test_complete(self):
+        """ Tests that names are found by their start in the database like a
+            PrefixIndex would """
+
+        storage = SQLiteStorage(self.database)
+        data = storage.load_model_data("data/city.json")
+        data["upper"] = {"id": "upper", "name": "MELTON"}
+        data["accent"] = {"id": "accent", "name": "Évian"}
+        data["none"] = {"id": "none", "name": None}
+        index = PrefixIndex(LazyModelData(lambda: dict(data.items())), "name")
+        stored_index = PrefixIndex(LazyModelData(lambda: data), "name", cached=False)
+
+        for prefix in ("mel", "MEL", "év", "", "zz", "\U0010ffff"):
+            for limit in (1, 10):
+                self.assertEqual(stored_index.complete(prefix, limit),
+                                 index.complete(prefix, limit))
+
+        plan = storage.connection().execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM city WHERE py_lower(name) >= 'a' "
+            "ORDER BY py_lower(name), id LIMIT 1").fetchall()
+        self.assertIn("city_name_lower", str(plan))
+
+    def test_many_to_many(self):
+        """ Tests that place to amenity links are kept like in the JSON file """
+
+        storage = SQLiteStorage(self.database)
+        data = storage.load_many_to_many_data("data/place_to_amenity.json")
+        self.assertEqual(dict(data.items()),
+                         FileStorage().load_many_to_many_data("data/place_to_amenity.json"))
+
+        data["place-id:amenity-id"] = {"place_id": "place-id", "amenity_id": "amenity-id"}
+        self.assertIn("place-id:amenity-id", data)
+        del data["place-id:amenity-id"]
+        with self.assertRaises(KeyError):
+            data["place-id:amenity-id"]
+        with self.assertRaises(KeyError):
+            data["missing"]
+
+    def test_list_places(self):
+        """ Tests that the app lists every place from the database. The
+            storage is picked when the app is imported, so it runs in a
+            process of its own """
+
+        script = ("import json\n"
+                  "from app import app\n"
+                  "response = app.test_client().get('/api/v1/places')\n"
+                  "print(json.dumps([response.status_code, response.get_json()]))\n")
+        env = dict(os.environ, STORAGE_BACKEND="sqlite", DATABASE=self.database)
+        output = subprocess.run([sys.executable, "-c", script], env=env, check=True,
+                                stdout=subprocess.PIPE).stdout
+        status, places = json.loads(output.decode().splitlines()[-1])
+
+        self.assertEqual(status, 200)
+        self.assertEqual(sorted(place["id"] for place in places),
+                         sorted(FileStorage().load_model_data("data/place.json")))
+        self.assertIn("average_rating", places[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
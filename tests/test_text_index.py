@@ -0,0 +1,48 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from data.lazy_model_data import LazyModelData
+from data.text_index import TextIndex, tokenize
+
+
+class TestTextIndex(unittest.TestCase):
+    """Test full-text searches
+    """
+
+    def setUp(self):
+        self.data = LazyModelData(lambda: {
+            "a": {"id": "a", "name": "Beach house", "description": "Quiet house by the beach"},
+            "b": {"id": "b", "name": "City flat", "description": "Close to the beach"},
+            "c": {"id": "c", "name": "Farm", "description": None},
+        })
+        self.index = TextIndex(self.data, ["name", "description"])
+
+    def test_tokenize(self):
+        """ Tests that words are split and lowercased """
+        self.assertEqual(tokenize("Quiet, by the BEACH!"), ["quiet", "by", "the", "beach"])
+
+    def test_search(self):
+        """ Tests that matches are ranked best first """
+
+        results = self.index.search("beach house")
+        self.assertEqual([key for key, score in results], ["a", "b"])
+        self.assertGreater(results[0][1], results[1][1])
+        self.assertEqual(self.index.search("castle"), [])
+
+    def test_changes(self):
+        """ Tests that creates, updates and deletes are indexed """
+
+        self.index.search("beach")
+        self.data["d"] = {"id": "d", "name": "Castle", "description": "Far from any beach"}
+        row = self.data["b"]
+        row["description"] = "Close to the shops"
+        self.data["b"] = row
+        del self.data["a"]
+
+        self.assertEqual([key for key, score in self.index.search("beach")], ["d"])
+        self.assertEqual([key for key, score in self.index.search("shops")], ["b"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from data.lazy_model_data import LazyModelData
+from data.tile_grid import TileGrid, tile_of
+
+
+class TestTileGrid(unittest.TestCase):
+    """Test the clusters of places on map tiles
+    """
+
+    def setUp(self):
+        self.data = LazyModelData(lambda: {
+            "a": {"id": "a", "latitude": -37.81, "longitude": 145.12},
+            "b": {"id": "b", "latitude": -37.82, "longitude": 145.15},
+            "c": {"id": "c", "latitude": 51.5, "longitude": -0.12},
+        })
+        self.grid = TileGrid(self.data, max_zoom=10)
+
+    def test_tile_of(self):
+        """ Tests the web map tile numbers """
+        self.assertEqual(tile_of(0, 0, 0), (0, 0))
+        self.assertEqual(tile_of(51.5, -0.12, 10), (511, 340))
+
+    def test_clusters(self):
+        """ Tests that nearby places are clustered with their centroid """
+
+        clusters = self.grid.clusters(0, 0, 0)
+        self.assertEqual(sorted(count for count, lat, lon in clusters), [1, 2])
+
+        count, lat, lon = max(clusters)
+        self.assertAlmostEqual(lat, -37.815)
+        self.assertAlmostEqual(lon, 145.135)
+
+        # past the deepest zoom kept, every tile is a single cell
+        x, y = tile_of(51.5, -0.12, 9)
+        self.assertEqual(len(self.grid.clusters(9, x, y)), 1)
+
+    def test_changes(self):
+        """ Tests that the counts follow moved and deleted places """
+
+        self.grid.clusters(0, 0, 0)
+        row = self.data["c"]
+        row["latitude"], row["longitude"] = -37.8, 145.1
+        self.data["c"] = row
+        del self.data["a"]
+
+        self.assertEqual([count for count, lat, lon in self.grid.clusters(0, 0, 0)], [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
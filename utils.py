@@ -1,4 +1,8 @@
-from flask import jsonify
+import base64
+import json
+import math
+from urllib.parse import urlencode
+from flask import jsonify, request, abort
 
 
 def pretty_json(data):
@@ -6,3 +10,133 @@ def pretty_json(data):
     response = jsonify(data)
     response.headers.add('Content-Type', 'application/json')
     return response
+
+
+def field_args():
+    """Returns the set of fields asked for by ?fields=id,name, or None when
+    every field is shown, as it is for an empty ?fields="""
+    fields = set(field.strip() for field in request.args.get("fields", "").split(","))
+    fields.discard("")
+    return fields or None
+
+
+def projection(fields, builders):
+    """Returns {name: builder()} of the builders (functions computing the
+    value of a field) whose name is in fields, or of all of them if fields
+    is None, so that the fields that are not shown are never computed"""
+    return dict((name, build()) for name, build in builders.items()
+                if fields is None or name in fields)
+
+
+def selected(fields, values):
+    """Returns the items of values whose name is in fields, or all of them
+    if fields is None, for values that are computed anyway"""
+    if fields is None:
+        return values
+    return dict((name, value) for name, value in values.items() if name in fields)
+
+
+def encode_cursor(position):
+    """Turns the (value, id) of the last row of a page into an opaque cursor"""
+    text = json.dumps(list(position), separators=(",", ":"))
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Returns the (value, id) of a cursor made by encode_cursor(). The value
+    is a number, or None for the rows sorted after every number"""
+    try:
+        text = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        position = json.loads(text)
+    except ValueError:
+        abort(400, f"Invalid cursor: {cursor}")
+    if not isinstance(position, list) or len(position) != 2:
+        abort(400, f"Invalid cursor: {cursor}")
+    value, row_id = position
+    if value is not None and (not isinstance(value, (int, float)) or isinstance(value, bool)):
+        abort(400, f"Invalid cursor: {cursor}")
+    if not isinstance(row_id, str):
+        abort(400, f"Invalid cursor: {cursor}")
+    return value, row_id
+
+
+def page_args(max_limit=1000):
+    """Returns (limit, (value, id) to start after or None) of ?limit= and
+    ?after=, or None when neither is given and everything is returned"""
+    if "limit" not in request.args and "after" not in request.args:
+        return None
+
+    try:
+        limit = int(request.args.get("limit", 100))
+    except ValueError:
+        abort(400, f"Invalid number for limit: {request.args['limit']}")
+    if not 1 <= limit <= max_limit:
+        abort(400, f"limit has to be between 1 and {max_limit}")
+
+    after = request.args.get("after")
+    return limit, None if after is None else decode_cursor(after)
+
+
+def float_arg(name):
+    """Returns the query parameter name, which has to be a finite number"""
+    try:
+        value = float(request.args[name])
+    except KeyError:
+        abort(400, f"Missing parameter: {name}")
+    except ValueError:
+        abort(400, f"Invalid number for {name}: {request.args[name]}")
+    if not math.isfinite(value):
+        abort(400, f"Invalid number for {name}: {request.args[name]}")
+    return value
+
+
+def int_arg(name, default, low, high):
+    """Returns the query parameter name, which has to be an integer in
+    [low, high], or default when it isn't given"""
+    try:
+        value = int(request.args.get(name, default))
+    except ValueError:
+        abort(400, f"Invalid number for {name}: {request.args[name]}")
+    if not low <= value <= high:
+        abort(400, f"{name} has to be between {low} and {high}")
+    return value
+
+
+def follows(position, after, reverse=False):
+    """Returns True if the row (value, id) of position comes after the row
+    of after in a page. Rows with a value of None come after every number,
+    by id, whichever way the numbers go"""
+    value, row_id = position
+    after_value, after_id = after
+    if (value is None) != (after_value is None):
+        return value is None
+    if value is None or value == after_value:
+        return row_id < after_id if reverse and value is not None else row_id > after_id
+    return value < after_value if reverse else value > after_value
+
+
+def keyset_slice(positions, limit, after, reverse=False):
+    """Returns the ids of the page that page_args() asks for out of the
+    (value, id) of rows that were not read from a SortedIndex, as sorted by
+    SortedIndex.positions(), and the (value, id) of its last row if there
+    are more. reverse goes from the highest value down"""
+    if reverse:
+        numbers = [position for position in positions if position[0] is not None]
+        positions = numbers[::-1] + positions[len(numbers):]
+    if after is not None:
+        positions = [position for position in positions if follows(position, after, reverse)]
+    page = [row_id for value, row_id in positions[:limit]]
+    return page, positions[limit - 1] if len(positions) > limit else None
+
+
+def paged_json(data, next_position):
+    """pretty_json() of a page, with the cursor of the next page, if any, in
+    the X-Next-Cursor header and in a Link header"""
+    response = pretty_json(data)
+    if next_position is not None:
+        cursor = encode_cursor(next_position)
+        args = request.args.to_dict()
+        args["after"] = cursor
+        response.headers["X-Next-Cursor"] = cursor
+        response.headers["Link"] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response